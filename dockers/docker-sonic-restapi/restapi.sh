@@ -3,23 +3,25 @@
 RESTAPI_ARGS=""
 while true
 do
-    has_client_auth=$(sonic-cfggen -d -v "1 if RESTAPI and RESTAPI['config']")
+    eval "$(sonic-cfggen -d \
+        -e has_client_auth="1 if RESTAPI and RESTAPI['config']" \
+        -e config_client_auth="RESTAPI['config']['client_auth']" \
+        -e certs="RESTAPI['certs']" \
+        -e allow_insecure="RESTAPI['config']['allow_insecure']" \
+        -e SERVER_CRT="RESTAPI['certs']['server_crt']" \
+        -e SERVER_KEY="RESTAPI['certs']['server_key']" \
+        -e CLIENT_CA_CRT="RESTAPI['certs']['client_ca_crt']" \
+        -e CLIENT_CRT_CNAME="RESTAPI['certs']['client_crt_cname']")"
     if [ "$has_client_auth" == "1" ]; then
-        client_auth=$(sonic-cfggen -d -v "RESTAPI['config']['client_auth']")
+        client_auth=$config_client_auth
     fi
     if [[ $client_auth == 'true' ]]; then
-        certs=`sonic-cfggen -d -v "RESTAPI['certs']"`
-        allow_insecure=`sonic-cfggen -d -v "RESTAPI['config']['allow_insecure']"`
         if [[ $allow_insecure == 'true' ]]; then
             RESTAPI_ARGS=" -enablehttp=true"
         else
             RESTAPI_ARGS=" -enablehttp=false"
         fi
         if [[ -n "$certs" ]]; then
-                SERVER_CRT=`sonic-cfggen -d -v "RESTAPI['certs']['server_crt']"`
-                SERVER_KEY=`sonic-cfggen -d -v "RESTAPI['certs']['server_key']"`
-                CLIENT_CA_CRT=`sonic-cfggen -d -v "RESTAPI['certs']['client_ca_crt']"`
-                CLIENT_CRT_CNAME=`sonic-cfggen -d -v "RESTAPI['certs']['client_crt_cname']"`
                 if [[ -f $SERVER_CRT && -f $SERVER_KEY && -f $CLIENT_CA_CRT ]]; then
                     RESTAPI_ARGS+=" -enablehttps=true -servercert=$SERVER_CRT -serverkey=$SERVER_KEY -clientcert=$CLIENT_CA_CRT -clientcertcommonname=$CLIENT_CRT_CNAME"
                     break
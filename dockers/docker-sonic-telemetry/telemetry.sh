@@ -2,36 +2,43 @@
 
 # Try to read telemetry and certs config from ConfigDB.
 # Use default value if no valid config exists
-X509=`sonic-cfggen -d -v "DEVICE_METADATA['x509']"`
-gnmi=`sonic-cfggen -d -v "TELEMETRY['gnmi']"`
-certs=`sonic-cfggen -d -v "TELEMETRY['certs']"`
+eval "$(sonic-cfggen -d \
+    -e X509="DEVICE_METADATA['x509']" \
+    -e X509_SERVER_CRT="DEVICE_METADATA['x509']['server_crt']" \
+    -e X509_SERVER_KEY="DEVICE_METADATA['x509']['server_key']" \
+    -e X509_CA_CRT="DEVICE_METADATA['x509']['ca_crt']" \
+    -e gnmi="TELEMETRY['gnmi']" \
+    -e certs="TELEMETRY['certs']" \
+    -e CERTS_SERVER_CRT="TELEMETRY['certs']['server_crt']" \
+    -e CERTS_SERVER_KEY="TELEMETRY['certs']['server_key']" \
+    -e CERTS_CA_CRT="TELEMETRY['certs']['ca_crt']")"
 
 TELEMETRY_ARGS=" -logtostderr"
 export CVL_SCHEMA_PATH=/usr/sbin/schema
 
 if [ -n "$certs" ]; then
-    SERVER_CRT=`sonic-cfggen -d -v "TELEMETRY['certs']['server_crt']"`
-    SERVER_KEY=`sonic-cfggen -d -v "TELEMETRY['certs']['server_key']"`
+    SERVER_CRT=$CERTS_SERVER_CRT
+    SERVER_KEY=$CERTS_SERVER_KEY
     if [ -z $SERVER_CRT  ] || [ -z $SERVER_KEY  ]; then
         TELEMETRY_ARGS+=" --insecure"
     else
         TELEMETRY_ARGS+=" --server_crt $SERVER_CRT --server_key $SERVER_KEY "
     fi
 
-    CA_CRT=`sonic-cfggen -d -v "TELEMETRY['certs']['ca_crt']"`
+    CA_CRT=$CERTS_CA_CRT
     if [ ! -z $CA_CRT ]; then
         TELEMETRY_ARGS+=" --ca_crt $CA_CRT"
     fi
 elif [ -n "$X509" ]; then
-    SERVER_CRT=`sonic-cfggen -d -v "DEVICE_METADATA['x509']['server_crt']"`
-    SERVER_KEY=`sonic-cfggen -d -v "DEVICE_METADATA['x509']['server_key']"`
+    SERVER_CRT=$X509_SERVER_CRT
+    SERVER_KEY=$X509_SERVER_KEY
     if [ -z $SERVER_CRT  ] || [ -z $SERVER_KEY  ]; then
         TELEMETRY_ARGS+=" --insecure"
     else
         TELEMETRY_ARGS+=" --server_crt $SERVER_CRT --server_key $SERVER_KEY "
     fi
 
-    CA_CRT=`sonic-cfggen -d -v "DEVICE_METADATA['x509']['ca_crt']"`
+    CA_CRT=$X509_CA_CRT
     if [ ! -z $CA_CRT ]; then
         TELEMETRY_ARGS+=" --ca_crt $CA_CRT"
     fi
@@ -44,15 +51,17 @@ if [ -z "$gnmi" ]; then
     sonic-db-cli CONFIG_DB hset "TELEMETRY|gnmi" port 8080
 fi
 
-PORT=`sonic-cfggen -d -v "TELEMETRY['gnmi']['port']"`
+eval "$(sonic-cfggen -d \
+    -e PORT="TELEMETRY['gnmi']['port']" \
+    -e CLIENT_AUTH="TELEMETRY['gnmi']['client_auth']" \
+    -e LOG_LEVEL="TELEMETRY['gnmi']['log_level']")"
+
 TELEMETRY_ARGS+=" --port $PORT"
 
-CLIENT_AUTH=`sonic-cfggen -d -v "TELEMETRY['gnmi']['client_auth']"`
 if [ -z $CLIENT_AUTH ] || [ $CLIENT_AUTH == "false" ]; then
     TELEMETRY_ARGS+=" --allow_no_client_auth"
 fi
 
-LOG_LEVEL=`sonic-cfggen -d -v "TELEMETRY['gnmi']['log_level']"`
 if [ ! -z $LOG_LEVEL ]; then
     TELEMETRY_ARGS+=" -v=$LOG_LEVEL"
 else
@@ -23,10 +23,14 @@ function modify_ntp_default
     sed -e "$1" ${ntp_temp_file} >${ntp_default_file}
 }
 
-sonic-cfggen -d -t /usr/share/sonic/templates/ntp.conf.j2 >/etc/ntp.conf
+# sonic-cfggen exits with 3 when /etc/ntp.conf already holds this configuration
+sonic-cfggen -d -t /usr/share/sonic/templates/ntp.conf.j2,/etc/ntp.conf --if-changed
+ntp_conf_rc=$?
 
 get_database_reboot_type
 echo "Disabling NTP long jump for reboot type ${reboot_type} ..."
 modify_ntp_default "s/NTPD_OPTS='-g'/NTPD_OPTS='-x'/"
 
-systemctl restart ntp
+if [ ${ntp_conf_rc} -ne 3 ] || ! cmp -s ${ntp_temp_file} ${ntp_default_file}; then
+    systemctl restart ntp
+fi
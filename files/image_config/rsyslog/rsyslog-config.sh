@@ -1,4 +1,7 @@
 #!/bin/bash
 
-sonic-cfggen -d -t /usr/share/sonic/templates/rsyslog.conf.j2 >/etc/rsyslog.conf
-systemctl restart rsyslog
+# sonic-cfggen exits with 3 when /etc/rsyslog.conf already holds this configuration
+sonic-cfggen -d -t /usr/share/sonic/templates/rsyslog.conf.j2,/etc/rsyslog.conf --if-changed
+if [ $? -ne 3 ]; then
+    systemctl restart rsyslog
+fi
@@ -1,8 +1,6 @@
-from collections import OrderedDict
-from functools import partial
-
 import jinja2
-import netaddr
+# The ip prefix filters and their cache of parsed prefixes are shared with sonic-cfggen
+import template_filters
 
 
 class TemplateFabric(object):
@@ -11,11 +9,7 @@ class TemplateFabric(object):
         j2_template_paths = [template_path]
         j2_loader = jinja2.FileSystemLoader(j2_template_paths)
         j2_env = jinja2.Environment(loader=j2_loader, trim_blocks=False)
-        j2_env.filters['ipv4'] = self.is_ipv4
-        j2_env.filters['ipv6'] = self.is_ipv6
-        j2_env.filters['pfx_filter'] = self.pfx_filter
-        for attr in ['ip', 'network', 'prefixlen', 'netmask']:
-            j2_env.filters[attr] = partial(self.prefix_attr, attr)
+        j2_env.filters.update(template_filters.get_filters(['ip', 'network', 'prefixlen', 'netmask']))
         self.env = j2_env
 
     def from_file(self, filename):
@@ -37,30 +31,12 @@ class TemplateFabric(object):
     @staticmethod
     def is_ipv4(value):
         """ Return True if the value is an ipv4 address """
-        if not value:
-            return False
-        if isinstance(value, netaddr.IPNetwork):
-            addr = value
-        else:
-            try:
-                addr = netaddr.IPNetwork(str(value))
-            except (netaddr.NotRegisteredError, netaddr.AddrFormatError, netaddr.AddrConversionError):
-                return False
-        return addr.version == 4
+        return template_filters.is_ipv4(value)
 
     @staticmethod
     def is_ipv6(value):
         """ Return True if the value is an ipv6 address """
-        if not value:
-            return False
-        if isinstance(value, netaddr.IPNetwork):
-            addr = value
-        else:
-            try:
-                addr = netaddr.IPNetwork(str(value))
-            except (netaddr.NotRegisteredError, netaddr.AddrFormatError, netaddr.AddrConversionError):
-                return False
-        return addr.version == 6
+        return template_filters.is_ipv6(value)
 
     @staticmethod
     def prefix_attr(attr, value):
@@ -70,14 +46,7 @@ class TemplateFabric(object):
         :param value: the string representation of ip prefix which will be converted to IPNetwork.
         :return: the value of the extracted attribute
         """
-        if not value:
-            return None
-        else:
-            try:
-                prefix = netaddr.IPNetwork(str(value))
-            except (netaddr.NotRegisteredError, netaddr.AddrFormatError, netaddr.AddrConversionError):
-                return None
-        return str(getattr(prefix, attr))
+        return template_filters.prefix_attr(attr, value)
 
     @staticmethod
     def pfx_filter(value):
@@ -86,13 +55,4 @@ class TemplateFabric(object):
            take into account the tuple.
            For eg - VLAN_INTERFACE|Vlan1000 vs VLAN_INTERFACE|Vlan1000|192.168.0.1/21
         """
-        table = OrderedDict()
-
-        if not value:
-            return table
-
-        for key, val in value.items():
-            if not isinstance(key, tuple):
-                continue
-            table[key] = val
-        return table
\ No newline at end of file
+        return template_filters.pfx_filter(value)
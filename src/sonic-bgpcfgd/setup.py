@@ -10,6 +10,6 @@ setuptools.setup(name='sonic-bgpcfgd',
       url='https://github.com/Azure/sonic-buildimage',
       packages=setuptools.find_packages(),
       scripts=['bgpcfgd'],
-      install_requires=['jinja2>=2.10', 'netaddr', 'pyyaml'],
+      install_requires=['jinja2>=2.10', 'netaddr', 'pyyaml', 'sonic-config-engine'],
       setup_requires=['pytest-runner', 'pytest'],
 )
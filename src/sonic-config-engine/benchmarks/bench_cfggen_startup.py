@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""bench_cfggen_startup.py
+
+Start time of sonic-cfggen for the kinds of invocations made during boot, with
+a budget per mode: the heavy modules it may import, and the milliseconds it
+may spend importing modules. sonic-cfggen only imports a dependency on the
+code path that uses it (see lazy_import.py), so a lookup in config DB does not
+pay for lxml nor a minigraph parse for yaml.
+
+    python bench_cfggen_startup.py                 # print the measures
+    python bench_cfggen_startup.py --db --check    # also the config DB modes, fail over budget
+    python bench_cfggen_startup.py --imports-only --check
+
+Each run is a new process, with the data cache disabled and the templates
+served from a bytecode directory filled by a first run, as the directory the
+image is built with (see sonic-cfggen --compile-templates). The time
+budgets are about twice what a development machine measures, the imported
+modules do not depend on the machine. --db needs a config DB holding the
+DEVICE_METADATA table.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ENGINE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+SCRIPT = os.path.join(ENGINE_DIR, 'sonic-cfggen')
+TESTS_DIR = os.path.join(ENGINE_DIR, 'tests')
+
+SAMPLE_GRAPH = os.path.join(TESTS_DIR, 't0-sample-graph.xml')
+SAMPLE_PORT_CONFIG = os.path.join(TESTS_DIR, 't0-sample-port-config.ini')
+SAMPLE_YAML = os.path.join(TESTS_DIR, 'test.yml')
+SAMPLE_TEMPLATE = os.path.join(TESTS_DIR, 'test.j2')
+
+# Modules that take most of the start time, by the name of their package
+HEAVY_MODULES = ['jinja2', 'yaml', 'lxml', 'netaddr', 'natsort', 'swsssdk', 'redis']
+
+# (name, arguments, heavy modules allowed, import time budget in ms, needs config DB)
+MODES = [
+    ('additional data -v', ['-a', '{"DEVICE_METADATA": {"localhost": {"hwsku": "Force10-S6000"}}}',
+                            '-v', "DEVICE_METADATA['localhost']['hwsku']"], ['jinja2'], 80, False),
+    ('yaml -v', ['-y', SAMPLE_YAML, '-v', 'yml_item'], ['jinja2', 'yaml'], 100, False),
+    ('hwsku --print-data', ['-k', 'Force10-S6000', '-p', SAMPLE_PORT_CONFIG, '--print-data'], ['natsort'], 60, False),
+    ('minigraph --print-data', ['-m', SAMPLE_GRAPH, '-p', SAMPLE_PORT_CONFIG, '--print-data'], ['lxml', 'natsort'], 120, False),
+    ('minigraph -t', ['-m', SAMPLE_GRAPH, '-p', SAMPLE_PORT_CONFIG, '-t', SAMPLE_TEMPLATE], ['jinja2', 'lxml', 'natsort'], 180, False),
+    ('config DB -v', ['-d', '-v', "DEVICE_METADATA['localhost']['hwsku']"], ['jinja2', 'swsssdk', 'redis'], 120, True),
+    ('config DB --print-data', ['-d', '--print-data'], ['natsort', 'swsssdk', 'redis'], 100, True),
+]
+
+
+def run_script(result_file, argv):
+    """Run sonic-cfggen with argv in this process, timing the imports, and save
+    the results as json into result_file"""
+    import __builtin__
+    import runpy
+
+    import_time = [0.0]
+    depth = [0]
+    builtin_import = __builtin__.__import__
+
+    def timed_import(*args, **kwargs):
+        # Only the outermost imports are timed, they include the nested ones
+        depth[0] += 1
+        start = time.time()
+        try:
+            return builtin_import(*args, **kwargs)
+        finally:
+            depth[0] -= 1
+            if depth[0] == 0:
+                import_time[0] += time.time() - start
+
+    # As when the script is run, its directory comes first in the module search path
+    sys.path[0] = ENGINE_DIR
+    sys.argv = [SCRIPT] + argv
+    __builtin__.__import__ = timed_import
+    start = time.time()
+    try:
+        runpy.run_path(SCRIPT, run_name='__main__')
+    finally:
+        total = time.time() - start
+        __builtin__.__import__ = builtin_import
+        modules = set(name.split('.')[0] for name, module in sys.modules.items() if module is not None)
+        with open(result_file, 'w') as f:
+            json.dump({'import_ms': import_time[0] * 1000, 'total_ms': total * 1000,
+                       'heavy_modules': sorted(modules.intersection(HEAVY_MODULES))}, f)
+
+def measure(argv, bytecode_dir):
+    (fd, result_file) = tempfile.mkstemp()
+    os.close(fd)
+    env = dict(os.environ, SONIC_CFGGEN_CACHE_DIR='', SONIC_CFGGEN_BYTECODE_DIR=bytecode_dir)
+    try:
+        with open(os.devnull, 'w') as devnull:
+            subprocess.check_call([sys.executable, os.path.realpath(__file__), '--run', result_file] + argv,
+                                  stdout=devnull, stderr=devnull, env=env)
+        with open(result_file) as f:
+            return json.load(f)
+    finally:
+        os.remove(result_file)
+
+def median(values):
+    return sorted(values)[len(values) // 2]
+
+def check_budget(name, runs, allowed, budget_ms, imports_only):
+    result = {
+        'mode': name,
+        'heavy_modules': runs[0]['heavy_modules'],
+        'unexpected_modules': sorted(set(runs[0]['heavy_modules']) - set(allowed)),
+        'budget_ms': budget_ms,
+    }
+    over_budget = bool(result['unexpected_modules'])
+    if not imports_only:
+        result['import_ms'] = round(median([run['import_ms'] for run in runs]), 1)
+        result['total_ms'] = round(median([run['total_ms'] for run in runs]), 1)
+        over_budget = over_budget or result['import_ms'] > budget_ms
+    result['over_budget'] = over_budget
+    return result
+
+def main():
+    # --run RESULT_FILE ARGS... runs sonic-cfggen ARGS..., they are not parsed here
+    if sys.argv[1:2] == ['--run']:
+        run_script(sys.argv[2], sys.argv[3:])
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark sonic-cfggen start time.")
+    parser.add_argument("--db", help="also run the modes reading config DB", action='store_true')
+    parser.add_argument("--repeat", help="runs per mode, the median is kept", type=int, default=5)
+    parser.add_argument("--imports-only", help="only check the imported modules, not the time", action='store_true')
+    parser.add_argument("--check", help="exit with 1 if a mode is over budget", action='store_true')
+    parser.add_argument("--json", help="print results as json", action='store_true')
+    args = parser.parse_args()
+
+    results = []
+    bytecode_dir = tempfile.mkdtemp()
+    try:
+        for (name, argv, allowed, budget_ms, needs_db) in MODES:
+            if needs_db and not args.db:
+                continue
+            # The first run fills the bytecode directory
+            measure(argv, bytecode_dir)
+            runs = [measure(argv, bytecode_dir) for _ in range(1 if args.imports_only else args.repeat)]
+            results.append(check_budget(name, runs, allowed, budget_ms, args.imports_only))
+    finally:
+        shutil.rmtree(bytecode_dir)
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        print('{:<24} {:>11} {:>11} {:>11}  {}'.format('mode', 'import (ms)', 'total (ms)', 'budget (ms)', 'heavy modules'))
+        for r in results:
+            print('{:<24} {:>11} {:>11} {:>11}  {}{}'.format(
+                r['mode'], r.get('import_ms', '-'), r.get('total_ms', '-'), r['budget_ms'],
+                ', '.join(r['heavy_modules']) or '-',
+                ' (not allowed: {})'.format(', '.join(r['unexpected_modules'])) if r['unexpected_modules'] else ''))
+
+    if args.check and any(r['over_budget'] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""bench_configdb_snapshot.py
+
+Time reading a whole config DB with one HGETALL round trip per key, the way
+ConfigDBConnector.get_config() does, against the pipelined and the scripted
+reads of configdb_snapshot, for growing numbers of keys.
+
+The database given with --db is filled with synthetic tables and flushed
+afterwards, so it must be empty when the benchmark starts. Do not point it at
+a database in use.
+
+Example:
+    python bench_configdb_snapshot.py -s /var/run/redis/redis.sock --db 15 --keys 1000,10000,100000
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+from configdb_snapshot import TABLE_NAME_SEPARATOR, add_entries, read_hashes, scan_hashes, scan_keys
+
+
+def populate(client, num_keys):
+    """Fill the database with num_keys entries spread over typical tables"""
+    pipe = client.pipeline(transaction=False)
+    for i in range(num_keys):
+        kind = i % 4
+        if kind == 0:
+            key = 'PORT|Ethernet{}'.format(i)
+            value = {'alias': 'etp{}'.format(i), 'lanes': '{0},{1},{2},{3}'.format(i, i + 1, i + 2, i + 3),
+                     'speed': '100000', 'mtu': '9100', 'admin_status': 'up'}
+        elif kind == 1:
+            key = 'INTERFACE|Ethernet{0}|10.{1}.{2}.0/31'.format(i, (i >> 8) & 0xff, i & 0xff)
+            value = {'NULL': 'NULL'}
+        elif kind == 2:
+            key = 'VLAN_MEMBER|Vlan{0}|Ethernet{1}'.format(1000 + i % 4000, i)
+            value = {'tagging_mode': 'tagged'}
+        else:
+            key = 'ACL_RULE|DATAACL|RULE_{}'.format(i)
+            value = {'PRIORITY': str(i), 'PACKET_ACTION': 'FORWARD', 'SRC_IP': '10.0.0.{}/32'.format(i % 256),
+                     'L4_DST_PORT_RANGE@': '1,2'}
+        pipe.hmset(key, value)
+        if i % 1000 == 999:
+            pipe.execute()
+    pipe.execute()
+
+def get_config_per_key(client):
+    """Same access pattern as ConfigDBConnector.get_config()"""
+    hashes = []
+    for key in client.keys('*'):
+        if TABLE_NAME_SEPARATOR in key:
+            hashes.append((key, client.hgetall(key)))
+    return add_entries({}, hashes)
+
+def get_config_pipelined(client, batch_size):
+    return add_entries({}, read_hashes(client, scan_keys(client), batch_size))
+
+def get_config_scripted(client, batch_size):
+    return add_entries({}, scan_hashes(client, None, batch_size))
+
+def timed(func, *args):
+    start = time.time()
+    result = func(*args)
+    return result, time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full config DB reads.")
+    parser.add_argument("-s", "--unix-socket-path", help="unix socket of the redis server")
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--db", help="empty scratch database index", type=int, default=15)
+    parser.add_argument("--keys", help="comma separated key counts", default='1000,10000,100000')
+    parser.add_argument("--batch-size", help="keys per SCAN page or HGETALL round trip", type=int, default=1000)
+    parser.add_argument("--json", help="print results as json", action='store_true')
+    args = parser.parse_args()
+
+    if args.unix_socket_path:
+        client = redis.StrictRedis(unix_socket_path=args.unix_socket_path, db=args.db, decode_responses=True)
+    else:
+        client = redis.StrictRedis(host=args.host, port=args.port, db=args.db, decode_responses=True)
+    if client.dbsize() != 0:
+        print('Database {} is not empty, refusing to use it'.format(args.db), file=sys.stderr)
+        sys.exit(1)
+
+    results = []
+    try:
+        for num_keys in [int(n) for n in args.keys.split(',')]:
+            client.flushdb()
+            populate(client, num_keys)
+            per_key_data, per_key_time = timed(get_config_per_key, client)
+            pipelined_data, pipelined_time = timed(get_config_pipelined, client, args.batch_size)
+            scripted_data, scripted_time = timed(get_config_scripted, client, args.batch_size)
+            if pipelined_data != per_key_data or scripted_data != per_key_data:
+                print('Snapshot of {} keys differs from per key read'.format(num_keys), file=sys.stderr)
+                sys.exit(1)
+            results.append({'keys': num_keys, 'per_key_sec': round(per_key_time, 4),
+                            'pipelined_sec': round(pipelined_time, 4),
+                            'scripted_sec': round(scripted_time, 4),
+                            'speedup': round(per_key_time / scripted_time, 1)})
+    finally:
+        client.flushdb()
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        print('{:>10} {:>14} {:>14} {:>14} {:>8}'.format('keys', 'per key (s)', 'pipelined (s)', 'scripted (s)', 'speedup'))
+        for r in results:
+            print('{keys:>10} {per_key_sec:>14} {pipelined_sec:>14} {scripted_sec:>14} {speedup:>8}'.format(**r))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""bench_minigraph_parse.py
+
+Time and peak memory of minigraph.parse_xml() on a sample minigraph grown to
+a given number of extra neighbors, optionally compared with another version
+of minigraph.py, for instance the DOM based parser:
+
+    git show <commit>:src/sonic-config-engine/minigraph.py > /tmp/minigraph_dom.py
+    python bench_minigraph_parse.py --baseline /tmp/minigraph_dom.py --devices 1000,5000,20000
+
+Each parse runs in its own process so that its peak RSS can be measured.
+"""
+
+from __future__ import print_function
+
+import argparse
+import copy
+import imp
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from lxml import etree as ET
+
+ENGINE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+sys.path.insert(0, ENGINE_DIR)
+
+SAMPLE_GRAPH = os.path.join(ENGINE_DIR, 'tests', 't0-sample-graph.xml')
+SAMPLE_PORT_CONFIG = os.path.join(ENGINE_DIR, 'tests', 't0-sample-port-config.ini')
+
+NS = '{Microsoft.Search.Autopilot.Evolution}'
+NS1 = '{http://schemas.datacontract.org/2004/07/Microsoft.Search.Autopilot.Evolution}'
+
+
+def set_text(elem, tag, text):
+    child = elem.find(tag)
+    if child is not None:
+        child.text = text
+
+def grow_minigraph(src, dst, num_devices):
+    """Write src with num_devices more neighbors to dst, each with a device, a link, a BGP session and a router declaration"""
+    tree = ET.parse(src)
+    root = tree.getroot()
+    hostname = root.find(NS + 'Hostname').text
+    png = root.find(NS + 'PngDec')
+    devices = png.find(NS + 'Devices')
+    links = png.find(NS + 'DeviceInterfaceLinks')
+    # The first device is the switch itself
+    device = devices[-1]
+    link = links[-1]
+    cpg = root.find(NS + 'CpgDec')
+    sessions = cpg.find(NS + 'PeeringSessions')
+    session = sessions[-1]
+    routers = cpg.find(NS + 'Routers')
+    router = routers[-1]
+    for i in range(num_devices):
+        name = 'BENCH-DEVICE-{}'.format(i)
+        new_device = copy.deepcopy(device)
+        set_text(new_device, NS + 'Hostname', name)
+        devices.append(new_device)
+
+        new_link = copy.deepcopy(link)
+        set_text(new_link, NS + 'StartDevice', name)
+        set_text(new_link, NS + 'EndDevice', 'BENCH-DEVICE-{}'.format((i + 1) % num_devices))
+        links.append(new_link)
+
+        new_session = copy.deepcopy(session)
+        set_text(new_session, NS + 'StartRouter', hostname)
+        set_text(new_session, NS + 'StartPeer', '10.{}.{}.1'.format((i >> 8) & 0xff, i & 0xff))
+        set_text(new_session, NS + 'EndRouter', name)
+        set_text(new_session, NS + 'EndPeer', '10.{}.{}.2'.format((i >> 8) & 0xff, i & 0xff))
+        sessions.append(new_session)
+
+        new_router = copy.deepcopy(router)
+        set_text(new_router, NS1 + 'Hostname', name)
+        set_text(new_router, NS1 + 'ASN', str(64512 + i % 1000))
+        routers.append(new_router)
+    tree.write(dst)
+
+def run_parse(module_path, graph, port_config):
+    """Parse graph with the parse_xml() of module_path, print the result as json"""
+    module = imp.load_source('minigraph_under_test', module_path)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    stderr = sys.stderr
+    sys.stderr = open(os.devnull, 'w')
+    start = time.time()
+    try:
+        module.parse_xml(graph, port_config_file=port_config)
+    finally:
+        elapsed = time.time() - start
+        sys.stderr = stderr
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'sec': elapsed, 'rss_kb': peak - before}))
+
+def measure(module_path, graph, port_config):
+    output = subprocess.check_output([sys.executable, os.path.realpath(__file__), '--run', module_path, graph, port_config])
+    return json.loads(output)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark minigraph parsing.")
+    parser.add_argument("--baseline", help="another minigraph.py to compare with")
+    parser.add_argument("--devices", help="comma separated numbers of extra neighbors", default='1000,5000,20000')
+    parser.add_argument("--json", help="print results as json", action='store_true')
+    parser.add_argument("--run", help=argparse.SUPPRESS, nargs=3)
+    args = parser.parse_args()
+
+    if args.run:
+        run_parse(*args.run)
+        return
+
+    modules = [('current', os.path.join(ENGINE_DIR, 'minigraph.py'))]
+    if args.baseline:
+        modules.append(('baseline', args.baseline))
+
+    work_dir = tempfile.mkdtemp()
+    results = []
+    try:
+        for num_devices in [int(n) for n in args.devices.split(',')]:
+            graph = os.path.join(work_dir, 'minigraph-{}.xml'.format(num_devices))
+            grow_minigraph(SAMPLE_GRAPH, graph, num_devices)
+            result = {'devices': num_devices, 'size_kb': os.path.getsize(graph) / 1024}
+            for name, path in modules:
+                stats = measure(path, graph, SAMPLE_PORT_CONFIG)
+                result[name + '_sec'] = round(stats['sec'], 3)
+                result[name + '_rss_kb'] = stats['rss_kb']
+            results.append(result)
+    finally:
+        shutil.rmtree(work_dir)
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    names = [name for name, _ in modules]
+    print('{:>8} {:>10}'.format('devices', 'size (kB)') +
+          ''.join(' {:>14} {:>16}'.format(name + ' (s)', name + ' RSS (kB)') for name in names))
+    for r in results:
+        print('{:>8} {:>10}'.format(r['devices'], r['size_kb']) +
+              ''.join(' {:>14} {:>16}'.format(r[name + '_sec'], r[name + '_rss_kb']) for name in names))
+
+
+if __name__ == "__main__":
+    main()
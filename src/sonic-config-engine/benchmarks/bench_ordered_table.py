@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""bench_ordered_table.py
+
+Time the ordering of the tables before a render and a --print-data, with the
+tables of ordered_table.py against sorting every table into an OrderedDict
+with natsort, the way sort_data() and to_serialized() did before. The data is
+the config DB snapshot of scale_data.py, by default with 512 ports and 4096
+VLAN members.
+
+    python bench_ordered_table.py
+    python bench_ordered_table.py --ports 256 --vlan-members 1024 --repeat 20
+
+The render step orders the tables, then iterates PORT and VLAN_MEMBER twice,
+as the buffers and interfaces templates do. The print step writes the json of
+--print-data to /dev/null. The cached steps do the same with the data loaded
+from a pickle, as data_cache.py does: the natsort tables are cached unsorted
+and the ordered tables with their order. Each step runs --repeat times and
+the median is kept.
+"""
+
+from __future__ import print_function
+
+import argparse
+import cPickle as pickle
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+
+import natsort
+
+import configdb_snapshot
+import scale_data
+import sonic_cfggen
+
+ITERATED_TABLES = ['PORT', 'VLAN_MEMBER']
+
+
+def get_data(ports, vlan_members, acl_rules):
+    """Return the tables of the snapshot with the keys of config DB, in dicts like load_data() returns"""
+    topology = scale_data.build_topology(ports, 0, vlan_members)
+    config = scale_data.get_config_db(topology, acl_rules)
+    return dict((table, dict((configdb_snapshot.deserialize_key(key), entry) for key, entry in entries.items()))
+                for table, entries in config.items())
+
+def natsort_tables(data):
+    """sort_data() with OrderedDict and natsort"""
+    for table in data:
+        if type(data[table]) is dict:
+            data[table] = OrderedDict(natsort.natsorted(data[table].items()))
+    return data
+
+def natsort_serialized(data):
+    """to_serialized() with natsort at every level"""
+    if type(data) is dict:
+        data = OrderedDict(natsort.natsorted(data.items()))
+        for key in data.keys():
+            new_key = configdb_snapshot.serialize_key(key)
+            if new_key != key:
+                data[new_key] = data.pop(key)
+            data[new_key] = natsort_serialized(data[new_key])
+    return data
+
+def iterate(data):
+    for _ in range(2):
+        for table in ITERATED_TABLES:
+            for key, entry in data[table].items():
+                pass
+
+def render_natsort(data):
+    iterate(natsort_tables(data))
+
+def render_ordered(data):
+    iterate(sonic_cfggen.sort_data(data))
+
+def print_natsort(data, stream):
+    stream.write(json.dumps(natsort_serialized(data), indent=4) + '\n')
+
+def print_ordered(data, stream):
+    sonic_cfggen.print_serialized(data, stream=stream)
+
+def median(values):
+    return sorted(values)[len(values) // 2]
+
+def time_step(setup, run, repeat):
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.time()
+        run(arg)
+        times.append((time.time() - start) * 1000)
+    return round(median(times), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the natural ordering of config DB tables.")
+    parser.add_argument("--ports", type=int, default=512)
+    parser.add_argument("--vlan-members", type=int, default=4096)
+    parser.add_argument("--acl-rules", type=int, default=0)
+    parser.add_argument("--repeat", help="timed runs per step, the median is kept", type=int, default=10)
+    args = parser.parse_args()
+
+    data = get_data(args.ports, args.vlan_members, args.acl_rules)
+    raw = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+    fresh = lambda: pickle.loads(raw)
+    ordered = sonic_cfggen.sort_data(fresh())
+    iterate(ordered)
+    sorted_ordered = pickle.dumps(ordered, pickle.HIGHEST_PROTOCOL)
+
+    cached = lambda: pickle.loads(sorted_ordered)
+
+    with open(os.devnull, 'w') as devnull:
+        print_natsort_null = lambda data: print_natsort(data, devnull)
+        print_ordered_null = lambda data: print_ordered(data, devnull)
+        steps = [
+            ('render', time_step(fresh, render_natsort, args.repeat), time_step(fresh, render_ordered, args.repeat)),
+            ('print-data', time_step(fresh, print_natsort_null, args.repeat), time_step(fresh, print_ordered_null, args.repeat)),
+            ('cached render', time_step(fresh, render_natsort, args.repeat), time_step(cached, render_ordered, args.repeat)),
+            ('cached print', time_step(fresh, print_natsort_null, args.repeat), time_step(cached, print_ordered_null, args.repeat)),
+        ]
+
+    print('{} ports, {} VLAN members, {} ACL rules'.format(args.ports, args.vlan_members, args.acl_rules))
+    print('{:<16} {:>14} {:>14} {:>9}'.format('step', 'natsort (ms)', 'ordered (ms)', 'speedup'))
+    for name, before, after in steps:
+        print('{:<16} {:>14} {:>14} {:>8.1f}x'.format(name, before, after, before / after if after else 0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+"""bench_scale.py
+
+Time of the steps of sonic-cfggen on a device at the scale of the largest
+ones, generated by scale_data.py: reading the port config, parsing the
+minigraph of a single asic and of a multi-asic device, converting and merging
+a config DB snapshot, and rendering the bgpd, buffers, qos and interfaces
+templates with the data of the minigraph.
+
+    python bench_scale.py                            # print the measures
+    python bench_scale.py --json > results.json      # machine-readable
+    python bench_scale.py --append history.jsonl     # add a record per commit
+    python bench_scale.py --baseline results.json --max-regression 20
+
+Each step runs once cold, then --repeat times, the median and the minimum of
+the repeated runs are kept. The records name the commit of the tree and the
+scale, so that the history of a branch shows which change made a step slower.
+--baseline compares with a record of --json or the last one of an --append
+history, --max-regression makes the comparison fail on a slower median.
+"""
+
+from __future__ import print_function
+
+import argparse
+import copy
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+ENGINE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+ROOT_DIR = os.path.join(ENGINE_DIR, '..', '..')
+sys.path.insert(0, ENGINE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+
+# The templates are compiled by the cold run, not read from the image cache
+os.environ.setdefault('SONIC_CFGGEN_BYTECODE_DIR', '')
+
+import minigraph
+import portconfig
+import scale_data
+import sonic_cfggen
+
+BUILD_TEMPLATES_DIR = os.path.join(ROOT_DIR, 'files', 'build_templates')
+S6100_DIR = os.path.join(ROOT_DIR, 'device', 'dell', 'x86_64-dell_s6100_c2538-r0', 'Force10-S6100')
+
+# (name, template, template directory)
+TEMPLATES = [
+    ('bgpd', os.path.join(ROOT_DIR, 'dockers', 'docker-fpm-quagga', 'bgpd.conf.j2'), None),
+    ('buffers', os.path.join(S6100_DIR, 'buffers.json.j2'), BUILD_TEMPLATES_DIR),
+    ('qos', os.path.join(S6100_DIR, 'qos.json.j2'), BUILD_TEMPLATES_DIR),
+    ('interfaces', os.path.join(ROOT_DIR, 'files', 'image_config', 'interfaces', 'interfaces.j2'), None),
+]
+
+
+def get_commit():
+    try:
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ENGINE_DIR, stderr=devnull).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_config_db(filename):
+    with open(filename) as f:
+        return sonic_cfggen.FormatConverter.to_deserialized(json.load(f))
+
+def get_steps(files):
+    """Return the steps as (name, setup, run): run is timed, it takes the result of setup"""
+    config_db = load_config_db(files['config_db'])
+    minigraph_data = minigraph.parse_xml(files['minigraph'], port_config_file=files['port_config'])
+
+    steps = [
+        ('get_port_config', lambda: None,
+         lambda _: portconfig.get_port_config(port_config_file=files['port_config'])),
+        ('parse_xml', lambda: None,
+         lambda _: minigraph.parse_xml(files['minigraph'], port_config_file=files['port_config'])),
+    ]
+    if 'multi_asic_minigraph' in files:
+        steps.append(('parse_xml_namespaces', lambda: None,
+                      lambda _: minigraph.parse_xml_namespaces(files['multi_asic_minigraph'],
+                                                               port_config_file=files['multi_asic_port_config'])))
+    steps += [
+        ('to_serialized', lambda: copy.deepcopy(config_db), sonic_cfggen.FormatConverter.to_serialized),
+        ('deep_update', lambda: (copy.deepcopy(minigraph_data), config_db),
+         lambda args: sonic_cfggen.deep_update(*args)),
+    ]
+    for name, template, template_dir in TEMPLATES:
+        steps.append(('render_' + name, lambda: copy.deepcopy(minigraph_data),
+                      lambda data, template=template, template_dir=template_dir: sonic_cfggen.render(template, data, template_dir)))
+    return steps
+
+def median(values):
+    return sorted(values)[len(values) // 2]
+
+def time_step(setup, run, repeat):
+    times = []
+    for _ in range(repeat + 1):
+        arg = setup()
+        start = time.time()
+        run(arg)
+        times.append((time.time() - start) * 1000)
+    return OrderedDict([
+        ('cold_ms', round(times[0], 1)),
+        ('median_ms', round(median(times[1:]), 1)),
+        ('min_ms', round(min(times[1:]), 1)),
+    ])
+
+def run_benchmark(scale, repeat, data_dir=None):
+    work_dir = data_dir or tempfile.mkdtemp()
+    try:
+        files = scale_data.generate(work_dir, **scale)
+        results = OrderedDict()
+        for name, setup, run in get_steps(files):
+            results[name] = time_step(setup, run, repeat)
+        sizes = OrderedDict((kind, os.path.getsize(filename) // 1024) for kind, filename in sorted(files.items()) if '{}' not in filename)
+    finally:
+        if data_dir is None:
+            shutil.rmtree(work_dir)
+    return OrderedDict([
+        ('commit', get_commit()),
+        ('time', int(time.time())),
+        ('python', platform.python_version()),
+        ('scale', scale),
+        ('repeat', repeat),
+        ('size_kb', sizes),
+        ('results', results),
+    ])
+
+def load_baseline(filename):
+    """Return the record of a --json output or the last record of an --append history"""
+    with open(filename) as f:
+        content = f.read().strip()
+    try:
+        return json.loads(content)
+    except ValueError:
+        return json.loads(content.splitlines()[-1])
+
+def compare(record, baseline):
+    """Add the change of the median of each step from the baseline, in percent"""
+    for name, result in record['results'].items():
+        base = baseline['results'].get(name)
+        if base and base['median_ms']:
+            result['baseline_ms'] = base['median_ms']
+            result['change_pct'] = round((result['median_ms'] - base['median_ms']) * 100.0 / base['median_ms'], 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sonic-cfggen at scale.")
+    scale_data.add_scale_arguments(parser)
+    parser.add_argument("--repeat", help="timed runs per step, the median is kept", type=int, default=5)
+    parser.add_argument("--data-dir", help="keep the generated files in this directory")
+    parser.add_argument("--json", help="print the record as json", action='store_true')
+    parser.add_argument("--append", help="append the record as a line of json to this file", metavar='FILE')
+    parser.add_argument("--baseline", help="compare with a record of --json or --append", metavar='FILE')
+    parser.add_argument("--max-regression", help="exit with 1 if a median is this many percent over the baseline", type=float)
+    args = parser.parse_args()
+
+    if args.data_dir and not os.path.isdir(args.data_dir):
+        os.makedirs(args.data_dir)
+    record = run_benchmark(scale_data.get_scale(args), args.repeat, args.data_dir)
+    if args.append:
+        with open(args.append, 'a') as f:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+    if args.baseline:
+        compare(record, load_baseline(args.baseline))
+
+    if args.json:
+        print(json.dumps(record, indent=4))
+    else:
+        print('commit {}, {}'.format(record['commit'] or 'unknown', ', '.join('{} {}'.format(v, k.replace('_', ' ')) for k, v in record['scale'].items())))
+        print('{:<22} {:>10} {:>11} {:>8} {:>10}'.format('step', 'cold (ms)', 'median (ms)', 'min (ms)', 'change (%)'))
+        for name, r in record['results'].items():
+            print('{:<22} {:>10} {:>11} {:>8} {:>10}'.format(name, r['cold_ms'], r['median_ms'], r['min_ms'], r.get('change_pct', '-')))
+
+    if args.max_regression is not None and any(r.get('change_pct', 0) > args.max_regression for r in record['results'].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
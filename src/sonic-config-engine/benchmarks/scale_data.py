@@ -0,0 +1,566 @@
+#!/usr/bin/env python
+"""scale_data.py
+
+Synthetic minigraphs, port configs and config DB snapshots at the scale of
+the largest devices, the inputs of bench_scale.py:
+
+    python scale_data.py OUTPUT_DIR --ports 512 --bgp-neighbors 2000 --asics 8
+
+The single asic device is a ToRRouter. One port in UPLINK_RATIO is a member
+of an uplink port channel, each port channel going to a BGP neighbor; the
+other ports face a server each and are tagged members of the VLANs, filled in
+turn. The BGP neighbors beyond the uplinks have a session but no link, one in
+four over IPv6. Its config DB snapshot, as 'config save' writes it, holds the
+same device plus the rules of the DATAACL table.
+
+The multi-asic device splits the front panel ports between its front-end
+asics, two ports per port channel to an external neighbor. Every front-end
+asic reaches every back-end asic over a port channel of internal links with
+an iBGP session. Its port configs are port_config-<asic id>.ini.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import socket
+import struct
+from collections import OrderedDict
+
+from lxml import etree as ET
+
+NS = 'Microsoft.Search.Autopilot.Evolution'
+NS1 = 'http://schemas.datacontract.org/2004/07/Microsoft.Search.Autopilot.Evolution'
+NS_I = 'http://www.w3.org/2001/XMLSchema-instance'
+NSMAP = {None: NS, 'i': NS_I, 'a': NS1}
+
+DEFAULT_SCALE = OrderedDict([
+    ('ports', 512),
+    ('bgp_neighbors', 2000),
+    ('vlan_members', 4096),
+    ('acl_rules', 10000),
+    ('asics', 8),
+])
+
+HOSTNAME = 'scale-switch'
+HWSKU = 'Scale-HWSKU'
+ASIC_HWSKU = 'Scale-HWSKU-asic'
+ASN = '65100'
+PORT_SPEED = '100000'
+LAG_MEMBERS = 2
+UPLINK_RATIO = 8
+# Back-end ports of a front-end asic, per front panel port
+BACKPLANE_RATIO = 4
+FIRST_VLAN_ID = 1000
+
+LOOPBACK_PREFIXES = ['10.1.0.32/32', 'FC00:1::32/128']
+MGMT_PREFIXES = ['10.3.146.150/23', 'FC00:2::32/64']
+DHCP_SERVERS = ['192.0.0.1', '192.0.0.2', '192.0.0.3', '192.0.0.4']
+
+
+def ipv4(value):
+    return socket.inet_ntoa(struct.pack('!I', value & 0xffffffff))
+
+def ipv6(value):
+    return 'fc00::{:x}:{:x}'.format(value >> 16, value & 0xffff)
+
+def neighbor_addresses(i, base=10 << 24):
+    """Return (local address, neighbor address, prefix length) of the
+    point to point subnet of neighbor i; one neighbor in four is IPv6"""
+    if i % 4 == 3:
+        return (ipv6(2 * i), ipv6(2 * i + 1), 126)
+    return (ipv4(base + 2 * i), ipv4(base + 2 * i + 1), 31)
+
+def make_port(index, name, alias, asic_port_name=None):
+    port = OrderedDict([
+        ('name', name),
+        ('lanes', ','.join(str(4 * index + lane) for lane in range(4))),
+        ('alias', alias),
+        ('index', str(index + 1)),
+        ('speed', PORT_SPEED),
+    ])
+    if asic_port_name is not None:
+        port['asic_port_name'] = asic_port_name
+    return port
+
+def make_neighbor(i, name, ports=None, base=10 << 24):
+    (local_addr, peer_addr, prefixlen) = neighbor_addresses(i, base)
+    return {
+        'name': name,
+        'asn': str(64600 + i % 100),
+        'local_addr': local_addr,
+        'peer_addr': peer_addr,
+        'prefixlen': prefixlen,
+        'ports': ports or [],
+    }
+
+def local_prefix(neighbor):
+    return '{}/{}'.format(neighbor['local_addr'], neighbor['prefixlen'])
+
+
+def build_topology(ports, bgp_neighbors, vlan_members):
+    """Return the single asic device, see the description of the module"""
+    all_ports = [make_port(i, 'Ethernet{}'.format(4 * i), 'etp{}'.format(i + 1)) for i in range(ports)]
+    uplinks = all_ports[:ports // UPLINK_RATIO]
+    downlinks = all_ports[ports // UPLINK_RATIO:]
+    if vlan_members and not downlinks:
+        raise ValueError('no port left for the VLAN members')
+
+    neighbors = []
+    portchannels = OrderedDict()
+    for i in range(bgp_neighbors):
+        members = uplinks[i * LAG_MEMBERS:(i + 1) * LAG_MEMBERS]
+        if len(members) < LAG_MEMBERS:
+            members = []
+        neighbor = make_neighbor(i, 'SCALE-T1-{:04d}'.format(i), members)
+        if members:
+            neighbor['portchannel'] = 'PortChannel{:04d}'.format(i + 1)
+            portchannels[neighbor['portchannel']] = neighbor
+        neighbors.append(neighbor)
+
+    vlans = OrderedDict()
+    for i in range(vlan_members):
+        vlanid = FIRST_VLAN_ID + i // len(downlinks)
+        vlan = vlans.setdefault('Vlan{}'.format(vlanid), {
+            'vlanid': str(vlanid),
+            'prefix': '192.{}.{}.1/24'.format(168 + (i // len(downlinks)) // 256, (i // len(downlinks)) % 256),
+            'members': [],
+        })
+        vlan['members'].append(downlinks[i % len(downlinks)])
+
+    return {
+        'ports': all_ports,
+        'neighbors': neighbors,
+        'portchannels': portchannels,
+        'servers': [(port, 'SCALE-SERVER-{:04d}'.format(i)) for i, port in enumerate(downlinks)],
+        'vlans': vlans,
+    }
+
+
+#
+# Minigraph elements
+#
+def element(parent, tag, text=None, ns=NS):
+    elem = ET.SubElement(parent, '{%s}%s' % (ns, tag))
+    if text is not None:
+        elem.text = text
+    return elem
+
+def add_session(sessions, start_router, start_peer, end_router, end_peer, holdtime='180', keepalive='60'):
+    session = element(sessions, 'BGPSession')
+    element(session, 'StartRouter', start_router)
+    element(session, 'StartPeer', start_peer)
+    element(session, 'EndRouter', end_router)
+    element(session, 'EndPeer', end_peer)
+    element(session, 'Multihop', '1')
+    element(session, 'HoldTime', holdtime)
+    element(session, 'KeepAliveTime', keepalive)
+
+def add_router(routers, hostname, asn, peers=None):
+    router = element(routers, 'BGPRouterDeclaration', ns=NS1)
+    element(router, 'ASN', asn, ns=NS1)
+    element(router, 'Hostname', hostname, ns=NS1)
+    if peers is not None:
+        peers_node = element(router, 'Peers', ns=NS1)
+        for address in peers:
+            element(element(peers_node, 'BGPPeer'), 'Address', address)
+    element(router, 'RouteMaps', ns=NS1)
+
+def add_prefix_interface(parent, tag, name, attach_to, prefix):
+    intf = element(parent, tag, ns=NS1)
+    element(intf, 'Name', name)
+    element(intf, 'AttachTo', attach_to)
+    element(element(intf, 'Prefix', ns=NS1), 'IPPrefix', prefix)
+    element(intf, 'PrefixStr', prefix, ns=NS1)
+
+def add_dpg(dpg, hostname, loopbacks=(), mgmt=(), portchannels=(), vlans=(), ip_intfs=(), acls=None):
+    """Add a DeviceDataPlaneInfo, the items of portchannels are (name, member
+    aliases), of vlans (name, vlanid, member aliases, dhcp servers), of
+    ip_intfs (attach to, prefix) and of acls (attach to list, acl, InAcl or
+    OutAcl, type)"""
+    info = element(dpg, 'DeviceDataPlaneInfo')
+    lo_intfs = element(info, 'LoopbackIPInterfaces')
+    for i, prefix in enumerate(loopbacks):
+        add_prefix_interface(lo_intfs, 'LoopbackIPInterface', 'HostIP{}'.format(i or ''), 'Loopback0', prefix)
+    mgmt_intfs = element(info, 'ManagementIPInterfaces')
+    for prefix in mgmt:
+        add_prefix_interface(mgmt_intfs, 'ManagementIPInterface', 'HostIP', 'eth0', prefix)
+    element(info, 'Hostname', hostname)
+    pc_intfs = element(info, 'PortChannelInterfaces')
+    for name, members in portchannels:
+        pc = element(pc_intfs, 'PortChannel')
+        element(pc, 'Name', name)
+        element(pc, 'AttachTo', ';'.join(members))
+        element(pc, 'SubInterface')
+    vlan_intfs = element(info, 'VlanInterfaces')
+    for name, vlanid, members, dhcp_servers in vlans:
+        vlan = element(vlan_intfs, 'VlanInterface')
+        element(vlan, 'Name', name)
+        element(vlan, 'AttachTo', ';'.join(members))
+        element(vlan, 'Type', 'Tagged')
+        element(vlan, 'DhcpRelays', ';'.join(dhcp_servers))
+        element(vlan, 'VlanID', vlanid)
+        element(vlan, 'Tag', vlanid)
+    ip_intfs_node = element(info, 'IPInterfaces')
+    for attach_to, prefix in ip_intfs:
+        ip_intf = element(ip_intfs_node, 'IPInterface')
+        element(ip_intf, 'Name').set('{%s}nil' % NS_I, 'true')
+        element(ip_intf, 'AttachTo', attach_to)
+        element(ip_intf, 'Prefix', prefix)
+    if acls is not None:
+        acl_intfs = element(info, 'AclInterfaces')
+        for attach_to, acl, direction, acl_type in acls:
+            acl_intf = element(acl_intfs, 'AclInterface')
+            element(acl_intf, 'AttachTo', ';'.join(attach_to))
+            element(acl_intf, direction, acl)
+            element(acl_intf, 'Type', acl_type)
+
+def add_link(links, start_device, start_port, end_device, end_port, internal=False):
+    link = element(links, 'DeviceLinkBase')
+    element(link, 'ElementType', 'DeviceInterfaceLink')
+    element(link, 'Bandwidth', PORT_SPEED)
+    if internal:
+        element(link, 'ChassisInternal', 'true')
+    element(link, 'EndDevice', end_device)
+    element(link, 'EndPort', end_port)
+    element(link, 'StartDevice', start_device)
+    element(link, 'StartPort', start_port)
+
+def add_device(devices, hostname, hwsku, device_type):
+    device = element(devices, 'Device')
+    device.set('{%s}type' % NS_I, device_type)
+    element(device, 'Hostname', hostname)
+    element(device, 'HwSku', hwsku)
+
+def add_metadata(root, devices):
+    """devices are (name, properties) pairs"""
+    meta = element(root, 'MetadataDeclaration')
+    meta_devices = element(meta, 'Devices')
+    for name, properties in devices:
+        device = element(meta_devices, 'DeviceMetadata', ns=NS1)
+        element(device, 'Name', name, ns=NS1)
+        properties_node = element(device, 'Properties', ns=NS1)
+        for key, value in properties:
+            device_property = element(properties_node, 'DeviceProperty', ns=NS1)
+            element(device_property, 'Name', key, ns=NS1)
+            element(device_property, 'Reference', ns=NS1).set('{%s}nil' % NS_I, 'true')
+            element(device_property, 'Value', value, ns=NS1)
+    element(meta, 'Properties')
+
+def device_properties():
+    return [
+        ('DeploymentId', '1'),
+        ('DhcpResources', ';'.join(DHCP_SERVERS)),
+        ('NtpResources', '10.0.0.1;10.0.0.2'),
+        ('SyslogResources', '10.0.0.5;10.0.0.6'),
+        ('ErspanDestinationIpv4', '10.0.100.1'),
+    ]
+
+def write_xml(root, filename):
+    ET.ElementTree(root).write(filename, pretty_print=True)
+
+def write_port_config(ports, filename):
+    titles = ports[0].keys()
+    with open(filename, 'w') as f:
+        f.write('# ' + ' '.join(titles) + '\n')
+        for port in ports:
+            f.write(' '.join(port[title] for title in titles) + '\n')
+
+
+def write_minigraph(topology, filename):
+    root = ET.Element('{%s}DeviceMiniGraph' % NS, nsmap=NSMAP)
+    neighbors = topology['neighbors']
+
+    cpg = element(root, 'CpgDec')
+    sessions = element(cpg, 'PeeringSessions')
+    for neighbor in neighbors:
+        add_session(sessions, HOSTNAME, neighbor['local_addr'], neighbor['name'], neighbor['peer_addr'])
+    routers = element(cpg, 'Routers', ns=NS)
+    add_router(routers, HOSTNAME, ASN, [neighbor['peer_addr'] for neighbor in neighbors])
+    for neighbor in neighbors:
+        add_router(routers, neighbor['name'], neighbor['asn'])
+
+    portchannels = topology['portchannels']
+    dpg = element(root, 'DpgDec')
+    ip_intfs = [(name, local_prefix(neighbor)) for name, neighbor in portchannels.items()]
+    ip_intfs += [(name, vlan['prefix']) for name, vlan in topology['vlans'].items()]
+    add_dpg(dpg, HOSTNAME, LOOPBACK_PREFIXES, MGMT_PREFIXES,
+            [(name, [port['alias'] for port in neighbor['ports']]) for name, neighbor in portchannels.items()],
+            [(name, vlan['vlanid'], [port['alias'] for port in vlan['members']], DHCP_SERVERS) for name, vlan in topology['vlans'].items()],
+            ip_intfs,
+            [(portchannels.keys(), 'DataAcl', 'InAcl', 'DataPlane'),
+             (['ERSPAN'], 'Everflow', 'InAcl', 'Everflow'),
+             (['SNMP'], 'SNMP_ACL', 'InAcl', 'SNMP'),
+             (['SSH'], 'SSH_ONLY', 'InAcl', 'SSH')])
+
+    png = element(root, 'PngDec')
+    links = element(png, 'DeviceInterfaceLinks')
+    for neighbor in portchannels.values():
+        for i, port in enumerate(neighbor['ports']):
+            add_link(links, HOSTNAME, port['alias'], neighbor['name'], 'Ethernet{}'.format(i + 1))
+    for port, server in topology['servers']:
+        add_link(links, HOSTNAME, port['alias'], server, 'eth0')
+    devices = element(png, 'Devices')
+    add_device(devices, HOSTNAME, HWSKU, 'ToRRouter')
+    for neighbor in neighbors:
+        add_device(devices, neighbor['name'], 'Arista-VM', 'LeafRouter')
+    for _, server in topology['servers']:
+        add_device(devices, server, 'Server-SKU', 'Server')
+
+    add_metadata(root, [(HOSTNAME, device_properties())])
+    element(root, 'Hostname', HOSTNAME)
+    element(root, 'HwSku', HWSKU)
+    write_xml(root, filename)
+
+
+def get_config_db(topology, acl_rules):
+    """Return the config DB snapshot of the single asic device, as written by 'config save'"""
+    portchannels = topology['portchannels']
+    config = OrderedDict()
+    config['DEVICE_METADATA'] = {'localhost': {
+        'hostname': HOSTNAME,
+        'hwsku': HWSKU,
+        'bgp_asn': ASN,
+        'type': 'ToRRouter',
+        'deployment_id': '1',
+        'mac': '00:11:22:33:44:55',
+    }}
+    config['PORT'] = OrderedDict((port['name'], {
+        'alias': port['alias'],
+        'lanes': port['lanes'],
+        'index': port['index'],
+        'speed': port['speed'],
+        'mtu': '9100',
+        'admin_status': 'up',
+    }) for port in topology['ports'])
+    config['LOOPBACK_INTERFACE'] = OrderedDict(('Loopback0|' + prefix, {}) for prefix in LOOPBACK_PREFIXES)
+    config['PORTCHANNEL'] = OrderedDict()
+    config['PORTCHANNEL_MEMBER'] = OrderedDict()
+    config['PORTCHANNEL_INTERFACE'] = OrderedDict()
+    for name, neighbor in portchannels.items():
+        members = [port['name'] for port in neighbor['ports']]
+        config['PORTCHANNEL'][name] = {'members': members, 'min_links': str(len(members)), 'mtu': '9100', 'admin_status': 'up'}
+        for member in members:
+            config['PORTCHANNEL_MEMBER'][name + '|' + member] = {}
+        config['PORTCHANNEL_INTERFACE'][name + '|' + local_prefix(neighbor)] = {}
+    config['VLAN'] = OrderedDict()
+    config['VLAN_MEMBER'] = OrderedDict()
+    config['VLAN_INTERFACE'] = OrderedDict()
+    for name, vlan in topology['vlans'].items():
+        config['VLAN'][name] = {'vlanid': vlan['vlanid'], 'dhcp_servers': DHCP_SERVERS,
+                                'members': [port['name'] for port in vlan['members']]}
+        for port in vlan['members']:
+            config['VLAN_MEMBER'][name + '|' + port['name']] = {'tagging_mode': 'tagged'}
+        config['VLAN_INTERFACE'][name + '|' + vlan['prefix']] = {}
+    config['BGP_NEIGHBOR'] = OrderedDict((neighbor['peer_addr'], {
+        'name': neighbor['name'],
+        'asn': neighbor['asn'],
+        'local_addr': neighbor['local_addr'],
+        'holdtime': '180',
+        'keepalive': '60',
+        'rrclient': '0',
+        'nhopself': '0',
+        'admin_status': 'up',
+    }) for neighbor in topology['neighbors'])
+    config['DEVICE_NEIGHBOR'] = OrderedDict()
+    for neighbor in portchannels.values():
+        for i, port in enumerate(neighbor['ports']):
+            config['DEVICE_NEIGHBOR'][port['name']] = {'name': neighbor['name'], 'port': 'Ethernet{}'.format(i + 1)}
+    for port, server in topology['servers']:
+        config['DEVICE_NEIGHBOR'][port['name']] = {'name': server, 'port': 'eth0'}
+    config['ACL_TABLE'] = {
+        'DATAACL': {'policy_desc': 'DATAACL', 'type': 'L3', 'stage': 'ingress', 'ports': list(portchannels)},
+        'EVERFLOW': {'policy_desc': 'EVERFLOW', 'type': 'MIRROR', 'stage': 'ingress',
+                     'ports': list(portchannels) + [port['name'] for port, _ in topology['servers']]},
+    }
+    config['ACL_RULE'] = OrderedDict()
+    for i in range(acl_rules):
+        rule = {
+            'PRIORITY': str(9999 - i % 9000),
+            'PACKET_ACTION': 'DROP' if i % 10 == 9 else 'FORWARD',
+            'IP_PROTOCOL': '6' if i % 2 else '17',
+            'SRC_IP': '{}/32'.format(ipv4((20 << 24) + i)),
+            'DST_IP': '{}/24'.format(ipv4((30 << 24) + (i << 8))),
+            'L4_DST_PORT': str(1024 + i % 60000),
+        }
+        config['ACL_RULE']['DATAACL|RULE_{}'.format(i + 1)] = rule
+    return config
+
+
+def build_multi_asic_topology(ports, bgp_neighbors, asics):
+    """Return the asics of the multi-asic device, see the description of the module"""
+    front_asics = asics // 2
+    back_asics = asics - front_asics
+    if front_asics == 0 or ports % (front_asics * LAG_MEMBERS * BACKPLANE_RATIO):
+        raise ValueError('{} ports can not be split between {} front-end asics'.format(ports, front_asics))
+    front_ports = ports // front_asics
+    backplane_ports = front_ports // BACKPLANE_RATIO
+    if backplane_ports % back_asics:
+        raise ValueError('{} back-end ports of an asic can not be split between {} back-end asics'.format(backplane_ports, back_asics))
+    links_per_pair = backplane_ports // back_asics
+
+    asic_list = [{
+        'name': 'ASIC{}'.format(n),
+        'sub_role': 'FrontEnd' if n < front_asics else 'BackEnd',
+        'ports': [],
+        'neighbors': [],
+        'portchannels': OrderedDict(),
+        'internal_links': [],
+    } for n in range(asics)]
+    front, back = asic_list[:front_asics], asic_list[front_asics:]
+
+    def add_asic_port(asic, name, alias):
+        port = make_port(len(asic['ports']), name, alias, 'Eth{}-{}'.format(len(asic['ports']), asic['name']))
+        asic['ports'].append(port)
+        return port
+
+    # Front panel ports, two per port channel to an external neighbor
+    neighbor_id = 0
+    for n, asic in enumerate(front):
+        for i in range(0, front_ports, LAG_MEMBERS):
+            members = [add_asic_port(asic, 'Ethernet{}'.format(4 * g), 'Ethernet1/{}'.format(g + 1))
+                       for g in range(n * front_ports + i, n * front_ports + i + LAG_MEMBERS)]
+            neighbor = make_neighbor(neighbor_id, 'SCALE-T2-{:04d}'.format(neighbor_id), members)
+            neighbor['portchannel'] = 'PortChannel{:04d}'.format(neighbor_id + 1)
+            asic['neighbors'].append(neighbor)
+            asic['portchannels'][neighbor['portchannel']] = neighbor
+            neighbor_id += 1
+    # The other neighbors have a session but no link
+    for i in range(neighbor_id, bgp_neighbors):
+        front[i % front_asics]['neighbors'].append(make_neighbor(i, 'SCALE-T2-{:04d}'.format(i)))
+
+    # A port channel between every front-end and back-end asic
+    bp_index = 0
+    for f, front_asic in enumerate(front):
+        for b, back_asic in enumerate(back):
+            pair = f * back_asics + b
+            front_members = []
+            back_members = []
+            for _ in range(links_per_pair):
+                front_port = add_asic_port(front_asic, 'Ethernet-BP{}'.format(4 * bp_index), 'Ethernet-BP{}'.format(4 * bp_index))
+                back_port = add_asic_port(back_asic, 'Ethernet-BP{}'.format(4 * (bp_index + ports)), 'Ethernet-BP{}'.format(4 * (bp_index + ports)))
+                front_members.append(front_port)
+                back_members.append(back_port)
+                front_asic['internal_links'].append((front_port['asic_port_name'], back_asic['name'], back_port['asic_port_name']))
+                bp_index += 1
+            internal = make_neighbor(pair, back_asic['name'], front_members, base=(10 << 24) + (1 << 16))
+            internal['asn'] = ASN
+            internal['portchannel'] = 'PortChannel{}'.format(4001 + pair)
+            front_asic['portchannels'][internal['portchannel']] = internal
+            front_asic['neighbors'].append(internal)
+            # The same session from the back-end side
+            back_side = dict(internal, name=front_asic['name'], local_addr=internal['peer_addr'], peer_addr=internal['local_addr'],
+                             ports=back_members, portchannel='PortChannel{}'.format(4101 + pair))
+            back_asic['portchannels'][back_side['portchannel']] = back_side
+    return asic_list
+
+
+def write_multi_asic_minigraph(asic_list, filename):
+    root = ET.Element('{%s}DeviceMiniGraph' % NS, nsmap=NSMAP)
+    front = [asic for asic in asic_list if asic['sub_role'] == 'FrontEnd']
+    external = [neighbor for asic in front for neighbor in asic['neighbors'] if neighbor['name'].startswith('SCALE-')]
+
+    cpg = element(root, 'CpgDec')
+    sessions = element(cpg, 'PeeringSessions')
+    for neighbor in external:
+        add_session(sessions, HOSTNAME, neighbor['local_addr'], neighbor['name'], neighbor['peer_addr'])
+    for asic in front:
+        for neighbor in asic['neighbors']:
+            if neighbor['name'].startswith('SCALE-'):
+                add_session(sessions, asic['name'], neighbor['local_addr'], neighbor['name'], neighbor['peer_addr'])
+            else:
+                add_session(sessions, asic['name'], neighbor['local_addr'], neighbor['name'], neighbor['peer_addr'], '0', '0')
+    routers = element(cpg, 'Routers', ns=NS)
+    add_router(routers, HOSTNAME, ASN, [neighbor['peer_addr'] for neighbor in external])
+    for asic in asic_list:
+        add_router(routers, asic['name'], ASN, [])
+    for neighbor in external:
+        add_router(routers, neighbor['name'], neighbor['asn'])
+
+    dpg = element(root, 'DpgDec')
+    external_pcs = [(name, neighbor) for asic in front for name, neighbor in asic['portchannels'].items() if neighbor['name'].startswith('SCALE-')]
+    add_dpg(dpg, HOSTNAME, LOOPBACK_PREFIXES, MGMT_PREFIXES,
+            [(name, [port['alias'] for port in neighbor['ports']]) for name, neighbor in external_pcs],
+            ip_intfs=[(name, local_prefix(neighbor)) for name, neighbor in external_pcs],
+            acls=[([name for name, _ in external_pcs], 'DataAcl', 'InAcl', 'DataPlane'),
+                  (['ERSPAN'], 'Everflow', 'InAcl', 'Everflow'),
+                  (['SNMP'], 'SNMP_ACL', 'InAcl', 'SNMP')])
+    for n, asic in enumerate(asic_list):
+        pcs = asic['portchannels']
+        add_dpg(dpg, asic['name'], ['8.0.0.{}/32'.format(n)],
+                portchannels=[(name, [port['asic_port_name'] for port in neighbor['ports']]) for name, neighbor in pcs.items()],
+                ip_intfs=[(name, local_prefix(neighbor)) for name, neighbor in pcs.items()])
+
+    png = element(root, 'PngDec')
+    links = element(png, 'DeviceInterfaceLinks')
+    for name, neighbor in external_pcs:
+        for i, port in enumerate(neighbor['ports']):
+            add_link(links, HOSTNAME, port['alias'], neighbor['name'], 'Ethernet{}'.format(i + 1))
+    for asic in front:
+        for (start_port, end_device, end_port) in asic['internal_links']:
+            add_link(links, asic['name'], start_port, end_device, end_port, internal=True)
+    devices = element(png, 'Devices')
+    add_device(devices, HOSTNAME, HWSKU, 'LeafRouter')
+    for neighbor in external:
+        add_device(devices, neighbor['name'], 'Arista-VM', 'SpineRouter')
+    for asic in asic_list:
+        add_device(devices, asic['name'], ASIC_HWSKU, 'Asic')
+
+    add_metadata(root, [(HOSTNAME, device_properties())] +
+                 [(asic['name'], [('SubRole', asic['sub_role'])]) for asic in asic_list])
+    element(root, 'Hostname', HOSTNAME)
+    element(root, 'HwSku', HWSKU)
+    write_xml(root, filename)
+
+
+def generate(output_dir, ports=DEFAULT_SCALE['ports'], bgp_neighbors=DEFAULT_SCALE['bgp_neighbors'],
+             vlan_members=DEFAULT_SCALE['vlan_members'], acl_rules=DEFAULT_SCALE['acl_rules'], asics=DEFAULT_SCALE['asics']):
+    """Write the files of the single asic device, and of the multi-asic
+    device if asics is more than 1, into output_dir. Return their names by
+    kind: minigraph, port_config, config_db, multi_asic_minigraph and
+    multi_asic_port_config, a pattern where '{}' stands for the asic id as
+    minigraph.parse_xml_namespaces() takes it."""
+    files = {
+        'minigraph': os.path.join(output_dir, 'minigraph.xml'),
+        'port_config': os.path.join(output_dir, 'port_config.ini'),
+        'config_db': os.path.join(output_dir, 'config_db.json'),
+    }
+    topology = build_topology(ports, bgp_neighbors, vlan_members)
+    write_port_config(topology['ports'], files['port_config'])
+    write_minigraph(topology, files['minigraph'])
+    with open(files['config_db'], 'w') as f:
+        json.dump(get_config_db(topology, acl_rules), f, indent=4)
+
+    if asics > 1:
+        files['multi_asic_minigraph'] = os.path.join(output_dir, 'multi_asic_minigraph.xml')
+        files['multi_asic_port_config'] = os.path.join(output_dir, 'port_config-{}.ini')
+        asic_list = build_multi_asic_topology(ports, bgp_neighbors, asics)
+        for n, asic in enumerate(asic_list):
+            write_port_config(asic['ports'], files['multi_asic_port_config'].format(n))
+        write_multi_asic_minigraph(asic_list, files['multi_asic_minigraph'])
+    return files
+
+
+def add_scale_arguments(parser):
+    for name, value in DEFAULT_SCALE.items():
+        parser.add_argument('--' + name.replace('_', '-'), type=int, default=value,
+                            help='number of {} (default {})'.format(name.replace('_', ' '), value))
+
+def get_scale(args):
+    return OrderedDict((name, getattr(args, name)) for name in DEFAULT_SCALE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic minigraphs and config DB snapshots at scale.")
+    parser.add_argument('output_dir', help='directory the files are written to')
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+    files = generate(args.output_dir, **get_scale(args))
+    print(json.dumps(files, indent=4, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
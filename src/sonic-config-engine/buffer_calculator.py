@@ -0,0 +1,63 @@
+"""buffer_calculator.py
+
+Per port computations of the buffer templates, exposed to the templates of
+sonic-cfggen as globals. buffers_config.j2 used to find the cable length of
+each port with a macro scanning DEVICE_NEIGHBOR and VLAN_MEMBER, a time
+proportional to the number of ports times the size of those tables;
+get_cable_lengths() indexes the tables once and assigns every port in one
+pass.
+
+    {%- set cable_lengths = get_cable_lengths(PORT_ALL, switch_role, ports2cable, default_cable,
+                                              DEVICE_NEIGHBOR, DEVICE_NEIGHBOR_METADATA, VLAN_MEMBER) %}
+"""
+
+from collections import OrderedDict
+
+
+def get_cable_lengths(ports, switch_role, ports2cable, default_cable,
+                      device_neighbor=None, device_neighbor_metadata=None, vlan_member=None):
+    """Return an OrderedDict of the cable length of each of ports.
+
+    The cable length of a port is the one ports2cable gives to the roles of
+    the device and of its neighbor ('<role>_<neighbor role>' or
+    '<neighbor role>_<role>', lower case). A port of a ToRRouter without a
+    neighbor but in a VLAN is connected to a server. Other ports get
+    default_cable. The tables can be undefined in the template.
+    """
+    switch_role = switch_role or ''
+    neighbor_cables = {}
+    if device_neighbor and device_neighbor_metadata:
+        for port, neighbor in device_neighbor.items():
+            metadata = device_neighbor_metadata.get(neighbor.get('name'))
+            if not metadata or 'type' not in metadata:
+                continue
+            roles1 = (switch_role + '_' + metadata['type']).lower()
+            roles2 = (metadata['type'] + '_' + switch_role).lower()
+            if roles1 in ports2cable:
+                neighbor_cables[port] = ports2cable[roles1]
+            elif roles2 in ports2cable:
+                neighbor_cables[port] = ports2cable[roles2]
+
+    server_cable = None
+    vlan_ports = set()
+    if switch_role.lower() == 'torrouter':
+        server_cable = ports2cable.get((switch_role + '_server').lower())
+        if server_cable is not None and vlan_member:
+            vlan_ports = set(key[1] for key in vlan_member if len(key) > 1)
+
+    cable_lengths = OrderedDict()
+    for port in ports:
+        if port in neighbor_cables:
+            cable_lengths[port] = neighbor_cables[port]
+        elif port in vlan_ports:
+            cable_lengths[port] = server_cable
+        else:
+            cable_lengths[port] = default_cable
+    return cable_lengths
+
+
+def get_globals():
+    """Return the template globals of the calculator by name"""
+    return {
+        'get_cable_lengths': get_cable_lengths,
+    }
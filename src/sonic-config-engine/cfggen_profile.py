@@ -0,0 +1,213 @@
+"""cfggen_profile.py
+
+Timing of the phases of a sonic-cfggen invocation, enabled with --profile or
+the SONIC_CFGGEN_PROFILE environment variable (see get_profile_settings()):
+the wall and CPU time of reading the port config, parsing the minigraph,
+reading config DB, sorting the data, rendering the templates, writing config
+DB and so on, the time of the imports made on first use (lazy_import.py),
+and the sizes of the data. The report is printed as json to stderr or saved
+into a file, and can come with a cProfile dump.
+
+Every profiled invocation also appends a one line record to PROFILE_LOG, so
+that the calls made during a whole boot can be summed up with
+
+    python -m cfggen_profile [LOG]
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import resource
+import sys
+import time
+from collections import OrderedDict
+
+import lazy_import
+
+PROFILE_ENV = 'SONIC_CFGGEN_PROFILE'
+PROFILE_DUMP_ENV = 'SONIC_CFGGEN_PROFILE_DUMP'
+PROFILE_LOG = '/var/log/sonic-cfggen-profile.log'
+PROFILE_LOG_ENV = 'SONIC_CFGGEN_PROFILE_LOG'
+
+
+def get_profile_settings(report=None, dump=None):
+    """Return (report, dump), the targets of the report and of the cProfile
+    dump given on the command line, else in the environment.
+
+    The report target is '-' for stderr or a file name, None when profiling
+    is off; SONIC_CFGGEN_PROFILE=1 means stderr. A '{pid}' in a file name is
+    replaced by the process ID, for the environment to apply to many calls.
+    """
+    if report is None:
+        report = os.environ.get(PROFILE_ENV) or None
+        if report == '1':
+            report = '-'
+    if dump is None:
+        dump = os.environ.get(PROFILE_DUMP_ENV) or None
+    if dump is not None and report is None:
+        report = '-'
+    pid = os.getpid()
+    return (report.format(pid=pid) if report is not None else None,
+            dump.format(pid=pid) if dump is not None else None)
+
+def get_profile_log():
+    """Return the log file, or None if it is disabled with an empty SONIC_CFGGEN_PROFILE_LOG"""
+    return os.environ.get(PROFILE_LOG_ENV, PROFILE_LOG) or None
+
+def _cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class _Phase(object):
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._start = (time.time(), _cpu_time())
+
+    def __exit__(self, *exc_info):
+        self._profiler.add_phase(self._name, time.time() - self._start[0], _cpu_time() - self._start[1])
+
+
+class _NoPhase(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+_NO_PHASE = _NoPhase()
+
+
+class Profiler(object):
+    """Accumulate the time of the phases and the counts of one invocation.
+
+    A disabled profiler, the default one of library calls, records nothing.
+    Phases are not nested: the time of each phase is its own.
+    """
+    def __init__(self, report=None, dump=None, argv=None):
+        self.enabled = report is not None
+        self._report = report
+        self._dump = dump
+        self._argv = argv
+        self._phases = OrderedDict()
+        self._counts = OrderedDict()
+        self._cprofile = None
+
+    def phase(self, name):
+        """Return a context manager timing a phase; a phase can run many times"""
+        if not self.enabled:
+            return _NO_PHASE
+        return _Phase(self, name)
+
+    def add_phase(self, name, wall, cpu):
+        phase = self._phases.setdefault(name, [0.0, 0.0, 0])
+        phase[0] += wall
+        phase[1] += cpu
+        phase[2] += 1
+
+    def count(self, name, value):
+        if self.enabled:
+            self._counts[name] = self._counts.get(name, 0) + value
+
+    def count_data(self, data):
+        """Count the tables and the entries of the data"""
+        if self.enabled:
+            tables = [table for table in data.values() if isinstance(table, dict)]
+            self._counts['tables'] = len(tables)
+            self._counts['entries'] = sum(len(table) for table in tables)
+
+    def start(self):
+        if not self.enabled:
+            return
+        self._start = (time.time(), _cpu_time())
+        if self._dump is not None:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop(self, rc=0):
+        """Emit the report, the cProfile dump and the log record"""
+        if not self.enabled:
+            return
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self._dump)
+        report = self.get_report(time.time() - self._start[0], _cpu_time() - self._start[1], rc)
+        if self._report == '-':
+            print(json.dumps(report, indent=4), file=sys.stderr)
+        else:
+            with open(self._report, 'w') as f:
+                json.dump(report, f, indent=4)
+        append_record(report)
+
+    def get_report(self, wall, cpu, rc):
+        phases = OrderedDict()
+        for name, (phase_wall, phase_cpu, calls) in self._phases.items():
+            phases[name] = OrderedDict([('wall_ms', _ms(phase_wall)), ('cpu_ms', _ms(phase_cpu)), ('calls', calls)])
+        return OrderedDict([
+            ('time', round(self._start[0], 3)),
+            ('pid', os.getpid()),
+            ('argv', self._argv),
+            ('rc', rc),
+            ('wall_ms', _ms(wall)),
+            ('cpu_ms', _ms(cpu)),
+            # The CPU time of the interpreter and the imports before main()
+            ('startup_cpu_ms', _ms(self._start[1])),
+            ('other_wall_ms', _ms(wall - sum(phase[0] for phase in self._phases.values()))),
+            ('phases', phases),
+            # Included in the time of the phase that first used the module
+            ('imports_ms', OrderedDict((name, _ms(seconds)) for name, seconds in sorted(lazy_import.import_times.items()))),
+            ('counts', self._counts),
+        ])
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+def append_record(report):
+    """Append the compact form of a report to the log, silently giving up if it is not writable"""
+    log_file = get_profile_log()
+    if log_file is None:
+        return
+    record = OrderedDict((key, report[key]) for key in ('time', 'pid', 'argv', 'rc', 'wall_ms', 'cpu_ms', 'startup_cpu_ms'))
+    record['phases'] = OrderedDict((name, phase['wall_ms']) for name, phase in report['phases'].items())
+    try:
+        with open(log_file, 'a') as f:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+    except (IOError, OSError):
+        pass
+
+def load_records(log_file):
+    records = []
+    with open(log_file) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                pass
+    return records
+
+def summarize(records):
+    """Return the total wall time per phase and the slowest calls of the records"""
+    phases = {}
+    for record in records:
+        for name, wall_ms in record['phases'].items():
+            phases[name] = phases.get(name, 0) + wall_ms
+    slowest = sorted(records, key=lambda record: record['wall_ms'], reverse=True)
+    return OrderedDict([
+        ('calls', len(records)),
+        ('wall_ms', round(sum(record['wall_ms'] for record in records), 3)),
+        ('cpu_ms', round(sum(record['cpu_ms'] for record in records), 3)),
+        ('startup_cpu_ms', round(sum(record['startup_cpu_ms'] for record in records), 3)),
+        ('phases_ms', OrderedDict((name, round(phases[name], 3)) for name in sorted(phases, key=phases.get, reverse=True))),
+        ('slowest', [OrderedDict([('wall_ms', record['wall_ms']), ('argv', record['argv'])]) for record in slowest[:10]]),
+    ])
+
+
+if __name__ == "__main__":
+    log_file = sys.argv[1] if len(sys.argv) > 1 else get_profile_log()
+    print(json.dumps(summarize(load_records(log_file)), indent=4))
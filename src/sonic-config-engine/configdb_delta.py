@@ -0,0 +1,163 @@
+"""configdb_delta.py
+
+Incremental writes to config DB. Instead of rewriting every entry the way
+ConfigDBConnector.mod_config() does, the current contents of the affected
+tables are read, compared field by field with the data to write, and only the
+added, modified and deleted entries are applied in a single MULTI/EXEC
+transaction. Unchanged entries are not touched, so they do not fire keyspace
+notifications for the daemons subscribed to config DB.
+
+The keys the transaction touches are WATCHed, and the whole read, compare and
+write is retried if another writer changes one of them in between, so the
+changes are never applied on top of entries they were not computed from.
+Entries the write leaves alone may still change meanwhile, which is the same
+as the other writer coming after this one.
+"""
+
+import lazy_import
+redis = lazy_import.module('redis')
+
+from configdb_snapshot import TABLE_NAME_SEPARATOR, get_raw_snapshot, read_hashes, serialize_key, typed_to_raw
+
+ADDED = 'added'
+MODIFIED = 'modified'
+DELETED = 'deleted'
+
+# Attempts of write_config_delta() while other writers change the same keys
+WRITE_RETRIES = 10
+
+
+class ConfigDelta(object):
+    """Changes to apply to config DB, per redis key"""
+
+    def __init__(self):
+        self.set_fields = {}
+        self.del_fields = {}
+        self.del_keys = set()
+        self.summary = {}
+
+    def count(self, table, change):
+        self.summary.setdefault(table, {ADDED: 0, MODIFIED: 0, DELETED: 0})[change] += 1
+
+    def keys(self):
+        return set(self.set_fields) | set(self.del_fields) | self.del_keys
+
+    def __len__(self):
+        return len(self.keys())
+
+    def apply(self, client, current=None):
+        """Write the changes to config DB in one transaction.
+
+        If current, the raw hashes the changes were computed from, is given,
+        the transaction only runs while the keys it touches still hold them,
+        redis.exceptions.WatchError is raised otherwise.
+        """
+        if not len(self):
+            return
+        pipe = client.pipeline(transaction=True)
+        if current is not None:
+            keys = sorted(self.keys())
+            pipe.watch(*keys)
+            # Changes made between the read of current and the WATCH
+            if _encoded(read_hashes(client, keys)) != _encoded((key, current[key]) for key in keys if key in current):
+                pipe.reset()
+                raise redis.exceptions.WatchError('Watched keys changed since they were read')
+            pipe.multi()
+        for key in self.del_keys:
+            pipe.delete(key)
+        for key, fields in self.set_fields.items():
+            pipe.hmset(key, fields)
+        for key, fields in self.del_fields.items():
+            pipe.hdel(key, *fields)
+        pipe.execute()
+
+    def format_summary(self):
+        if not self.summary:
+            return 'No changes'
+        lines = []
+        for table in sorted(self.summary):
+            counts = self.summary[table]
+            lines.append('{}: {} added, {} modified, {} deleted'.format(
+                table, counts[ADDED], counts[MODIFIED], counts[DELETED]))
+        return '\n'.join(lines)
+
+
+def _encode(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return value
+
+def _encoded(hashes):
+    """Return (key, hash) pairs as a dict of UTF-8 strings, whether they were
+    read as bytes by HGETALL or decoded from the json of the scan script"""
+    return dict((_encode(key), dict((_encode(field), _encode(value)) for field, value in raw_data.items()))
+                for key, raw_data in hashes)
+
+def compute_delta(current, data, replace=False):
+    """Compute the changes turning current into the result of writing data.
+
+    Keyword arguments:
+    current -- dict of redis key -> raw hash, as read by get_raw_snapshot()
+    data -- config in the format of get_config(); a None table or entry is deleted
+    replace -- also delete the entries and fields of current that are not in
+               data, so that config DB ends up holding exactly data. Without it
+               the write is merged into config DB the way mod_config() does.
+    """
+    delta = ConfigDelta()
+    written = set()
+    for table_name, table_data in data.items():
+        table = table_name.upper()
+        if table_data is None:
+            prefix = table + TABLE_NAME_SEPARATOR
+            for redis_key in current:
+                if redis_key.startswith(prefix):
+                    delta.del_keys.add(redis_key)
+                    delta.count(table, DELETED)
+            continue
+        for key, entry in table_data.items():
+            redis_key = '{}{}{}'.format(table, TABLE_NAME_SEPARATOR, serialize_key(key))
+            old = current.get(redis_key)
+            if entry is None:
+                if old is not None:
+                    delta.del_keys.add(redis_key)
+                    delta.count(table, DELETED)
+                continue
+            written.add(redis_key)
+            new = typed_to_raw(entry)
+            if old is None:
+                delta.set_fields[redis_key] = new
+                delta.count(table, ADDED)
+                continue
+            changed = dict((field, value) for field, value in new.items() if old.get(field) != value)
+            stale = [field for field in old if field not in new] if replace else []
+            if changed:
+                delta.set_fields[redis_key] = changed
+            if stale:
+                delta.del_fields[redis_key] = stale
+            if changed or stale:
+                delta.count(table, MODIFIED)
+    if replace:
+        for redis_key in current:
+            if redis_key not in written and redis_key not in delta.del_keys:
+                delta.del_keys.add(redis_key)
+                delta.count(redis_key.split(TABLE_NAME_SEPARATOR, 1)[0], DELETED)
+    return delta
+
+def write_config_delta(client, data, replace=False):
+    """Write data to config DB, touching only the entries that change.
+
+    Only the tables in data are read back unless replace is set, in which case
+    the whole config DB is compared. Returns the applied ConfigDelta. Raises
+    redis.exceptions.WatchError if the keys to change were changed by another
+    writer during each of the WRITE_RETRIES attempts.
+    """
+    tables = None if replace else [table.upper() for table in data]
+    for attempt in range(WRITE_RETRIES):
+        current = get_raw_snapshot(client, tables)
+        delta = compute_delta(current, data, replace)
+        try:
+            delta.apply(client, current)
+            return delta
+        except redis.exceptions.WatchError:
+            if attempt == WRITE_RETRIES - 1:
+                raise
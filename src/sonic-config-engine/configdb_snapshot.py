@@ -0,0 +1,171 @@
+"""configdb_snapshot.py
+
+Bulk reader for config DB contents. Keys are listed with SCAN and their hashes
+are fetched server side by a Lua script that returns a whole SCAN page as one
+JSON document, one round trip per page instead of one per key as
+ConfigDBConnector.get_config() does. Redis servers refusing scripts are read
+with pipelined HGETALL instead. The returned data has the same format as
+ConfigDBConnector.get_config().
+"""
+
+import json
+
+import lazy_import
+redis = lazy_import.module('redis')
+
+TABLE_NAME_SEPARATOR = '|'
+KEY_SEPARATOR = '|'
+
+SCAN_COUNT = 1000
+PIPELINE_BATCH_SIZE = 1000
+
+# Returns [next cursor, JSON object of key -> hash] for one SCAN page, only
+# reading the keys of the tables given after the SCAN arguments, if any
+SCAN_HASHES_SCRIPT = """
+local scan = redis.call('SCAN', ARGV[1], 'MATCH', ARGV[2], 'COUNT', ARGV[3])
+local tables = {}
+for i = 4, #ARGV do
+    tables[ARGV[i]] = true
+end
+local hashes = {}
+for _, key in ipairs(scan[2]) do
+    local fields = {}
+    if #ARGV == 3 or tables[string.match(key, '^[^|]*')] then
+        fields = redis.pcall('HGETALL', key)
+    end
+    if fields.err == nil and #fields > 0 then
+        local hash = {}
+        for i = 1, #fields, 2 do
+            hash[fields[i]] = fields[i + 1]
+        end
+        hashes[key] = hash
+    end
+end
+return {scan[1], cjson.encode(hashes)}
+"""
+
+
+def deserialize_key(key):
+    tokens = key.split(KEY_SEPARATOR)
+    if len(tokens) > 1:
+        return tuple(tokens)
+    return key
+
+def serialize_key(key):
+    if type(key) is tuple:
+        return KEY_SEPARATOR.join(key)
+    return str(key)
+
+def raw_to_typed(raw_data):
+    typed_data = {}
+    for key, value in raw_data.items():
+        # "NULL:NULL" is used as a placeholder for objects with no attributes
+        if key == 'NULL':
+            continue
+        # A column key with ending '@' is used to mark list-typed table items
+        elif key.endswith('@'):
+            typed_data[key[:-1]] = value.split(',')
+        else:
+            typed_data[key] = value
+    return typed_data
+
+def typed_to_raw(typed_data):
+    if typed_data is None:
+        return None
+    elif typed_data == {}:
+        return {'NULL': 'NULL'}
+    raw_data = {}
+    for key, value in typed_data.items():
+        if type(value) is list:
+            raw_data[key + '@'] = ','.join(value)
+        else:
+            raw_data[key] = str(value)
+    return raw_data
+
+def _scan_match(tables):
+    """Return the SCAN MATCH pattern listing the keys of the given tables, and
+    the set of these tables, None for all of them.
+
+    Each SCAN pass walks the whole keyspace whatever its pattern, so several
+    tables are listed in a single pass over all keys, filtered by _in_tables().
+    """
+    if tables is None:
+        return ('*', None)
+    tables = set(tables)
+    if len(tables) == 1:
+        return ('{}{}*'.format(next(iter(tables)), TABLE_NAME_SEPARATOR), tables)
+    return ('*', tables)
+
+def _in_tables(key, tables):
+    (table_name, separator, _) = key.partition(TABLE_NAME_SEPARATOR)
+    return bool(separator) and (tables is None or table_name in tables)
+
+def scan_keys(client, tables=None):
+    """Yield the redis keys of the given tables, or of all tables"""
+    (pattern, tables) = _scan_match(tables)
+    if tables is not None and not tables:
+        return
+    for key in client.scan_iter(match=pattern, count=SCAN_COUNT):
+        if _in_tables(key, tables):
+            yield key
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def read_hashes(client, keys, batch_size=PIPELINE_BATCH_SIZE):
+    """Yield (key, hash) of the given redis keys, skipping the ones gone or not hashes"""
+    for batch in _batches(keys, batch_size):
+        pipe = client.pipeline(transaction=False)
+        for key in batch:
+            pipe.hgetall(key)
+        for key, raw_data in zip(batch, pipe.execute(raise_on_error=False)):
+            if raw_data and isinstance(raw_data, dict):
+                yield key, raw_data
+
+def add_entries(data, hashes):
+    """Add (key, hash) pairs read from config DB to data"""
+    for key, raw_data in hashes:
+        (table_name, row) = key.split(TABLE_NAME_SEPARATOR, 1)
+        data.setdefault(table_name, {})[deserialize_key(row)] = raw_to_typed(raw_data)
+    return data
+
+def scan_hashes(client, tables=None, count=SCAN_COUNT):
+    """Yield (key, hash) of the given tables, or of all tables, one SCAN page per script call"""
+    (pattern, tables) = _scan_match(tables)
+    if tables is not None and not tables:
+        return
+    script = client.register_script(SCAN_HASHES_SCRIPT)
+    cursor = '0'
+    while True:
+        cursor, page = script(args=[cursor, pattern, count] + sorted(tables or []))
+        for key, raw_data in json.loads(page).iteritems():
+            if _in_tables(key, tables):
+                yield key, raw_data
+        if str(cursor) == '0':
+            break
+
+def get_raw_snapshot(client, tables=None, batch_size=PIPELINE_BATCH_SIZE):
+    """Read the hashes of config DB tables as a dict of redis key -> raw hash.
+
+    Keyword arguments:
+    client -- redis client connected to config DB
+    tables -- names of the tables to read, None to read all of them
+    batch_size -- number of keys per SCAN page or HGETALL round trip
+    """
+    try:
+        return dict(scan_hashes(client, tables, batch_size))
+    except (redis.exceptions.ResponseError, ValueError):
+        # Scripting disabled or cjson missing, or field values cjson cannot encode as
+        # UTF-8 json, fall back to plain pipelining
+        return dict(read_hashes(client, scan_keys(client, tables), batch_size))
+
+def get_config_snapshot(client, tables=None, batch_size=PIPELINE_BATCH_SIZE):
+    """Read config DB contents through a redis client, in the format of get_config()"""
+    return add_entries({}, get_raw_snapshot(client, tables, batch_size).iteritems())
@@ -0,0 +1,140 @@
+"""data_cache.py
+
+Content addressed cache of the data sonic-cfggen merges from its input files
+(minigraph, port config, json and yaml files). An entry is keyed by the path,
+mtime, size and SHA-1 of every file the data was built from, together with
+the platform, asic and namespace, so any change to an input selects another
+entry. Entries are pickled, which loads much faster than parsing the sources
+again. What the parsers print while building the data, like minigraph
+warnings, is stored with it and replayed on a hit.
+"""
+
+import cPickle as pickle
+import hashlib
+import os
+import sys
+import tempfile
+
+CACHE_DIR = '/var/cache/sonic-cfggen'
+CACHE_DIR_ENV = 'SONIC_CFGGEN_CACHE_DIR'
+CACHE_VERSION = 2
+MAX_ENTRIES = 32
+
+
+def get_cache_dir():
+    """Return the cache directory, or None if caching is disabled with an empty SONIC_CFGGEN_CACHE_DIR"""
+    return os.environ.get(CACHE_DIR_ENV, CACHE_DIR) or None
+
+def _file_digest(path):
+    stat = os.stat(path)
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha1.update(chunk)
+    return (os.path.abspath(path), stat.st_mtime, stat.st_size, sha1.hexdigest())
+
+def cache_key(files, context):
+    """Return the cache key of data built from files, or None if one of them cannot be read.
+
+    Keyword arguments:
+    files -- list of (role, path) of the files the data is built from
+    context -- dict of the other values the data depends on
+    """
+    sha1 = hashlib.sha1(repr((CACHE_VERSION, sorted(context.items()))))
+    for role, path in files:
+        try:
+            sha1.update(repr((role,) + _file_digest(path)))
+        except (IOError, OSError):
+            return None
+    return sha1.hexdigest()
+
+
+class _Recorder(object):
+    """File-like wrapper logging what is written to a stream"""
+
+    def __init__(self, stream, name, log):
+        self.stream = stream
+        self.name = name
+        self.log = log
+
+    def write(self, text):
+        self.log.append((self.name, text))
+        self.stream.write(text)
+
+    def __getattr__(self, attr):
+        return getattr(self.stream, attr)
+
+
+def build_recorded(func, *args):
+    """Call func and return (result, output), output being what it printed to stdout and stderr"""
+    output = []
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = _Recorder(stdout, 'stdout', output)
+    sys.stderr = _Recorder(stderr, 'stderr', output)
+    try:
+        return func(*args), output
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+def replay(output):
+    for name, text in output:
+        getattr(sys, name).write(text)
+
+def load(key):
+    """Return (data, output) of a cache entry, or None on a miss"""
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return None
+    try:
+        with open(os.path.join(cache_dir, key + '.pickle'), 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+def store(key, data, output):
+    """Save a cache entry, silently giving up if the cache directory is not writable"""
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        (fd, tmp_path) = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    except (IOError, OSError):
+        return
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((data, output), f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_path, os.path.join(cache_dir, key + '.pickle'))
+        _evict(cache_dir)
+    except (IOError, OSError, pickle.PicklingError):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _evict(cache_dir):
+    """Keep the MAX_ENTRIES most recently written entries"""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.pickle'):
+            path = os.path.join(cache_dir, name)
+            entries.append((os.path.getmtime(path), path))
+    for _, path in sorted(entries, reverse=True)[MAX_ENTRIES:]:
+        os.remove(path)
+
+def cached(files, context, func, *args):
+    """Return func(*args), served from the cache when the files and context did not change.
+
+    files is None when the data does not only depend on files, then nothing
+    is cached.
+    """
+    key = cache_key(files, context) if files is not None and get_cache_dir() is not None else None
+    if key is not None:
+        entry = load(key)
+        if entry is not None:
+            (data, output) = entry
+            replay(output)
+            return data
+    (data, output) = build_recorded(func, *args)
+    if key is not None:
+        store(key, data, output)
+    return data
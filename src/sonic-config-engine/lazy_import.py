@@ -0,0 +1,37 @@
+# deferred module imports to improve the start time of sonic-cfggen
+#
+# sonic-cfggen runs many times during boot, mostly for lookups that need few
+# of its dependencies. A module bound with
+#
+#     yaml = lazy_import.module('yaml')
+#
+# is only imported when one of its attributes is first read, so jinja2, yaml,
+# netaddr, natsort, lxml (through minigraph), swsssdk and redis are only paid
+# for by the invocations that use them.
+
+import importlib
+import sys
+import time
+
+# Seconds spent importing each module on its first use, see cfggen_profile.py
+import_times = {}
+
+
+class LazyModule(object):
+    def __init__(self, name):
+        self._lazy_name = name
+
+    def __getattr__(self, attr):
+        module = sys.modules.get(self._lazy_name)
+        if module is None:
+            start = time.time()
+            module = importlib.import_module(self._lazy_name)
+            import_times[self._lazy_name] = time.time() - start
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return "<lazy module '%s'>" % self._lazy_name
+
+
+def module(name):
+    return LazyModule(name)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 import calendar
 import math
+import multiprocessing
 import os
 import sys
 import socket
@@ -42,6 +43,11 @@ BACKEND_ASIC_INTERFACE_NAME_PREFIX = 'Ethernet-BP'
 # Default Virtual Network Index (VNI) 
 vni_default = 8000
 
+# Top level elements read by parse_header() and declarations handled by parse_sections()
+minigraph_header = [str(QName(ns, tag)) for tag in ["HwSku", "Hostname", "DockerRoutingConfigMode"]]
+minigraph_sections = [str(QName(ns, tag)) for tag in ["DpgDec", "CpgDec", "PngDec", "UngDec", "MetadataDeclaration",
+                                                      "LinkMetadataDeclaration", "DeviceInfos"]]
+
 ###############################################################################
 #
 # Minigraph parsing functions
@@ -317,7 +323,7 @@ def parse_dpg(dpg, hname):
         pc_intfs = []
         pcs = {}
         pc_members = {}
-        intfs_inpc = [] # List to hold all the LAG member interfaces 
+        intfs_inpc = set() # Set to hold all the LAG member interfaces
         for pcintf in pcintfs.findall(str(QName(ns, "PortChannel"))):
             pcintfname = pcintf.find(str(QName(ns, "Name"))).text
             pcintfmbr = pcintf.find(str(QName(ns, "AttachTo"))).text
@@ -325,7 +331,7 @@ def parse_dpg(dpg, hname):
             pc_intfs.append(pcintfname)
             for i, member in enumerate(pcmbr_list):
                 pcmbr_list[i] = port_alias_map.get(member, member)
-                intfs_inpc.append(pcmbr_list[i])
+                intfs_inpc.add(pcmbr_list[i])
                 pc_members[(pcintfname, pcmbr_list[i])] = {'NULL': 'NULL'}
             if pcintf.find(str(QName(ns, "Fallback"))) != None:
                 pcs[pcintfname] = {'members': pcmbr_list, 'fallback': pcintf.find(str(QName(ns, "Fallback"))).text, 'min_links': str(int(math.ceil(len() * 0.75)))}
@@ -411,11 +417,13 @@ def parse_dpg(dpg, hname):
                     # ports. Non-active ports will be removed from this list
                     # later after the rest of the minigraph has been parsed.
                     acl_intfs = pc_intfs[:]
+                    acl_intfs_set = set(acl_intfs)
                     for panel_port in port_alias_map.values():
                         # because of port_alias_asic_map we can have duplicate in port_alias_map
                         # so check if already present do not add
-                        if panel_port not in intfs_inpc and panel_port not in acl_intfs:
+                        if panel_port not in intfs_inpc and panel_port not in acl_intfs_set:
                             acl_intfs.append(panel_port)
+                            acl_intfs_set.add(panel_port)
                     break
             if acl_intfs:
                 acls[aclname] = {'policy_desc': aclname,
@@ -494,6 +502,7 @@ def parse_cpg(cpg, hname):
                         'nhopself': nhopself
                     }
         elif child.tag == str(QName(ns, "Routers")):
+            sessions_by_name = index_by_lower(bgp_sessions.values(), lambda bgp_session: bgp_session['name'])
             for router in child.findall(str(QName(ns1, "BGPRouterDeclaration"))):
                 asn = router.find(str(QName(ns1, "ASN"))).text
                 hostname = router.find(str(QName(ns1, "Hostname"))).text
@@ -515,10 +524,8 @@ def parse_cpg(cpg, hname):
                             if bgpPeer.find(str(QName(ns1, "PeerAsn"))) is not None:
                                 bgp_peers_with_range[name]['peer_asn'] = bgpPeer.find(str(QName(ns1, "PeerAsn"))).text
                 else:
-                    for peer in bgp_sessions:
-                        bgp_session = bgp_sessions[peer]
-                        if hostname.lower() == bgp_session['name'].lower():
-                            bgp_session['asn'] = asn
+                    for bgp_session in sessions_by_name.get(hostname.lower(), []):
+                        bgp_session['asn'] = asn
 
     bgp_monitors = { key: bgp_sessions[key] for key in bgp_sessions if bgp_sessions[key].has_key('asn') and bgp_sessions[key]['name'] == 'BGPMonitor' }
     bgp_sessions = { key: bgp_sessions[key] for key in bgp_sessions if bgp_sessions[key].has_key('asn') and int(bgp_sessions[key]['asn']) != 0 }
@@ -598,17 +605,22 @@ def parse_linkmeta(meta, hname):
 
 
 def parse_asic_meta(meta, hname):
-    sub_role = None
+    return parse_asic_sub_roles(meta).get(hname.lower())
+
+def parse_asic_sub_roles(meta):
+    """Return the SubRole of every device of a MetadataDeclaration, by lower case device name"""
+    sub_roles = {}
     device_metas = meta.find(str(QName(ns, "Devices")))
     for device in device_metas.findall(str(QName(ns1, "DeviceMetadata"))):
-        if device.find(str(QName(ns1, "Name"))).text.lower() == hname.lower():
-            properties = device.find(str(QName(ns1, "Properties")))
-            for device_property in properties.findall(str(QName(ns1, "DeviceProperty"))):
-                name = device_property.find(str(QName(ns1, "Name"))).text
-                value = device_property.find(str(QName(ns1, "Value"))).text
-                if name == "SubRole":
-                    sub_role = value
-    return sub_role
+        properties = device.find(str(QName(ns1, "Properties")))
+        if properties is None:
+            continue
+        for device_property in properties.findall(str(QName(ns1, "DeviceProperty"))):
+            name = device_property.find(str(QName(ns1, "Name"))).text
+            value = device_property.find(str(QName(ns1, "Value"))).text
+            if name == "SubRole":
+                sub_roles[device.find(str(QName(ns1, "Name"))).text.lower()] = value
+    return sub_roles
 
 def parse_deviceinfo(meta, hwsku):
     port_speeds = {}
@@ -670,6 +682,11 @@ def parse_spine_chassis_fe(results, vni, lo_intfs, phyport_intfs, pc_intfs, pc_m
             # Enslave the interface to a Vnet
             phyport_intfs[intf] = {'vnet_name': chassis_vnet}
            
+    # Get a physical interface that belongs to each port channel
+    pc_first_member = {}
+    for pc_member in pc_members:
+        pc_first_member.setdefault(pc_member[0], pc_member[1])
+
     # For each port channel IP interface
     for pc_intf in pc_intfs:
         # A port channel IP interface may have multiple entries. 
@@ -678,13 +695,7 @@ def parse_spine_chassis_fe(results, vni, lo_intfs, phyport_intfs, pc_intfs, pc_m
         if is_ip_prefix_in_key(pc_intf) == True:
             continue 
 
-        intf_name = None 
-        # Get a physical interface that belongs to this port channel         
-        for pc_member in pc_members:
-            if pc_member[0] == pc_intf:
-                intf_name = pc_member[1]
-                break
-
+        intf_name = pc_first_member.get(pc_intf)
         if intf_name == None:
             print >> sys.stderr, 'Warning: cannot find any interfaces that belong to %s' % (pc_intf)
             continue
@@ -723,6 +734,7 @@ def filter_acl_table_bindings(acls, neighbors, port_channels, sub_role):
                                    for lag_member in port_channels[port_channel_intf]['members'])
         if not backend_port_channel:
             front_port_channel_intf.append(port_channel_intf)
+    front_port_channel_intf = set(front_port_channel_intf)
 
     for acl_table, group_params in acls.iteritems():
         group_type = group_params.get('type', None)
@@ -750,7 +762,7 @@ def filter_acl_table_bindings(acls, neighbors, port_channels, sub_role):
         # Filters out inactive front-panel ports from the binding list for mirror
         # ACL tables. We define an "active" port as one that is a member of a
         # front pannel port channel or one that is connected to a neighboring device via front panel port.
-        active_ports = [port for port in front_panel_ports if port in neighbors.keys() or port in front_port_channel_intf]
+        active_ports = [port for port in front_panel_ports if port in neighbors or port in front_port_channel_intf]
         
         if not active_ports:
             print >> sys.stderr, 'Warning: mirror table {} in ACL_TABLE does not have any ports bound to it'.format(acl_table)
@@ -759,21 +771,65 @@ def filter_acl_table_bindings(acls, neighbors, port_channels, sub_role):
 
     return filter_acls
 
-def enable_internal_bgp_session(bgp_sessions, filename, asic_name):
+def enable_internal_bgp_session(bgp_sessions, sub_roles, asic_name):
     '''
     In Multi-NPU session the internal sessions will always be up.
     So adding the admin-status 'up' configuration to bgp sessions
     BGP session between FrontEnd and BackEnd Asics are internal bgp sessions
+    sub_roles maps lower case device names to their SubRole, see parse_asic_sub_roles()
     '''
-    local_sub_role = parse_asic_sub_role(filename, asic_name)
+    local_sub_role = sub_roles.get(asic_name.lower())
 
     for peer_ip in bgp_sessions.keys():
         peer_name = bgp_sessions[peer_ip]['name']
-        peer_sub_role = parse_asic_sub_role(filename, peer_name)
+        peer_sub_role = sub_roles.get(peer_name.lower())
         if ((local_sub_role == FRONTEND_ASIC_SUB_ROLE and peer_sub_role == BACKEND_ASIC_SUB_ROLE) or
             (local_sub_role == BACKEND_ASIC_SUB_ROLE and peer_sub_role == FRONTEND_ASIC_SUB_ROLE)):
             bgp_sessions[peer_ip].update({'admin_status': 'up'})
 
+def index_by_lower(items, get_name):
+    '''
+    Index items by the lower case of their name, for case insensitive lookups
+    of hostnames. Every name maps to the list of its items, in iteration order.
+    '''
+    index = {}
+    for item in items:
+        index.setdefault(get_name(item).lower(), []).append(item)
+    return index
+
+def iter_root_elements(filename, tags):
+    '''
+    Yield the children of the root element of an xml file that have one of
+    the given tags, each one as soon as it is parsed, without freeing them.
+    '''
+    for _, elem in ET.iterparse(filename, events=('end',), tag=tags):
+        parent = elem.getparent()
+        if parent is None or parent.getparent() is not None:
+            continue
+        yield elem
+
+def free_root_element(elem):
+    '''
+    Free a child of the root element yielded by iter_root_elements() and the
+    children before it
+    '''
+    elem.clear()
+    parent = elem.getparent()
+    while elem.getprevious() is not None:
+        del parent[0]
+
+def iter_root_children(filename, tags):
+    '''
+    Yield the children of the root element of an xml file that have one of
+    the given tags, each one as soon as it is parsed. Once the caller asks
+    for the next child, the previous one and the skipped children before it
+    are freed, so only one top level declaration of a large minigraph is held
+    in memory at a time.
+    '''
+    for elem in iter_root_elements(filename, tags):
+        yield elem
+        free_root_element(elem)
+
 ###############################################################################
 #
 # Main functions
@@ -789,12 +845,70 @@ def parse_xml(filename, platform=None, port_config_file=None, asic_name=None, hw
     asic_name -- asic name; to parse multi-asic device minigraph to 
     generate asic specific configuration.
      """
+    (header, sections) = stream_minigraph(filename)
+    return parse_sections(sections, header, platform, port_config_file, asic_name, hwsku_config_file)
+
+def parse_header(children):
+    """ Return (hwsku, hostname, docker_routing_config_mode) of the root children of a minigraph """
+    header = [None, None, "separated"]
+    for child in children:
+        update_header(header, child)
+    return tuple(header)
+
+def update_header(header, child):
+    """ Update a [hwsku, hostname, docker_routing_config_mode] list with a root child of a minigraph """
+    if child.tag == str(QName(ns, "HwSku")):
+        header[0] = child.text
+    if child.tag == str(QName(ns, "Hostname")):
+        header[1] = child.text
+    if child.tag == str(QName(ns, "DockerRoutingConfigMode")):
+        header[2] = child.text
+
+def stream_minigraph(filename):
+    """ Parse a minigraph in one pass, returning (header, sections) for parse_sections().
+
+    The section parsers need the hwsku and the hostname, which usually come
+    last in the file: the sections before them are kept until they are
+    parsed, the ones after them are freed once handled. The header is a list
+    whose docker_routing_config_mode is only known once the sections are all
+    read.
+    """
+    header = [None, None, "separated"]
+    children = iter_root_elements(filename, minigraph_header + minigraph_sections)
+    kept = []
+    for child in children:
+        if child.tag in minigraph_sections:
+            kept.append(child)
+        else:
+            update_header(header, child)
+        if header[0] is not None and header[1] is not None:
+            break
+    return (header, _stream_sections(children, kept, header))
+
+def _stream_sections(children, kept, header):
+    for child in kept:
+        yield child
+        child.clear()
+    for child in children:
+        if child.tag in minigraph_sections:
+            yield child
+        else:
+            update_header(header, child)
+        free_root_element(child)
 
-    root = ET.parse(filename).getroot()
+def parse_sections(sections, header, platform=None, port_config_file=None, asic_name=None, hwsku_config_file=None):
+    """ Build the configuration of the host or of an asic from the minigraph sections.
+
+    Keyword arguments:
+    sections -- iterable of the top level declarations of the minigraph
+    header -- (hwsku, hostname, docker_routing_config_mode), see parse_header(); the
+    docker_routing_config_mode is read once the sections are, see stream_minigraph()
+    other arguments -- as for parse_xml()
+    """
+    (hwsku, hostname) = header[:2]
 
     u_neighbors = None
     u_devices = None
-    hwsku = None
     bgp_sessions = None
     bgp_monitors = []
     bgp_asn = None
@@ -809,7 +923,6 @@ def parse_xml(filename, platform=None, port_config_file=None, asic_name=None, hw
     neighbors = None
     devices = None
     sub_role = None
-    docker_routing_config_mode = "separated"
     port_speeds_default = {}
     port_speed_png = {}
     port_descriptions = {}
@@ -824,7 +937,6 @@ def parse_xml(filename, platform=None, port_config_file=None, asic_name=None, hw
     deployment_id = None
     region = None
     cloudtype = None
-    hostname = None
     linkmetas = {}
 
     # hostname is the asic_name, get the asic_id from the asic_name
@@ -833,22 +945,12 @@ def parse_xml(filename, platform=None, port_config_file=None, asic_name=None, hw
     else:
         asic_id = None
 
-    hwsku_qn = QName(ns, "HwSku")
-    hostname_qn = QName(ns, "Hostname")
-    docker_routing_config_mode_qn = QName(ns, "DockerRoutingConfigMode")
-    for child in root:
-        if child.tag == str(hwsku_qn):
-            hwsku = child.text
-        if child.tag == str(hostname_qn):
-            hostname = child.text
-        if child.tag == str(docker_routing_config_mode_qn):
-            docker_routing_config_mode = child.text
-
     (ports, alias_map, alias_asic_map) = get_port_config(hwsku=hwsku, platform=platform, port_config_file=port_config_file, asic=asic_id, hwsku_config_file=hwsku_config_file)
     port_alias_map.update(alias_map)
     port_alias_asic_map.update(alias_asic_map)
 
-    for child in root:
+    asic_sub_roles = None
+    for child in sections:
         if asic_name is None:
             if child.tag == str(QName(ns, "DpgDec")):
                 (intfs, lo_intfs, mvrf, mgmt_intf, vlans, vlan_members, pcs, pc_members, acls, vni) = parse_dpg(child, hostname)
@@ -869,22 +971,28 @@ def parse_xml(filename, platform=None, port_config_file=None, asic_name=None, hw
                 (intfs, lo_intfs, mvrf, mgmt_intf, vlans, vlan_members, pcs, pc_members, acls, vni) = parse_dpg(child, asic_name)
             elif child.tag == str(QName(ns, "CpgDec")):
                 (bgp_sessions, bgp_asn, bgp_peers_with_range, bgp_monitors) = parse_cpg(child, asic_name)
-                enable_internal_bgp_session(bgp_sessions, filename, asic_name)
             elif child.tag == str(QName(ns, "PngDec")):
                 (neighbors, devices, port_speed_png) = parse_asic_png(child, asic_name, hostname)
             elif child.tag == str(QName(ns, "MetadataDeclaration")):
-                (sub_role) = parse_asic_meta(child, asic_name)
+                sub_roles = parse_asic_sub_roles(child)
+                sub_role = sub_roles.get(asic_name.lower())
+                if asic_sub_roles is None:
+                    asic_sub_roles = sub_roles
             elif child.tag == str(QName(ns, "LinkMetadataDeclaration")):
                 linkmetas = parse_linkmeta(child, hostname)
             elif child.tag == str(QName(ns, "DeviceInfos")):
                 (port_speeds_default, port_descriptions) = parse_deviceinfo(child, hwsku)
 
+    if asic_name is not None and bgp_sessions is not None:
+        enable_internal_bgp_session(bgp_sessions, asic_sub_roles or {}, asic_name)
+
     # set the host device type in asic metadata also
-    device_type = [devices[key]['type'] for key in devices if key.lower() == hostname.lower()][0]
+    devices_by_name = index_by_lower(devices, lambda name: name)
+    device_type = devices[devices_by_name[hostname.lower()][0]]['type']
     if asic_name is None:
-        current_device = [devices[key] for key in devices if key.lower() == hostname.lower()][0]
+        current_device = devices[devices_by_name[hostname.lower()][0]]
     else:
-        current_device = [devices[key] for key in devices if key.lower() == asic_name.lower()][0]
+        current_device = devices[devices_by_name[asic_name.lower()][0]]
 
     results = {}
     results['DEVICE_METADATA'] = {'localhost': {
@@ -892,7 +1000,7 @@ def parse_xml(filename, platform=None, port_config_file=None, asic_name=None, hw
         'deployment_id': deployment_id,
         'region': region,
         'cloudtype': cloudtype,
-        'docker_routing_config_mode': docker_routing_config_mode,
+        'docker_routing_config_mode': header[2],
         'hostname': hostname,
         'hwsku': hwsku,
         'type': device_type
@@ -1083,7 +1191,8 @@ def parse_xml(filename, platform=None, port_config_file=None, asic_name=None, hw
     if asic_name is None:
         results['DEVICE_NEIGHBOR_METADATA'] = { key:devices[key] for key in devices if key.lower() != hostname.lower() }
     else:
-        results['DEVICE_NEIGHBOR_METADATA'] = { key:devices[key] for key in devices if key in {device['name'] for device in neighbors.values()} }
+        neighbor_names = {device['name'] for device in neighbors.values()}
+        results['DEVICE_NEIGHBOR_METADATA'] = { key:devices[key] for key in devices if key in neighbor_names }
     results['SYSLOG_SERVER'] = dict((item, {}) for item in syslog_servers)
     results['DHCP_SERVER'] = dict((item, {}) for item in dhcp_servers)
     results['NTP_SERVER'] = dict((item, {}) for item in ntp_servers)
@@ -1163,11 +1272,91 @@ def parse_device_desc_xml(filename):
 def parse_asic_sub_role(filename, asic_name):
     if not os.path.isfile(filename):
         return None
+    for child in iter_root_children(filename, [str(QName(ns, "MetadataDeclaration"))]):
+        sub_role = parse_asic_meta(child, asic_name)
+        return sub_role
+
+HOST_NAMESPACE = ''
+
+def read_minigraph(filename):
+    """ Parse a minigraph once, returning (header, sections) for parse_sections() """
     root = ET.parse(filename).getroot()
-    for child in root:
+    header = parse_header(root)
+    sections = [child for child in root if child.tag in minigraph_sections]
+    return (header, sections)
+
+def get_minigraph_asic_names(sections):
+    """ Return the names of the asics the minigraph declares with a SubRole, by asic id """
+    asic_ids = {}
+    for child in sections:
         if child.tag == str(QName(ns, "MetadataDeclaration")):
-            sub_role = parse_asic_meta(child, asic_name)
-            return sub_role
+            for name in parse_asic_sub_roles(child):
+                asic_id = get_npu_id_from_name(name)
+                if asic_id is not None and asic_id.isdigit():
+                    asic_ids[name] = int(asic_id)
+    return sorted(asic_ids, key=asic_ids.get)
+
+# Minigraph shared with the worker processes of parse_xml_namespaces()
+namespace_minigraph = None
+
+def _init_namespace_worker(minigraph):
+    global namespace_minigraph
+    namespace_minigraph = minigraph
+
+def get_namespace_port_config(port_config_file, namespace):
+    """ Return the port config file of a namespace. A '{}' in port_config_file
+    stands for the asic id, the host then uses the port config of the platform. """
+    if port_config_file is None or '{}' not in port_config_file:
+        return port_config_file
+    if namespace == HOST_NAMESPACE:
+        return None
+    return port_config_file.format(get_npu_id_from_name(namespace))
+
+def _parse_namespace(task):
+    (namespace, platform, port_config_file, hwsku_config_file) = task
+    (header, sections) = namespace_minigraph
+    # Start from empty port maps, as a separate parse_xml() call in its own process would
+    port_alias_map.clear()
+    port_alias_asic_map.clear()
+    asic_name = namespace if namespace != HOST_NAMESPACE else None
+    return parse_sections(sections, header, platform, port_config_file, asic_name, hwsku_config_file)
+
+def parse_xml_namespaces(filename, platform=None, port_config_file=None, hwsku_config_file=None, asic_names=None, jobs=1):
+    """ Parse a minigraph once and build the configuration of the host and of every asic.
+
+    Keyword arguments:
+    filename -- minigraph file name
+    platform -- device platform
+    port_config_file -- port config file name, see get_namespace_port_config()
+    hwsku_config_file -- hwsku config file name
+    asic_names -- asic names, by default the asics declared in the minigraph
+    jobs -- number of worker processes building the namespaces
+
+    Returns a dict of the parse_xml() results by namespace, HOST_NAMESPACE for
+    the host. The results made by worker processes are unpickled, so their
+    dicts may iterate in another order.
+    """
+    global namespace_minigraph
+    minigraph = read_minigraph(filename)
+    if asic_names is None:
+        asic_names = get_minigraph_asic_names(minigraph[1])
+    namespaces = [HOST_NAMESPACE] + list(asic_names)
+    tasks = [(namespace, platform, get_namespace_port_config(port_config_file, namespace), hwsku_config_file) for namespace in namespaces]
+    if jobs > 1 and len(tasks) > 1:
+        # The workers are forked, so they inherit the parsed minigraph
+        pool = multiprocessing.Pool(min(jobs, len(tasks)), _init_namespace_worker, (minigraph,))
+        try:
+            results = pool.map(_parse_namespace, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        namespace_minigraph = minigraph
+        try:
+            results = [_parse_namespace(task) for task in tasks]
+        finally:
+            namespace_minigraph = None
+    return dict(zip(namespaces, results))
 
 port_alias_map = {}
 port_alias_asic_map = {}
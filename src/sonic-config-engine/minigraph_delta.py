@@ -0,0 +1,119 @@
+"""minigraph_delta.py
+
+Incremental reload of a new minigraph. The old and the new minigraph are
+parsed the way sonic-cfggen -m does, the config DB tables they produce are
+compared entry by entry and field by field, and the result is the smallest
+change of config DB turning the data of the old minigraph into the data of
+the new one. The entries and fields of config DB that do not come from the
+minigraph are left alone. The generated configuration files whose tables
+change are listed, so that only their services need a restart instead of a
+full config load_minigraph.
+
+    python -m minigraph_delta /etc/sonic/minigraph.xml.old /etc/sonic/minigraph.xml
+    python -m minigraph_delta OLD NEW --json            # print the changes as json
+    python -m minigraph_delta OLD NEW --write-to-db     # apply them to config DB
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+from collections import OrderedDict
+
+import configdb_delta
+import lazy_import
+import minigraph
+import sonic_cfggen
+import sonic_device_util
+from configdb_snapshot import TABLE_NAME_SEPARATOR, serialize_key, typed_to_raw
+
+swsssdk = lazy_import.module('swsssdk')
+
+# The config DB tables each generated configuration file is rendered from
+ARTIFACT_TABLES = OrderedDict([
+    ('bgpd', ['BGP_NEIGHBOR', 'BGP_PEER_RANGE', 'BGP_MONITORS', 'DEVICE_METADATA', 'LOOPBACK_INTERFACE',
+              'INTERFACE', 'PORTCHANNEL_INTERFACE', 'VLAN_INTERFACE', 'VNET']),
+    ('buffers', ['DEVICE_METADATA', 'DEVICE_NEIGHBOR', 'DEVICE_NEIGHBOR_METADATA', 'PORT', 'VLAN_MEMBER']),
+    ('qos', ['DEVICE_METADATA', 'DEVICE_NEIGHBOR', 'PORT']),
+    ('interfaces', ['MGMT_INTERFACE', 'MGMT_VRF_CONFIG', 'PORT', 'ZTP']),
+])
+
+
+def parse_minigraph(filename, platform=None, port_config_file=None, hwsku_config_file=None, asic_name=None):
+    """Return the config DB tables of a minigraph"""
+    return sonic_cfggen.FormatConverter.output_to_db(
+        minigraph.parse_xml(filename, platform, port_config_file, asic_name=asic_name, hwsku_config_file=hwsku_config_file))
+
+def get_raw_config(data):
+    """Return config DB tables as redis key -> raw hash, like get_raw_snapshot() reads them"""
+    raw = {}
+    for table_name, table_data in data.items():
+        for key, entry in table_data.items():
+            raw['{}{}{}'.format(table_name.upper(), TABLE_NAME_SEPARATOR, serialize_key(key))] = typed_to_raw(entry)
+    return raw
+
+def compute_minigraph_delta(old_data, new_data):
+    """Return the ConfigDelta turning the config DB tables of the old minigraph into the ones of the new"""
+    return configdb_delta.compute_delta(get_raw_config(old_data), new_data, replace=True)
+
+def get_affected_artifacts(delta, artifact_tables=ARTIFACT_TABLES):
+    """Return the names of the artifacts rendered from a table the delta changes; None tables stand for any table"""
+    changed = set(delta.summary)
+    return [name for name, tables in artifact_tables.items()
+            if changed and (tables is None or changed.intersection(tables))]
+
+def delta_to_json(delta, affected):
+    return OrderedDict([
+        ('set', OrderedDict(sorted(delta.set_fields.items()))),
+        ('delete_fields', OrderedDict(sorted(delta.del_fields.items()))),
+        ('delete_keys', sorted(delta.del_keys)),
+        ('summary', delta.summary),
+        ('affected', affected),
+    ])
+
+def parse_artifact(value):
+    (name, sep, template_file) = value.partition('=')
+    if not sep or not name or not template_file:
+        raise argparse.ArgumentTypeError("'%s' is not NAME=TEMPLATE" % value)
+    return (name, template_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute the config DB changes from an old minigraph to a new one.")
+    parser.add_argument("old", help="minigraph the config DB was loaded from")
+    parser.add_argument("new", help="new minigraph")
+    parser.add_argument("-p", "--port-config", help="port config file")
+    parser.add_argument("-S", "--hwsku-config", help="hwsku config file, used with -p")
+    parser.add_argument("-n", "--namespace", help="namespace name, for the config of an asic")
+    parser.add_argument("-s", "--redis-unix-sock-file", help="unix sock file for redis connection")
+    parser.add_argument("-A", "--artifact", help="also tell if the file rendered from TEMPLATE is affected; can be repeated", action='append', default=[], type=parse_artifact, metavar='NAME=TEMPLATE')
+    parser.add_argument("-T", "--template_dir", help="search base for the template files of --artifact")
+    parser.add_argument("--json", help="print the changes as json", action='store_true')
+    parser.add_argument("-w", "--write-to-db", help="apply the changes to config DB", action='store_true')
+    args = parser.parse_args(argv)
+
+    platform = sonic_device_util.get_platform_info(sonic_device_util.get_machine_info())
+    if args.namespace is not None:
+        swsssdk.SonicDBConfig.load_sonic_global_db_config(namespace=args.namespace)
+    (old_data, new_data) = [parse_minigraph(filename, platform, args.port_config, args.hwsku_config, args.namespace)
+                            for filename in (args.old, args.new)]
+    delta = compute_minigraph_delta(old_data, new_data)
+
+    artifact_tables = OrderedDict(ARTIFACT_TABLES)
+    for name, template_file in args.artifact:
+        artifact_tables[name] = sonic_cfggen.find_output_tables([template_file], args.template_dir, [])
+    affected = get_affected_artifacts(delta, artifact_tables)
+
+    if args.write_to_db:
+        configdb = sonic_cfggen.connect_config_db(args.namespace, sonic_cfggen.get_db_kwargs(args), wait_for_init=False)
+        delta.apply(configdb.get_redis_client(configdb.db_name))
+
+    if args.json:
+        print(json.dumps(delta_to_json(delta, affected), indent=4))
+    else:
+        print(delta.format_summary())
+        print('Affected: {}'.format(', '.join(affected) if affected else 'none'))
+
+
+if __name__ == "__main__":
+    main()
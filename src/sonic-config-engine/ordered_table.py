@@ -0,0 +1,186 @@
+"""ordered_table.py
+
+Dict of a config DB table iterating its keys in natural order, the order
+natsort.natsorted() gives ('Ethernet4' before 'Ethernet12'). The order is
+computed the first time the table is iterated and kept until a key is added
+or removed; a key added to a table whose order is known is inserted at its
+place instead of sorting the table again. natsorted() orders keys with the
+same natural key ('Ethernet1' and 'Ethernet01') by their values, the table
+is sorted again when one of them is added or set. Tables no template iterates are
+never sorted. The order is pickled with the table, so the tables of the data
+cache keep it.
+
+    table = OrderedTable(data['PORT'])
+    for name, port in table.items():
+        ...
+"""
+
+import bisect
+import operator
+
+import lazy_import
+natsort = lazy_import.module('natsort')
+
+# Natural keys of the keys seen so far by type, most are field names shared by all the entries of a table.
+# 'Ethernet0' and u'Ethernet0' are equal but do not sort the same against a tuple key.
+MAX_CACHED_KEYS = 65536
+_natural_key = None
+_natural_keys = {}
+
+
+def natural_key(key):
+    """Return the key natsort.natsorted() sorts key with"""
+    global _natural_key
+    cache_key = (type(key), key)
+    sort_key = _natural_keys.get(cache_key)
+    if sort_key is None:
+        if _natural_key is None:
+            _natural_key = natsort.natsort_keygen()
+        if len(_natural_keys) >= MAX_CACHED_KEYS:
+            _natural_keys.clear()
+        sort_key = _natural_keys[cache_key] = _natural_key(key)
+    return sort_key
+
+def natural_items(table):
+    """Return the (key, value) pairs of a dict in natural order, as natsort.natsorted(table.items()) does;
+    the order of an OrderedTable is reused"""
+    if isinstance(table, OrderedTable):
+        return table.items()
+    decorated = sorted(((natural_key(key), (key, value)) for key, value in table.iteritems()), key=operator.itemgetter(0))
+    for index in range(1, len(decorated)):
+        if decorated[index - 1][0] == decorated[index][0]:
+            # Keys like 'Ethernet1' and 'Ethernet01', natsorted() orders them by their values
+            return natsort.natsorted(table.items())
+    return [item for (_, item) in decorated]
+
+def _rebuild(cls, entries, order):
+    table = cls(entries)
+    if order is not None:
+        table._order = list(order)
+    return table
+
+def _has_ties(sort_keys):
+    return any(sort_keys[index - 1] == sort_keys[index] for index in range(1, len(sort_keys)))
+
+
+class OrderedTable(dict):
+    """dict iterating its keys in natural order"""
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self._order = None
+        self._sort_keys = None
+        self._ties = False
+
+    def sort(self):
+        """Compute the order of the keys now instead of on the first iteration"""
+        self._get_order()
+
+    def _get_order(self):
+        if self._order is None:
+            sort_keys = sorted((natural_key(key), index, key) for index, key in enumerate(dict.__iter__(self)))
+            self._order = [key for (_, _, key) in sort_keys]
+            self._sort_keys = [sort_key for (sort_key, _, _) in sort_keys]
+            self._ties = _has_ties(self._sort_keys)
+            if self._ties:
+                # Ordered by their values, like natural_items()
+                self._order = [key for (key, _) in natsort.natsorted(dict.items(self))]
+        return self._order
+
+    def _get_sort_keys(self):
+        # Not pickled, an unpickled table only needs them to add or remove keys
+        if self._sort_keys is None:
+            self._sort_keys = [natural_key(key) for key in self._order]
+            self._ties = _has_ties(self._sort_keys)
+        return self._sort_keys
+
+    def _reset(self):
+        self._order = None
+        self._sort_keys = None
+        self._ties = False
+
+    def _insert(self, key):
+        if self._order is not None:
+            sort_key = natural_key(key)
+            sort_keys = self._get_sort_keys()
+            index = bisect.bisect_right(sort_keys, sort_key)
+            if index > 0 and sort_keys[index - 1] == sort_key:
+                self._reset()
+                return
+            self._order.insert(index, key)
+            sort_keys.insert(index, sort_key)
+
+    def _remove(self, key):
+        if self._order is not None:
+            index = bisect.bisect_left(self._get_sort_keys(), natural_key(key))
+            while self._order[index] != key:
+                index += 1
+            del self._order[index]
+            del self._sort_keys[index]
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._insert(key)
+        elif self._order is not None:
+            self._get_sort_keys()
+            if self._ties:
+                # The value can change the place of the key among the ones with the same natural key
+                self._reset()
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._remove(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def pop(self, key, *default):
+        if key in self:
+            self._remove(key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        (key, value) = dict.popitem(self)
+        self._remove(key)
+        return (key, value)
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self._reset()
+
+    def clear(self):
+        dict.clear(self)
+        self._reset()
+
+    def __iter__(self):
+        return iter(self._get_order())
+
+    def keys(self):
+        return list(self._get_order())
+
+    def values(self):
+        return [dict.__getitem__(self, key) for key in self._get_order()]
+
+    def items(self):
+        return [(key, dict.__getitem__(self, key)) for key in self._get_order()]
+
+    def iterkeys(self):
+        return iter(self._get_order())
+
+    def itervalues(self):
+        return (dict.__getitem__(self, key) for key in self._get_order())
+
+    def iteritems(self):
+        return ((key, dict.__getitem__(self, key)) for key in self._get_order())
+
+    def copy(self):
+        return _rebuild(self.__class__, self, self._order)
+
+    def __reduce__(self):
+        return (_rebuild, (self.__class__, dict(self), self._order))
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.items())
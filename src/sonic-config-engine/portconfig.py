@@ -3,13 +3,15 @@ try:
     import os
     import sys
     import json
-    import ast
     import re
+    import threading
     from collections import OrderedDict
-    from swsssdk import ConfigDBConnector
+    import lazy_import
 except ImportError as e:
     raise ImportError("%s - required module not found" % str(e))
 
+swsssdk = lazy_import.module('swsssdk')
+
 # Global Variable
 PLATFORM_ROOT_PATH = '/usr/share/sonic/device'
 PLATFORM_ROOT_PATH_DOCKER = '/usr/share/sonic/platform'
@@ -26,6 +28,7 @@ CUR_BRKOUT_MODE = "brkout_mode"
 INTF_KEY = "interfaces"
 
 BRKOUT_PATTERN = r'(\d{1,3})x(\d{1,3}G)(\[\d{1,3}G\])?(\((\d{1,3})\))?'
+BRKOUT_RE = re.compile(BRKOUT_PATTERN)
 
 
 #
@@ -39,8 +42,7 @@ def readJson(filename):
                 data = json.load(fp)
             except json.JSONDecodeError:
                 print("Json file does not exist")
-        data_dict = ast.literal_eval(json.dumps(data))
-        return data_dict
+        return to_str(data)
     except Exception as e:
         print("error occurred while parsing json:", sys.exc_info()[1])
         return None
@@ -49,7 +51,7 @@ def db_connect_configdb():
     """
     Connect to configdb
     """
-    config_db = ConfigDBConnector()
+    config_db = swsssdk.ConfigDBConnector()
     if config_db is None:
         return None
     try:
@@ -104,45 +106,190 @@ def get_hwsku_file_name(hwsku=None, platform=None):
             return candidate
     return None
 
-def get_port_config(hwsku=None, platform=None, port_config_file=None, hwsku_config_file=None, asic=None):
-    config_db = db_connect_configdb()
-    # If available, Read from CONFIG DB first
-    if config_db is not None and port_config_file is None:
-
-        port_data = config_db.get_table("PORT")
-        if bool(port_data):
-            ports = ast.literal_eval(json.dumps(port_data))
-            port_alias_map = {}
-            port_alias_asic_map = {}
-            for intf_name in ports.keys():
-                port_alias_map[ports[intf_name]["alias"]] = intf_name
-            return (ports, port_alias_map, port_alias_asic_map)
+def to_str(data):
+    """Return a copy of data, as read from a database or a json file, with str instead of unicode"""
+    if isinstance(data, dict):
+        return dict((to_str(key), to_str(value)) for key, value in data.items())
+    if isinstance(data, list):
+        return [to_str(item) for item in data]
+    if isinstance(data, unicode):
+        return data.encode('utf-8')
+    return data
+
+def copy_port_config(port_config):
+    """
+    Return a copy of a (ports, port_alias_map, port_alias_asic_map) the
+    caller can change, with dicts made in the order of the OrderedDicts of
+    read_port_config_file() so that they iterate as if the file was just
+    parsed
+    """
+    (ports, port_alias_map, port_alias_asic_map) = port_config
+    # dict(items) inserts the keys one by one, dict(OrderedDict) would not
+    return (dict((name, dict(port.items())) for name, port in ports.items()),
+            dict(port_alias_map.items()), dict(port_alias_asic_map.items()))
 
-    if not port_config_file:
-        port_config_file = get_port_config_file_name(hwsku, platform, asic)
-        if not port_config_file:
-            return ({}, {}, {})
 
+class PortConfigService(object):
+    """
+    The port config of the device, shared by the callers of a process.
+
+    The service holds one connection to config DB, the names of the port
+    config and hwsku files found for a hwsku and platform, and the port
+    tables parsed from the port_config.ini files, as the breakout engines
+    keep those of the platform.json files. A file is parsed again when its
+    mtime or size changes. A long-lived process can call watch_db() to keep
+    the PORT table of config DB while a keyspace notification subscription on
+    its keys is alive, and drop it on every notification received; otherwise
+    it is read on every call. The
+    results are copies the caller can change. Use get_port_config_service()
+    to share the service of the process.
+    """
+    def __init__(self, db_connect=db_connect_configdb):
+        self._db_connect = db_connect
+        self._lock = threading.Lock()
+        self._config_db = None
+        # (function, arguments) -> file name, of the get_*_file_name() lookups
+        self._file_names = {}
+        # port_config.ini -> (version, port config of read_port_config_file())
+        self._file_port_configs = {}
+        # PORT table of config DB, kept while watching
+        self._db_port_config = None
+        self._db_generation = 0
+        self._db_watch = False
+        self._db_watching = False
+
+    def _get_file_name(self, lookup, *args):
+        key = (lookup, args)
+        with self._lock:
+            file_name = self._file_names.get(key)
+        if file_name is None or not os.path.isfile(file_name):
+            file_name = lookup(*args)
+            if file_name is not None:
+                with self._lock:
+                    self._file_names[key] = file_name
+        return file_name
+
+    def get_port_config_file_name(self, hwsku=None, platform=None, asic=None):
+        """Return get_port_config_file_name(), looked up again only when the file found is removed"""
+        return self._get_file_name(get_port_config_file_name, hwsku, platform, asic)
+
+    def get_hwsku_file_name(self, hwsku=None, platform=None):
+        """Return get_hwsku_file_name(), looked up again only when the file found is removed"""
+        return self._get_file_name(get_hwsku_file_name, hwsku, platform)
+
+    def get_config_db(self):
+        """Return the connection to config DB, made on the first call that finds the database"""
+        with self._lock:
+            if self._config_db is None:
+                self._config_db = self._db_connect()
+                if self._config_db is not None and self._db_watch:
+                    self._start_watcher()
+            return self._config_db
+
+    def watch_db(self):
+        """Keep the PORT table of config DB between calls, watching its changes from a thread"""
+        with self._lock:
+            if not self._db_watch:
+                self._db_watch = True
+                if self._config_db is not None:
+                    self._start_watcher()
+
+    def _start_watcher(self):
+        watcher = threading.Thread(target=self._watch_db, args=(self._config_db,))
+        watcher.daemon = True
+        watcher.start()
+
+    def _watch_db(self, config_db):
+        try:
+            pubsub = config_db.get_redis_client(config_db.db_name).pubsub()
+            pubsub.psubscribe('__keyspace@{}__:PORT{}*'.format(config_db.get_dbid(config_db.db_name),
+                                                               config_db.TABLE_NAME_SEPARATOR))
+            self._db_watching = True
+            for message in pubsub.listen():
+                if message['type'] == 'pmessage':
+                    self._db_generation += 1
+                    self._db_port_config = None
+        except Exception:
+            pass
+        self._db_watching = False
+        self._db_port_config = None
+
+    def get_db_port_config(self):
+        """Return the port config of the PORT table of config DB, or None if it is empty or the database is not available"""
+        port_data = self._db_port_config
+        if port_data is None:
+            config_db = self.get_config_db()
+            if config_db is None:
+                return None
+            generation = self._db_generation
+            port_data = config_db.get_table("PORT")
+            if self._db_watching and generation == self._db_generation:
+                self._db_port_config = port_data
+        if not port_data:
+            return None
+        # The copy of the table the caller gets
+        ports = to_str(port_data)
+        port_alias_map = {}
+        for intf_name in ports.keys():
+            port_alias_map[ports[intf_name]["alias"]] = intf_name
+        return (ports, port_alias_map, {})
+
+    def get_file_port_config(self, port_config_file, hwsku_json_file=None):
+        """Return the port config of a port_config.ini, or of a platform.json with its hwsku.json"""
+        if port_config_file.endswith('.json'):
+            # The breakout engine of the files keeps the parsed ports
+            return parse_platform_json_file(hwsku_json_file, port_config_file)
+        version = get_file_version(port_config_file)
+        with self._lock:
+            cached = self._file_port_configs.get(port_config_file)
+        if cached is None or cached[0] != version:
+            cached = (version, read_port_config_file(port_config_file))
+            with self._lock:
+                self._file_port_configs[port_config_file] = cached
+        return copy_port_config(cached[1])
+
+    def get_port_config(self, hwsku=None, platform=None, port_config_file=None, hwsku_config_file=None, asic=None):
+        # If available, Read from CONFIG DB first
+        if port_config_file is None:
+            port_config = self.get_db_port_config()
+            if port_config is not None:
+                return port_config
 
-    # Read from 'platform.json' file
-    if port_config_file.endswith('.json'):
-        if not hwsku_config_file:
-             hwsku_json_file = get_hwsku_file_name(hwsku, platform)
-             if not hwsku_json_file:
+        if not port_config_file:
+            port_config_file = self.get_port_config_file_name(hwsku, platform, asic)
+            if not port_config_file:
                 return ({}, {}, {})
-        else:
-            hwsku_json_file = hwsku_config_file
 
-        return parse_platform_json_file(hwsku_json_file, port_config_file)
+        # Read from 'platform.json' file
+        if port_config_file.endswith('.json'):
+            hwsku_json_file = hwsku_config_file or self.get_hwsku_file_name(hwsku, platform)
+            if not hwsku_json_file:
+                return ({}, {}, {})
+            return self.get_file_port_config(port_config_file, hwsku_json_file)
 
-    # If 'platform.json' file is not available, read from 'port_config.ini'
-    else:
-        return parse_port_config_file(port_config_file)
+        # If 'platform.json' file is not available, read from 'port_config.ini'
+        return self.get_file_port_config(port_config_file)
+
+def get_port_config_service():
+    """Return the PortConfigService of the process"""
+    global _port_config_service
+    if _port_config_service is None:
+        _port_config_service = PortConfigService()
+    return _port_config_service
+
+_port_config_service = None
+
+def get_port_config(hwsku=None, platform=None, port_config_file=None, hwsku_config_file=None, asic=None):
+    return get_port_config_service().get_port_config(hwsku, platform, port_config_file, hwsku_config_file, asic)
 
 def parse_port_config_file(port_config_file):
-    ports = {}
-    port_alias_map = {}
-    port_alias_asic_map = {}
+    return copy_port_config(read_port_config_file(port_config_file))
+
+def read_port_config_file(port_config_file):
+    """Return the port config of a port_config.ini, in OrderedDicts in the order of the file"""
+    ports = OrderedDict()
+    port_alias_map = OrderedDict()
+    port_alias_asic_map = OrderedDict()
     # Default column definition
     titles = ['name', 'lanes', 'alias', 'index']
     with open(port_config_file) as data:
@@ -156,7 +303,7 @@ def parse_port_config_file(port_config_file):
                 continue
             name_index = titles.index('name')
             name = tokens[name_index]
-            data = {}
+            data = OrderedDict()
             for i, item in enumerate(tokens):
                 if i == name_index:
                     continue
@@ -174,63 +321,44 @@ def parse_port_config_file(port_config_file):
                 port_alias_asic_map[data['alias']] = data['asic_port_name'].strip()
     return (ports, port_alias_map, port_alias_asic_map)
 
-# Generate configs (i.e. alias, lanes, speed, index) for port
-def gen_port_config(ports, parent_intf_id, index, alias_at_lanes, lanes, k,  offset):
-    if k is not None:
-        num_lane_used, speed, alt_speed, _ , assigned_lane = k[0], k[1], k[2], k[3], k[4]
-
-        # In case of symmetric mode
-        if assigned_lane is None:
-            assigned_lane = len(lanes.split(","))
-
-        parent_intf_id = int(offset)+int(parent_intf_id)
-        alias_start = 0 + offset
-
-        step = int(assigned_lane)//int(num_lane_used)
-        for i in range(0,int(assigned_lane), step):
-            intf_name = PORT_STR + str(parent_intf_id)
-            ports[intf_name] = {}
-            ports[intf_name]['alias'] = alias_at_lanes.split(",")[alias_start]
-            ports[intf_name]['lanes'] = ','.join(lanes.split(",")[alias_start:alias_start+step])
-            if speed:
-                speed_pat = re.search("^((\d+)G|\d+)$", speed.upper())
-                if speed_pat is None:
-                    raise Exception('{} speed is not Supported...'.format(speed))
-                speed_G, speed_orig = speed_pat.group(2), speed_pat.group(1)
-                if speed_G:
-                    conv_speed = int(speed_G)*1000
-                else:
-                    conv_speed = int(speed_orig)
-                ports[intf_name]['speed'] = str(conv_speed)
-            else:
-                raise Exception('Regex return for speed is None...')
-
-            ports[intf_name]['index'] = index.split(",")[alias_start]
-            ports[intf_name]['admin_status'] = "up"
-
-            parent_intf_id += step
-            alias_start += step
-
-        offset = int(assigned_lane) + int(offset)
-        return offset
-    else:
-        raise Exception('Regex return for k is None...')
-
-"""
-Given a port and breakout mode, this method returns
-the list of child ports using platform_json file
-"""
-def get_child_ports(interface, breakout_mode, platform_json_file):
-    child_ports = {}
-
-    port_dict = readJson(platform_json_file)
-
-    index = port_dict[INTF_KEY][interface]['index']
-    alias_at_lanes = port_dict[INTF_KEY][interface]['alias_at_lanes']
-    lanes = port_dict[INTF_KEY][interface]['lanes']
+def get_file_version(filename):
+    try:
+        st = os.stat(filename)
+    except (OSError, TypeError):
+        return None
+    return (st.st_mtime, st.st_size)
 
+def load_json_file(filename):
+    """Return readJson(filename), parsed again only when the file changes"""
+    version = get_file_version(filename)
+    if version is None:
+        return None
+    cached = _json_files.get(filename)
+    if cached is None or cached[0] != version:
+        cached = (version, readJson(filename))
+        _json_files[filename] = cached
+    return cached[1]
+
+# file name -> (version, content) of load_json_file()
+_json_files = {}
+
+
+def parse_speed(speed):
+    speed_pat = re.search("^((\d+)G|\d+)$", speed.upper())
+    if speed_pat is None:
+        raise Exception('{} speed is not Supported...'.format(speed))
+    speed_G, speed_orig = speed_pat.group(2), speed_pat.group(1)
+    if speed_G:
+        return str(int(speed_G)*1000)
+    return str(int(speed_orig))
+
+def compile_breakout_mode(breakout_mode, num_lanes):
     """
-    Example of match_list for some breakout_mode using regex
+    Return the layout of the child ports of a breakout mode on a port of
+    num_lanes lanes, a list of (first lane, number of lanes, speed) with the
+    lanes counted from the first one of the port.
+
+    Example of the parts of some breakout modes, matched by BRKOUT_PATTERN
         Breakout Mode -------> Match_list
         -----------------------------
         2x25G(2)+1x50G(2) ---> [('2', '25G', None, '(2)', '2'), ('1', '50G', None, '(2)', '2')]
@@ -238,49 +366,150 @@ def get_child_ports(interface, breakout_mode, platform_json_file):
         1x100G[40G] ---------> [('1', '100G', '[40G]', None, None)]
         2x50G ---------------> [('2', '50G', None, None, None)]
     """
-    # Asymmetric breakout mode
-    if re.search("\+",breakout_mode) is not None:
-        breakout_parts = breakout_mode.split("+")
-        match_list = [re.match(BRKOUT_PATTERN, i).groups() for i in breakout_parts]
-
-    # Symmetric breakout mode
-    else:
-        match_list = [re.match(BRKOUT_PATTERN, breakout_mode).groups()]
-
+    key = (breakout_mode, num_lanes)
+    if key in _mode_layouts:
+        return _mode_layouts[key]
+    layout = []
     offset = 0
-    parent_intf_id = int(re.search("Ethernet(\d+)", interface).group(1))
-    for k in match_list:
-        offset = gen_port_config(child_ports, parent_intf_id, index, alias_at_lanes, lanes, k, offset)
-    return child_ports
+    # Asymmetric breakout modes have several parts joined with '+'
+    for part in breakout_mode.split("+"):
+        match = BRKOUT_RE.match(part)
+        if match is None:
+            raise Exception('{} breakout mode is not Supported...'.format(breakout_mode))
+        num_lane_used, speed, _, _, assigned_lane = match.groups()
 
-def parse_platform_json_file(hwsku_json_file, platform_json_file):
-    ports = {}
-    port_alias_map = {}
-    port_alias_asic_map = {}
+        # In case of symmetric mode
+        if assigned_lane is None:
+            assigned_lane = num_lanes
 
-    port_dict = readJson(platform_json_file)
-    hwsku_dict = readJson(hwsku_json_file)
+        step = int(assigned_lane)//int(num_lane_used)
+        speed = parse_speed(speed)
+        for i in range(0, int(assigned_lane), step):
+            layout.append((offset + i, step, speed))
+        offset += int(assigned_lane)
+    _mode_layouts[key] = layout
+    return layout
 
-    if not port_dict:
-        raise Exception("port_dict is none")
-    if not hwsku_dict:
-        raise Exception("hwsku_dict is none")
+# (breakout mode, number of lanes) -> layout of compile_breakout_mode()
+_mode_layouts = {}
 
-    if INTF_KEY not in port_dict or INTF_KEY not in  hwsku_dict:
-        raise Exception("INTF_KEY is not present in appropriate file")
 
-    for intf in port_dict[INTF_KEY]:
-        if intf not in hwsku_dict[INTF_KEY]:
-            raise Exception("{} is not available in hwsku_dict".format(intf))
+class BreakoutEngine(object):
+    """
+    The breakout modes of the ports of a platform.json, and the default ones
+    of a hwsku.json, each file parsed once.
 
-        # take default_brkout_mode from hwsku.json
-        brkout_mode = hwsku_dict[INTF_KEY][intf][BRKOUT_MODE]
+    The child ports of every breakout mode a parent port supports are
+    computed when the engine is built, the other modes on their first use,
+    so that expanding all the ports or breaking one out is a lookup. Use
+    get_breakout_engine() to share the engine of the same files.
+    """
+    def __init__(self, platform_json_file, hwsku_json_file=None):
+        port_dict = load_json_file(platform_json_file)
+        if not port_dict:
+            raise Exception("port_dict is none")
+        if INTF_KEY not in port_dict:
+            raise Exception("INTF_KEY is not present in appropriate file")
+        self._hwsku_json_file = hwsku_json_file
+        self._parents = {}
+        self._supported_modes = {}
+        # (parent port, breakout mode) -> child ports
+        self._child_ports = {}
+        for intf, attrs in port_dict[INTF_KEY].items():
+            self._parents[intf] = {
+                'id': int(re.search("Ethernet(\d+)", intf).group(1)),
+                'index': attrs['index'].split(","),
+                'lanes': attrs['lanes'].split(","),
+                'aliases': attrs['alias_at_lanes'].split(","),
+            }
+            self._supported_modes[intf] = attrs.get('breakout_modes', '').split(",")
+            for mode in self._supported_modes[intf]:
+                try:
+                    self._child_ports[(intf, mode)] = self._expand(intf, mode)
+                except Exception:
+                    # Only fail if the mode is used
+                    pass
+        self._default_modes = None
+
+    def _expand(self, interface, breakout_mode):
+        parent = self._parents[interface]
+        child_ports = {}
+        for (first, count, speed) in compile_breakout_mode(breakout_mode, len(parent['lanes'])):
+            child_ports[PORT_STR + str(parent['id'] + first)] = {
+                'alias': parent['aliases'][first],
+                'lanes': ','.join(parent['lanes'][first:first+count]),
+                'speed': speed,
+                'index': parent['index'][first],
+                'admin_status': "up",
+            }
+        return child_ports
+
+    def get_parent_ports(self):
+        return self._parents.keys()
+
+    def get_supported_modes(self, interface):
+        return self._supported_modes[interface]
+
+    def is_valid_mode(self, interface, breakout_mode):
+        """Return True if the platform supports breakout_mode on the parent port interface"""
+        return breakout_mode in self._supported_modes.get(interface, ())
+
+    def get_child_ports(self, interface, breakout_mode):
+        """Return the configs (alias, lanes, speed, index) of the child ports
+        of interface in breakout_mode, by port name; they are copies the
+        caller can change"""
+        key = (interface, breakout_mode)
+        if key not in self._child_ports:
+            self._child_ports[key] = self._expand(interface, breakout_mode)
+        return dict((name, dict(port)) for name, port in self._child_ports[key].items())
+
+    def get_default_modes(self):
+        """Return the default breakout mode of every port of the hwsku.json"""
+        if self._default_modes is None:
+            hwsku_dict = load_json_file(self._hwsku_json_file) if self._hwsku_json_file else None
+            if not hwsku_dict:
+                raise Exception("hwsku_dict is none")
+            if INTF_KEY not in hwsku_dict:
+                raise Exception("INTF_KEY is not present in appropriate file")
+            self._default_modes = dict((intf, attrs[BRKOUT_MODE]) for intf, attrs in hwsku_dict[INTF_KEY].items())
+        return self._default_modes
+
+    def get_default_ports(self):
+        """Return the child ports of every parent port in its default breakout mode"""
+        default_modes = self.get_default_modes()
+        ports = {}
+        for intf in self._parents:
+            if intf not in default_modes:
+                raise Exception("{} is not available in hwsku_dict".format(intf))
+            ports.update(self.get_child_ports(intf, default_modes[intf]))
+        if not ports:
+            raise Exception("Ports dictionary is empty")
+        return ports
+
+def get_breakout_engine(platform_json_file, hwsku_json_file=None):
+    """Return the BreakoutEngine of the files, built again only when one of them changes"""
+    key = (platform_json_file, hwsku_json_file)
+    versions = (get_file_version(platform_json_file), get_file_version(hwsku_json_file))
+    cached = _breakout_engines.get(key)
+    if cached is None or cached[0] != versions:
+        cached = (versions, BreakoutEngine(platform_json_file, hwsku_json_file))
+        _breakout_engines[key] = cached
+    return cached[1]
+
+_breakout_engines = {}
 
-        child_ports = get_child_ports(intf, brkout_mode, platform_json_file)
-        ports.update(child_ports)
+"""
+Given a port and breakout mode, this method returns
+the list of child ports using platform_json file
+"""
+def get_child_ports(interface, breakout_mode, platform_json_file):
+    return get_breakout_engine(platform_json_file).get_child_ports(interface, breakout_mode)
+
+def parse_platform_json_file(hwsku_json_file, platform_json_file):
+    port_alias_map = {}
+    port_alias_asic_map = {}
 
-    if not ports:
-        raise Exception("Ports dictionary is empty")
+    ports = get_breakout_engine(platform_json_file, hwsku_json_file).get_default_ports()
 
     for i in ports.keys():
         port_alias_map[ports[i]["alias"]]= i
@@ -288,12 +517,13 @@ def parse_platform_json_file(hwsku_json_file, platform_json_file):
 
 
 def get_breakout_mode(hwsku=None, platform=None, port_config_file=None):
+    service = get_port_config_service()
     if not port_config_file:
-        port_config_file = get_port_config_file_name(hwsku, platform)
+        port_config_file = service.get_port_config_file_name(hwsku, platform)
         if not port_config_file:
             return None
     if port_config_file.endswith('.json'):
-        hwsku_json_file = get_hwsku_file_name(hwsku, platform)
+        hwsku_json_file = service.get_hwsku_file_name(hwsku, platform)
         if not hwsku_json_file:
             raise Exception("'hwsku_json' file does not exist!!! This file is necessary to proceed forward.")
 
@@ -303,7 +533,7 @@ def get_breakout_mode(hwsku=None, platform=None, port_config_file=None):
 
 def parse_breakout_mode(hwsku_json_file):
     brkout_table = {}
-    hwsku_dict = readJson(hwsku_json_file)
+    hwsku_dict = load_json_file(hwsku_json_file)
     if not hwsku_dict:
         raise Exception("hwsku_dict is empty")
     if INTF_KEY not in  hwsku_dict:
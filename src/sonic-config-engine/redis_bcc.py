@@ -1,26 +1,171 @@
+"""redis_bcc.py
+
+Bytecode caches for the jinja2 templates rendered by sonic-cfggen.
+
+TieredBytecodeCache looks compiled templates up in three tiers, fastest first:
+an LRU in the memory of the process, a directory of bytecode files that is
+filled when the image is built (sonic-cfggen --compile-templates), then the
+JINJA2_CACHE hash of STATE_DB. Entries are keyed by the jinja2 version, the
+template and the checksum of its source, so an edited template or a jinja2
+upgrade never loads stale code. Redis is only connected to on a miss of the
+first two tiers, so templates rendered before the database container runs
+are still served from the disk.
+"""
+
+import base64
+import os
+import tempfile
+from collections import OrderedDict
+
 import jinja2
 
-class RedisBytecodeCache(jinja2.BytecodeCache):
-    """ A bytecode cache for jinja2 template that stores bytecode in Redis """
+BYTECODE_DIR = '/var/cache/sonic-cfggen/bytecode'
+BYTECODE_DIR_ENV = 'SONIC_CFGGEN_BYTECODE_DIR'
+MAX_MEMORY_ENTRIES = 256
+MAX_DISK_BYTES = 64 * 1024 * 1024
+MAX_REDIS_ENTRIES = 1024
+
+# Compiled templates of this process, shared by all jinja2 environments
+_memory = OrderedDict()
+
+# Hits per tier and misses of all the TieredBytecodeCache of this process
+stats = {'memory': 0, 'disk': 0, 'redis': 0, 'miss': 0}
+
+
+def get_bytecode_dir():
+    """Return the bytecode directory, or None if it is disabled with an empty SONIC_CFGGEN_BYTECODE_DIR"""
+    return os.environ.get(BYTECODE_DIR_ENV, BYTECODE_DIR) or None
+
+def format_stats():
+    return 'jinja2 bytecode cache: {memory} memory hits, {disk} disk hits, {redis} redis hits, {miss} misses'.format(**stats)
+
+
+class TieredBytecodeCache(jinja2.BytecodeCache):
+    """ A bytecode cache for jinja2 template looking up memory, then disk, then Redis """
 
     REDIS_HASH = 'JINJA2_CACHE'
 
-    def __init__(self, client):
-        self._client = client
-        try:
-            self._client.connect(self._client.STATE_DB, retry_on=False)
-        except Exception:
-            self._client = None
+    def __init__(self, get_client=None, directory=None):
+        """get_client returns a SonicV2Connector, it is called and connected to
+        on the first Redis lookup so that swsssdk is only imported then"""
+        self._get_client = get_client
+        self._client = None
+        self._connected = False
+        self._directory = directory if directory is not None else get_bytecode_dir()
+
+    @staticmethod
+    def get_key(bucket):
+        return '{}-{}-{}'.format(jinja2.__version__, bucket.key, bucket.checksum)
 
     def load_bytecode(self, bucket):
-        if self._client is None:
+        key = self.get_key(bucket)
+        code = _memory.pop(key, None)
+        tier = 'memory'
+        if code is None:
+            code = self._load_file(key)
+            tier = 'disk'
+        if code is None:
+            code = self._load_redis(key)
+            tier = 'redis'
+            if code is not None:
+                self._store_file(key, code)
+        if code is None:
+            stats['miss'] += 1
             return
-        code = self._client.get(self._client.STATE_DB, self.REDIS_HASH, bucket.key)
-        if code is not None:
-            bucket.bytecode_from_string(code)
+        stats[tier] += 1
+        self._remember(key, code)
+        bucket.bytecode_from_string(code)
 
     def dump_bytecode(self, bucket):
-        if self._client is None:
+        key = self.get_key(bucket)
+        code = bucket.bytecode_to_string()
+        self._remember(key, code)
+        self._store_file(key, code)
+        self._store_redis(key, code)
+
+    def _remember(self, key, code):
+        _memory[key] = code
+        while len(_memory) > MAX_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+    def _file_path(self, key):
+        return os.path.join(self._directory, key + '.cache')
+
+    def _load_file(self, key):
+        if self._directory is None:
+            return None
+        try:
+            with open(self._file_path(key), 'rb') as f:
+                return f.read()
+        except (IOError, OSError):
+            return None
+
+    def _store_file(self, key, code):
+        """Save a bytecode file, silently giving up if the directory is not writable"""
+        if self._directory is None:
             return
-        self._client.set(self._client.STATE_DB, self.REDIS_HASH, bucket.key, bucket.bytecode_to_string())
+        try:
+            if not os.path.isdir(self._directory):
+                os.makedirs(self._directory)
+            (fd, tmp_path) = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        except (IOError, OSError):
+            return
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(code)
+            os.rename(tmp_path, self._file_path(key))
+            self._evict_files()
+        except (IOError, OSError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _evict_files(self):
+        """Remove the oldest bytecode files beyond MAX_DISK_BYTES"""
+        entries = []
+        for name in os.listdir(self._directory):
+            if name.endswith('.cache'):
+                path = os.path.join(self._directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= MAX_DISK_BYTES:
+                break
+            os.remove(path)
+            total -= size
 
+    def _redis(self):
+        if self._get_client is not None and not self._connected:
+            self._connected = True
+            try:
+                self._client = self._get_client()
+                self._client.connect(self._client.STATE_DB, retry_on=False)
+            except Exception:
+                self._client = None
+        if self._client is None:
+            return None
+        return self._client.get_redis_client(self._client.STATE_DB)
+
+    def _load_redis(self, key):
+        redis = self._redis()
+        if redis is None:
+            return None
+        try:
+            code = redis.hget(self.REDIS_HASH, key)
+            return base64.b64decode(code) if code is not None else None
+        except Exception:
+            return None
+
+    def _store_redis(self, key, code):
+        redis = self._redis()
+        if redis is None:
+            return
+        try:
+            # Old entries are never looked up again once a template changes,
+            # so the whole hash is dropped when it gets full. The bytecode is
+            # base64 encoded as the connections decode the replies as text.
+            if redis.hlen(self.REDIS_HASH) >= MAX_REDIS_ENTRIES:
+                redis.delete(self.REDIS_HASH)
+            redis.hset(self.REDIS_HASH, key, base64.b64encode(code))
+        except Exception:
+            pass
@@ -0,0 +1,105 @@
+"""render_manifest.py
+
+Writes of rendered templates that leave a target file alone when its content
+would not change, so that the scripts applying a configuration can skip
+restarting the service using it. A changed file is replaced atomically with a
+rename. A manifest keeps the SHA-256, size and mtime of the last content
+written to every target, so an unchanged target is recognized from its stat
+without reading it back. A target modified behind the manifest's back has
+another size or mtime, and is then compared by content.
+"""
+
+import hashlib
+import json
+import os
+import stat
+import tempfile
+
+MANIFEST_FILE = '/var/cache/sonic-cfggen/rendered.json'
+MANIFEST_FILE_ENV = 'SONIC_CFGGEN_MANIFEST'
+
+
+def get_manifest_file():
+    """Return the manifest file, or None if it is disabled with an empty SONIC_CFGGEN_MANIFEST"""
+    return os.environ.get(MANIFEST_FILE_ENV, MANIFEST_FILE) or None
+
+def load_manifest():
+    """Return the manifest as a dict of target path -> {'sha256', 'size', 'mtime'}"""
+    manifest_file = get_manifest_file()
+    if manifest_file is None:
+        return {}
+    try:
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+def save_manifest(manifest):
+    """Save the manifest, silently giving up if its directory is not writable"""
+    manifest_file = get_manifest_file()
+    if manifest_file is None:
+        return
+    try:
+        _write_atomic(manifest_file, json.dumps(manifest, indent=4, sort_keys=True), 0o644)
+    except (IOError, OSError):
+        pass
+
+def _file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def _current_sha256(path, manifest):
+    """Return the SHA-256 of the content of path, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    entry = manifest.get(path)
+    if entry is not None and entry.get('size') == st.st_size and entry.get('mtime') == st.st_mtime:
+        return entry.get('sha256')
+    try:
+        return _file_sha256(path)
+    except (IOError, OSError):
+        return None
+
+def _write_atomic(path, content, default_mode):
+    """Replace path with content through a rename, keeping the mode of the file it replaces"""
+    directory = os.path.dirname(path) or '.'
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        mode = default_mode
+    (fd, tmp_path) = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(tmp_path, mode)
+        os.rename(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_if_changed(path, content, manifest):
+    """Write content to path unless path already holds it. Returns whether path was written.
+
+    manifest is the dict returned by load_manifest(), updated in place.
+    """
+    path = os.path.abspath(path)
+    if isinstance(content, unicode):
+        content = content.encode('utf-8')
+    sha256 = hashlib.sha256(content).hexdigest()
+    changed = _current_sha256(path, manifest) != sha256
+    if changed:
+        umask = os.umask(0)
+        os.umask(umask)
+        _write_atomic(path, content, 0o666 & ~umask)
+    st = os.stat(path)
+    manifest[path] = {'sha256': sha256, 'size': st.st_size, 'mtime': st.st_mtime}
+    return changed
@@ -7,7 +7,7 @@ import glob
 
 def get_test_suite():
       test_loader = unittest.TestLoader()
-      test_suite = test_loader.discover('tests', pattern='*.py')
+      test_suite = test_loader.discover('tests', pattern='*.py', top_level_dir='.')
       return test_suite
 
 setup(name='sonic-config-engine',
@@ -16,8 +16,8 @@ setup(name='sonic-config-engine',
       author='Taoyu Li',
       author_email='taoyl@microsoft.com',
       url='https://github.com/Azure/sonic-buildimage',
-      py_modules=['portconfig', 'minigraph', 'openconfig_acl', 'sonic_device_util', 'config_samples', 'redis_bcc', 'lazy_re'],
-      scripts=['sonic-cfggen'],
+      py_modules=['portconfig', 'minigraph', 'openconfig_acl', 'sonic_device_util', 'config_samples', 'redis_bcc', 'lazy_re', 'lazy_import', 'cfggen_profile', 'configdb_snapshot', 'configdb_delta', 'data_cache', 'render_manifest', 'sonic_cfggen', 'minigraph_delta', 'ordered_table', 'template_filters', 'buffer_calculator'],
+      scripts=['sonic-cfggen', 'sonic-cfggen-client'],
       install_requires=['lxml', 'jinja2>=2.10', 'netaddr', 'ipaddr', 'pyyaml', 'pyangbind==0.6.0'],
       test_suite='setup.get_test_suite',
       data_files=[
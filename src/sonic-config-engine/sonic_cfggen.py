@@ -0,0 +1,1018 @@
+#!/usr/bin/env python
+"""sonic_cfggen.py
+
+The implementation of sonic-cfggen, which reads SONiC config data from one or
+more of a minigraph file, config DB, json and yaml files and command line
+input, and writes it into DB, prints it as json or renders jinja2 templates
+with it. See the sonic-cfggen script for the command line.
+
+Python programs can get the same results without running the script:
+
+    import sonic_cfggen
+    hwsku = sonic_cfggen.generate(from_db=True, expr="DEVICE_METADATA['localhost']['hwsku']")
+    text = sonic_cfggen.generate(minigraph='/etc/sonic/minigraph.xml', template='/usr/share/sonic/templates/lldpd.conf.j2')
+
+or build the data once and reuse it, along with the jinja2 environments kept
+by the module:
+
+    data = sonic_cfggen.load_data(sonic_cfggen.get_sources(from_db=True, platform_info=True))
+    for template_file in template_files:
+        text = sonic_cfggen.render(template_file, data)
+
+The data is layered the way the command line options are, see load_data().
+"""
+
+from __future__ import print_function
+
+import sys
+import os
+import os.path
+import argparse
+import copy
+import imp
+import pipes
+import re
+import threading
+import traceback
+import json
+from collections import OrderedDict
+from StringIO import StringIO
+
+# The heavy modules are only imported by the invocations that use them, see lazy_import.py
+import cfggen_profile
+import lazy_import
+import ordered_table
+import template_filters
+jinja2 = lazy_import.module('jinja2')
+jinja2_meta = lazy_import.module('jinja2.meta')
+multiprocessing = lazy_import.module('multiprocessing')
+natsort = lazy_import.module('natsort')
+socket = lazy_import.module('socket')
+swsssdk = lazy_import.module('swsssdk')
+yaml = lazy_import.module('yaml')
+buffer_calculator = lazy_import.module('buffer_calculator')
+config_samples = lazy_import.module('config_samples')
+configdb_delta = lazy_import.module('configdb_delta')
+configdb_snapshot = lazy_import.module('configdb_snapshot')
+data_cache = lazy_import.module('data_cache')
+minigraph = lazy_import.module('minigraph')
+portconfig = lazy_import.module('portconfig')
+redis_bcc = lazy_import.module('redis_bcc')
+render_manifest = lazy_import.module('render_manifest')
+sonic_device_util = lazy_import.module('sonic_device_util')
+
+CFGGEN_SERVER_SOCKET = '/var/run/sonic-cfggen.sock'
+# Seconds the server waits for a client to send its request or read the reply
+CFGGEN_SERVER_TIMEOUT = 10
+
+# Exit status of --if-changed when no output file changed
+UNCHANGED_EXIT_CODE = 3
+
+# Set when running as 'sonic-cfggen --server', see serve()
+config_db_cache = None
+
+# Phase timings of the current main() call, see cfggen_profile.py
+profiler = cfggen_profile.Profiler()
+
+# Jinja2 environments by template search paths, shared by all renders in a process
+jinja2_envs = {}
+
+# Data rendered by template worker processes, see render_templates()
+render_data = None
+
+EXPORT_NAME_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+def sort_by_port_index(value):
+    if not value:
+        return
+    if isinstance(value, list):
+        value.sort(key = lambda k: int(k[8:]))
+
+# The ip prefix filters are shared with bgpcfgd, see template_filters.py
+is_ipv4 = template_filters.is_ipv4
+is_ipv6 = template_filters.is_ipv6
+prefix_attr = template_filters.prefix_attr
+pfx_filter = template_filters.pfx_filter
+ip_network = template_filters.ip_network
+
+def unique_name(l):
+    name_list = []
+    new_list = []
+    for item in l:
+        if item['name'] not in name_list:
+            name_list.append(item['name'])
+            new_list.append(item)
+    return new_list
+
+class minigraph_encoder(json.JSONEncoder):
+    """minigraph.minigraph_encoder, importing minigraph only for data that
+    holds the ip address objects of its parsers"""
+    def default(self, obj):
+        return minigraph.minigraph_encoder().default(obj)
+
+class FormatConverter:
+    """Convert config DB based schema to legacy minigraph based schema for backward capability.
+We will move to DB schema and remove this class when the config templates are modified.
+
+TODO(taoyl): Current version of config db only supports BGP admin states.
+    All other configuration are still loaded from minigraph. Plan to remove
+    minigraph and move everything into config db in a later commit.
+    """
+    @staticmethod
+    def db_to_output(db_data):
+        return db_data
+
+    @staticmethod
+    def output_to_db(output_data):
+        db_data = {}
+        for table_name in output_data:
+            if table_name[0].isupper():
+                db_data[table_name] = output_data[table_name]
+        return db_data
+
+    @staticmethod
+    def is_table(data):
+        """Tell if data is a dict to_serialized() converts, the tables of sort_data() included"""
+        return type(data) is dict or type(data) is ordered_table.OrderedTable
+
+    @staticmethod
+    def to_serialized(data, lookup_key = None):
+        if FormatConverter.is_table(data):
+            data = OrderedDict(ordered_table.natural_items(data))
+
+            if lookup_key != None:
+                newData = {}
+                for key in data.keys():
+                    if FormatConverter.key_matches(key, lookup_key):
+                        newData[configdb_snapshot.serialize_key(key)] = data.pop(key)
+                        break
+                return newData
+
+            for key in data.keys():
+                new_key = configdb_snapshot.serialize_key(key)
+                if new_key != key:
+                    data[new_key] = data.pop(key)
+                data[new_key] = FormatConverter.to_serialized(data[new_key])
+        return data
+
+    @staticmethod
+    def iter_serialized(data, lookup_key=None, level=0):
+        """Yield the chunks of json.dumps(FormatConverter.to_serialized(data, lookup_key), indent=4),
+        walking the tables one entry at a time instead of converting a copy of data"""
+        if lookup_key is not None:
+            if FormatConverter.is_table(data):
+                # The first match in natural order, like to_serialized()
+                match = next(((configdb_snapshot.serialize_key(key), value)
+                              for key, value in ordered_table.natural_items(data)
+                              if FormatConverter.key_matches(key, lookup_key)), None)
+                data = dict([match]) if match is not None else {}
+            yield json.dumps(data, indent=4, cls=minigraph_encoder)
+            return
+        if type(data) is str or type(data) is unicode:
+            # What json.dumps() returns for a string
+            yield json.encoder.encode_basestring_ascii(data)
+            return
+        if not FormatConverter.is_table(data):
+            # Only dicts are converted, the rest is printed as it is
+            yield json.dumps(data, indent=4, cls=minigraph_encoder).replace('\n', '\n' + ' ' * 4 * level)
+            return
+        if not data:
+            yield '{}'
+            return
+        # The order of to_serialized(): natural sort, then the renamed keys moved to the end
+        items = ordered_table.natural_items(data)
+        kept = []
+        moved = []
+        for key, value in items:
+            new_key = configdb_snapshot.serialize_key(key)
+            (kept if new_key == key else moved).append((new_key, value))
+        entries = kept + moved
+        if moved and len(set(key for (key, _) in entries)) < len(entries):
+            # A renamed key is also a key of data, replay the moves of to_serialized()
+            entries = OrderedDict(items)
+            for key in entries.keys():
+                new_key = configdb_snapshot.serialize_key(key)
+                if new_key != key:
+                    entries[new_key] = entries.pop(key)
+            entries = entries.items()
+        newline_indent = '\n' + ' ' * 4 * (level + 1)
+        separator = '{' + newline_indent
+        for key, value in entries:
+            yield separator + json.encoder.encode_basestring_ascii(key) + ': '
+            for chunk in FormatConverter.iter_serialized(value, level=level + 1):
+                yield chunk
+            # The item separator of the json module of Python 2 with an indent
+            separator = ', ' + newline_indent
+        yield '\n' + ' ' * 4 * level + '}'
+
+    @staticmethod
+    def key_matches(key, lookup_key):
+        return (type(key) is unicode and lookup_key == key) or (type(key) is tuple and lookup_key in key)
+
+    @staticmethod
+    def to_deserialized(data):
+        for table in data:
+            if type(data[table]) is dict:
+                for key in data[table].keys():
+                    new_key = configdb_snapshot.deserialize_key(key)
+                    if new_key != key:
+                        data[table][new_key] = data[table].pop(key)
+        return data
+
+
+def print_serialized(data, lookup_key=None, stream=None, buffer_size=65536):
+    """Print data like print(json.dumps(FormatConverter.to_serialized(data, lookup_key), indent=4)),
+    without changing data, in writes of about buffer_size bytes"""
+    if stream is None:
+        stream = sys.stdout
+    chunks = []
+    size = 0
+    for chunk in FormatConverter.iter_serialized(data, lookup_key):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            stream.write(''.join(chunks))
+            chunks = []
+            size = 0
+    chunks.append('\n')
+    stream.write(''.join(chunks))
+
+
+def deep_update(dst, src):
+    for key, value in src.iteritems():
+        if isinstance(value, dict):
+             node = dst.setdefault(key, {})
+             deep_update(node, value)
+        else:
+             dst[key] = value
+    return dst
+
+def sort_data(data):
+    """Make the tables of data iterate their keys in natural order, see ordered_table.py"""
+    for table in data:
+        if type(data[table]) is dict:
+            data[table] = ordered_table.OrderedTable(data[table])
+    return data
+
+
+def parse_export(value):
+    """Split a NAME=EXPR argument of --export"""
+    name, sep, expr = value.partition('=')
+    if not sep or not expr or not EXPORT_NAME_PATTERN.match(name):
+        raise argparse.ArgumentTypeError("'%s' is not in NAME=EXPR form" % value)
+    return (name, expr)
+
+def render_exports(exports, data):
+    """Render each (name, jinja2 expression) pair the same way -v does.
+
+    An expression that dereferences a missing table or key gives an empty
+    value instead of failing the whole batch.
+    """
+    values = OrderedDict()
+    for name, expr in exports:
+        try:
+            values[name] = jinja2.Template('{{' + expr + '}}').render(data)
+        except jinja2.UndefinedError:
+            values[name] = ''
+    return values
+
+def parse_template(value):
+    """Split a TEMPLATE[,OUTPUT] argument of -t, no OUTPUT means stdout"""
+    template_file, _, output_file = value.partition(',')
+    return (os.path.abspath(template_file), output_file or None)
+
+def get_bytecode_cache_client():
+    return swsssdk.SonicV2Connector(host='127.0.0.1')
+
+def get_jinja2_env(paths):
+    paths = tuple(paths)
+    if paths not in jinja2_envs:
+        loader = jinja2.FileSystemLoader(paths)
+
+        bytecode_cache = redis_bcc.TieredBytecodeCache(get_bytecode_cache_client)
+        env = jinja2.Environment(loader=loader, trim_blocks=True, bytecode_cache=bytecode_cache)
+        env.filters['sort_by_port_index'] = sort_by_port_index
+        env.filters['unique_name'] = unique_name
+        env.filters.update(template_filters.get_filters())
+        env.globals.update(buffer_calculator.get_globals())
+        jinja2_envs[paths] = env
+    return jinja2_envs[paths]
+
+def get_template_env(template_file, template_dir):
+    paths = ['/', '/usr/share/sonic/templates', os.path.dirname(template_file)]
+    if template_dir is not None:
+        paths.append(os.path.abspath(template_dir))
+    return get_jinja2_env(paths)
+
+def render_template(template_file, template_dir, data):
+    template = get_template_env(template_file, template_dir).get_template(template_file)
+    return template.render(data)
+
+def compile_templates(template_dir):
+    """Fill the bytecode cache with every template under template_dir, by the absolute
+    name -t loads it with and by the relative name other templates include it with."""
+    count = 0
+    for root, _, files in os.walk(template_dir):
+        for name in sorted(files):
+            if not name.endswith('.j2'):
+                continue
+            template_file = os.path.join(os.path.abspath(root), name)
+            env = get_template_env(template_file, template_dir)
+            try:
+                env.get_template(template_file)
+                env.get_template(os.path.relpath(template_file, os.path.abspath(template_dir)))
+            except jinja2.TemplateError as e:
+                print('Warning: cannot compile %s: %s' % (template_file, e), file=sys.stderr)
+                continue
+            count += 1
+    return count
+
+def find_template_variables(env, template_name, seen=None):
+    """Return the top level variables a template and the templates it includes,
+    imports or extends refer to, or None if that cannot be told statically.
+    """
+    if seen is None:
+        seen = set()
+    seen.add(template_name)
+    try:
+        source = env.loader.get_source(env, template_name)[0]
+    except jinja2.TemplateNotFound:
+        # Rendering either fails on it or ignores it, no data is read from it
+        return set()
+    try:
+        ast = env.parse(source)
+        names = jinja2_meta.find_undeclared_variables(ast)
+    except jinja2.TemplateError:
+        # Leave it to rendering to report the error
+        return None
+    for referenced in jinja2_meta.find_referenced_templates(ast):
+        if referenced is None:
+            return None
+        if referenced in seen:
+            continue
+        referenced_names = find_template_variables(env, referenced, seen)
+        if referenced_names is None:
+            return None
+        names |= referenced_names
+    return names
+
+def find_expression_variables(expr):
+    return jinja2_meta.find_undeclared_variables(jinja2.Environment().parse('{{' + expr + '}}'))
+
+def find_output_tables(template_files, template_dir, exprs):
+    """Return the names of the config DB tables the templates and jinja2
+    expressions can refer to, or None if they can refer to any of them.
+    """
+    tables = set()
+    for template_file in template_files:
+        env = get_template_env(template_file, template_dir)
+        template_tables = find_template_variables(env, template_file)
+        if template_tables is None:
+            return None
+        tables |= template_tables
+    for expr in exprs:
+        tables |= find_expression_variables(expr)
+    return tables
+
+def find_needed_tables(args):
+    """Return the names of the config DB tables the requested output can
+    depend on, or None if it can depend on any of them.
+    """
+    if args.write_to_db or args.print_data or args.preset is not None:
+        return None
+    exprs = [expr for _, expr in args.export or []]
+    if args.var is not None:
+        exprs.append(args.var)
+    tables = find_output_tables([template_file for template_file, _ in args.template or []], args.template_dir, exprs)
+    if tables is not None and args.var_json is not None:
+        tables.add(args.var_json)
+    return tables
+
+def get_config_tables(configdb, tables, lookup_key=None):
+    """Read the given tables from config DB, in the format of get_config().
+
+    With lookup_key, only the entry that --var-json with -K would print is
+    read from each table: the key names are listed and a single entry is
+    fetched instead of the whole table.
+    """
+    client = configdb.get_redis_client(configdb.db_name)
+    if lookup_key is None:
+        return configdb_snapshot.get_config_snapshot(client, tables)
+
+    data = {}
+    for table in tables:
+        keys = [(configdb_snapshot.deserialize_key(redis_key.split(configdb_snapshot.TABLE_NAME_SEPARATOR, 1)[1]), redis_key)
+                for redis_key in configdb_snapshot.scan_keys(client, [table])]
+        if not keys:
+            continue
+        data[table] = {}
+        keys = natsort.natsorted([(key, redis_key) for (key, redis_key) in keys if FormatConverter.key_matches(key, lookup_key)])[:1]
+        configdb_snapshot.add_entries(data, configdb_snapshot.read_hashes(client, [redis_key for (_, redis_key) in keys]))
+    return data
+
+def _init_render_worker(data):
+    global render_data, jinja2_envs
+    render_data = data
+    # Do not share the parent's bytecode cache connections
+    jinja2_envs = {}
+
+def _render_in_worker(task):
+    (template_file, template_dir) = task
+    return render_template(template_file, template_dir, render_data)
+
+def render_templates(templates, template_dir, data, jobs=1, if_changed=False):
+    """Render (template file, output file) pairs against the same data.
+
+    Templates in the same directory share one jinja2 environment. With more
+    than one job the templates are rendered by forked worker processes, and
+    the results are still written out in the order they were given. With
+    if_changed, output files already holding their rendered text are left
+    alone, see render_manifest.py. Returns the number of output files written.
+    """
+    tasks = [(template_file, template_dir) for (template_file, _) in templates]
+    if jobs > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(min(jobs, len(tasks)), _init_render_worker, (data,))
+        try:
+            rendered = pool.map(_render_in_worker, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        rendered = [render_template(template_file, template_dir, data) for (template_file, template_dir) in tasks]
+
+    manifest = render_manifest.load_manifest() if if_changed else None
+    written = 0
+    for (_, output_file), text in zip(templates, rendered):
+        if output_file is None:
+            print(text)
+        elif manifest is not None:
+            if render_manifest.write_if_changed(output_file, text + '\n', manifest):
+                written += 1
+        else:
+            with open(output_file, 'w') as output:
+                print(text, file=output)
+            written += 1
+    if manifest is not None:
+        render_manifest.save_manifest(manifest)
+    return written
+
+def connect_config_db(namespace, db_kwargs, wait_for_init=True):
+    if namespace is None:
+        configdb = swsssdk.ConfigDBConnector(**db_kwargs)
+    else:
+        configdb = swsssdk.ConfigDBConnector(use_unix_socket_path=True, namespace=namespace, **db_kwargs)
+
+    configdb.connect(wait_for_init)
+    return configdb
+
+def read_config_db(namespace, db_kwargs, tables=None, lookup_key=None):
+    if config_db_cache is not None:
+        return config_db_cache.get_config(namespace, db_kwargs)
+    configdb = connect_config_db(namespace, db_kwargs)
+    if tables is None:
+        return configdb_snapshot.get_config_snapshot(configdb.get_redis_client(configdb.db_name))
+    return get_config_tables(configdb, tables, lookup_key)
+
+# Modules building the data of load_sorted_input_files(), or pickled with it
+CACHED_DATA_MODULES = ('minigraph', 'portconfig', 'sonic_device_util', 'configdb_snapshot', 'ordered_table')
+
+def get_module_file(name):
+    """Return the file of a module without importing it"""
+    (module_file, path, _) = imp.find_module(name)
+    if module_file is not None:
+        module_file.close()
+    return path
+
+def get_input_files(args, platform):
+    """List (role, path) of the files load_input_files() reads.
+
+    Returns None when the data also depends on something else: without a
+    port config file the ports are read from config DB, and without a hwsku
+    config file its name is looked up from the hwsku found in the minigraph.
+    """
+    files = []
+    if args.hwsku is not None or args.minigraph is not None:
+        if args.port_config is None:
+            return None
+        files.append(('port_config', args.port_config))
+        if args.port_config.endswith('.json'):
+            if args.minigraph is not None:
+                if args.hwsku_config is None:
+                    return None
+                files.append(('hwsku_config', args.hwsku_config))
+            else:
+                hwsku_config = portconfig.get_port_config_service().get_hwsku_file_name(args.hwsku, platform)
+                if hwsku_config is not None:
+                    files.append(('hwsku_config', hwsku_config))
+    if args.minigraph is not None:
+        files.append(('minigraph', args.minigraph))
+    if args.device_description is not None:
+        files.append(('device_description', args.device_description))
+    files += [('json', json_file) for json_file in args.json]
+    files += [('yaml', yaml_file) for yaml_file in args.yaml]
+    # The code the cached data depends on, so that an upgrade invalidates the cache
+    files += [('code', get_module_file(name)) for name in CACHED_DATA_MODULES]
+    files.append(('code', os.path.realpath(__file__)))
+    return files
+
+def load_input_files(args, platform, asic_name, asic_id):
+    """Merge the data of the hwsku, json, minigraph, device description and yaml inputs"""
+    data = {}
+    hwsku = args.hwsku
+    if hwsku is not None:
+        hardware_data = {'DEVICE_METADATA': {'localhost': {
+            'hwsku': hwsku
+            }}}
+        deep_update(data, hardware_data)
+        with profiler.phase('port_config'):
+            (ports, _, _) = portconfig.get_port_config(hwsku, platform, args.port_config, asic_id)
+        if not ports:
+            print('Failed to get port config', file=sys.stderr)
+            sys.exit(1)
+        deep_update(data, {'PORT': ports})
+
+        with profiler.phase('port_config'):
+            brkout_table = portconfig.get_breakout_mode(hwsku, platform, args.port_config)
+        if  brkout_table is not None:
+            deep_update(data, {'BREAKOUT_CFG': brkout_table})
+
+    for json_file in args.json:
+        with profiler.phase('json'), open(json_file, 'r') as stream:
+            deep_update(data, FormatConverter.to_deserialized(json.load(stream)))
+
+    if args.minigraph != None:
+        minigraph_file = args.minigraph
+        with profiler.phase('minigraph'):
+            if platform:
+                if args.port_config != None:
+                    deep_update(data, minigraph.parse_xml(minigraph_file, platform, args.port_config, asic_name=asic_name, hwsku_config_file=args.hwsku_config))
+                else:
+                    deep_update(data, minigraph.parse_xml(minigraph_file, platform, asic_name=asic_name))
+            else:
+                deep_update(data, minigraph.parse_xml(minigraph_file, port_config_file=args.port_config, asic_name=asic_name, hwsku_config_file=args.hwsku_config))
+
+    if args.device_description != None:
+        with profiler.phase('minigraph'):
+            deep_update(data, minigraph.parse_device_desc_xml(args.device_description))
+
+    for yaml_file in args.yaml:
+        with profiler.phase('yaml'), open(yaml_file, 'r') as stream:
+            if yaml.__version__ >= "5.1":
+                additional_data = yaml.full_load(stream)
+            else:
+                additional_data = yaml.load(stream)
+            deep_update(data, FormatConverter.to_deserialized(additional_data))
+    return data
+
+def load_sorted_input_files(args, platform, asic_name, asic_id):
+    """load_input_files() with the tables sorted, the data cache keeps their order"""
+    data = sort_data(load_input_files(args, platform, asic_name, asic_id))
+    for table in data.values():
+        if type(table) is ordered_table.OrderedTable:
+            table.sort()
+    return data
+
+def get_db_kwargs(args):
+    db_kwargs = {}
+    if args.redis_unix_sock_file != None:
+        db_kwargs['unix_socket_path'] = args.redis_unix_sock_file
+    return db_kwargs
+
+def load_data(args, tables=None, lookup_key=None, use_cache=False):
+    """Merge the data of the sources in args, in the order of the command line:
+    hwsku, json, minigraph, device description, yaml, additional data, config
+    DB, then platform info.
+
+    Keyword arguments:
+    args -- the parsed command line, or the result of get_sources()
+    tables -- names of the config DB tables to read with from_db, None for all
+    lookup_key -- only read the first entry of each table matching this key
+    use_cache -- serve the data of the input files from data_cache.py; the
+                 tables are then in natural order and the other dicts do
+                 not keep their iteration order
+    """
+    with profiler.phase('platform_info'):
+        platform = sonic_device_util.get_platform_info(sonic_device_util.get_machine_info())
+    hwsku = args.hwsku
+    asic_name = args.namespace
+    asic_id = None
+    if asic_name is not None:
+        asic_id = sonic_device_util.get_npu_id_from_name(asic_name)
+
+    # Load the database config for the namespace from global database json
+    if args.namespace is not None:
+        swsssdk.SonicDBConfig.load_sonic_global_db_config(namespace=args.namespace)
+
+    if hwsku is not None and args.port_config is None:
+        args.port_config = portconfig.get_port_config_service().get_port_config_file_name(hwsku, platform)
+    if use_cache:
+        context = {'platform': platform, 'asic': asic_name, 'hwsku': hwsku}
+        data = data_cache.cached(get_input_files(args, platform), context, load_sorted_input_files, args, platform, asic_name, asic_id)
+    else:
+        data = load_input_files(args, platform, asic_name, asic_id)
+
+    if args.additional_data != None:
+        additional_data = args.additional_data
+        if isinstance(additional_data, basestring):
+            additional_data = json.loads(additional_data)
+        deep_update(data, additional_data)
+
+    if args.from_db:
+        with profiler.phase('db_read'):
+            db_data = read_config_db(args.namespace, get_db_kwargs(args), tables, lookup_key)
+        deep_update(data, FormatConverter.db_to_output(db_data))
+
+    # the minigraph file must be provided to get the mac address for backend asics
+    if args.platform_info:
+        with profiler.phase('platform_info'):
+            asic_role = None
+            if asic_name is not None and args.minigraph is not None:
+                asic_role = minigraph.parse_asic_sub_role(args.minigraph, asic_name)
+            deep_update(data, get_platform_data(platform, asic_name, asic_role))
+    return data
+
+def get_platform_data(platform, asic_name, asic_role):
+    """Return the platform info added by -H, for the host or for an asic"""
+    if asic_role is not None and asic_role.lower() == "backend":
+        mac = sonic_device_util.get_system_mac(namespace=asic_name)
+    else:
+        mac = sonic_device_util.get_system_mac()
+
+    hardware_data = {'DEVICE_METADATA': {'localhost': {
+        'platform': platform,
+        'mac': mac,
+        }}}
+    # The ID needs to be passed to the SAI to identify the asic.
+    if asic_name is not None:
+        hardware_data['DEVICE_METADATA']['localhost'].update(asic_id=sonic_device_util.get_npu_id_from_name(asic_name))
+    return hardware_data
+
+def generate_all_namespaces(args, platform, db_kwargs):
+    """Build the data of the host and of every asic from a single parse of the minigraph,
+    then write each one to the config DB of its namespace or print them all by namespace."""
+    with profiler.phase('minigraph'):
+        all_data = minigraph.parse_xml_namespaces(args.minigraph, platform, args.port_config, args.hwsku_config, jobs=args.jobs)
+    profiler.count('namespaces', len(all_data))
+
+    if args.platform_info:
+        with profiler.phase('platform_info'):
+            for namespace, data in all_data.items():
+                asic_name = namespace if namespace != minigraph.HOST_NAMESPACE else None
+                asic_role = data['DEVICE_METADATA']['localhost'].get('sub_role')
+                deep_update(data, get_platform_data(platform, asic_name, asic_role))
+
+    if args.write_to_db:
+        swsssdk.SonicDBConfig.load_sonic_global_db_config()
+        def write_namespace(namespace, configdb):
+            return configdb_delta.write_config_delta(configdb.get_redis_client(configdb.db_name), FormatConverter.output_to_db(all_data[namespace]), args.replace)
+        with profiler.phase('db_write'):
+            deltas = sonic_device_util.for_each_namespace(write_namespace, sorted(all_data), args.jobs, wait_for_init=False, **db_kwargs)
+        for namespace in sorted(all_data):
+            profiler.count('db_changes', len(deltas[namespace]))
+            if args.print_delta:
+                print('[{}]\n{}'.format(namespace or 'host', deltas[namespace].format_summary()), file=sys.stderr)
+
+    if args.print_data:
+        with profiler.phase('output'):
+            print_serialized(all_data)
+
+
+# Sources of load_data() and generate(), named after the long options of the command line
+SOURCE_DEFAULTS = {
+    'minigraph': None,
+    'device_description': None,
+    'hwsku': None,
+    'namespace': None,
+    'port_config': None,
+    'hwsku_config': None,
+    'yaml': [],
+    'json': [],
+    'additional_data': None,
+    'from_db': False,
+    'platform_info': False,
+    'redis_unix_sock_file': None,
+}
+
+def get_sources(**sources):
+    """Return the given sources in the form load_data() takes the parsed command line.
+
+    minigraph, device_description, port_config and hwsku_config are file
+    names, yaml and json are lists of file names, additional_data is a dict
+    or a json string, from_db and platform_info are booleans.
+    """
+    unknown = set(sources) - set(SOURCE_DEFAULTS)
+    if unknown:
+        raise TypeError('unknown sources: %s' % ', '.join(sorted(unknown)))
+    values = copy.deepcopy(SOURCE_DEFAULTS)
+    values.update(sources)
+    return argparse.Namespace(**values)
+
+def render(template_file, data, template_dir=None):
+    """Return template_file rendered with data, the way -t does. The tables of
+    data are sorted in place."""
+    return render_template(os.path.abspath(template_file), template_dir, sort_data(data))
+
+def evaluate(expr, data):
+    """Return the value of a jinja2 expression over data, as -v prints it"""
+    return jinja2.Template('{{' + expr + '}}').render(data)
+
+def generate(template=None, expr=None, template_dir=None, **sources):
+    """Build the data of the sources the way sonic-cfggen does, and return
+    template rendered with it, or the value of the jinja2 expression expr over
+    it, or else the data itself.
+
+    The sources are the keywords of get_sources(). With from_db, only the
+    config DB tables the template or the expression refers to are read.
+
+    Example:
+        hwsku = generate(from_db=True, expr="DEVICE_METADATA['localhost']['hwsku']")
+    """
+    if template is not None and expr is not None:
+        raise ValueError('generate() takes a template or an expression, not both')
+    args = get_sources(**sources)
+    tables = None
+    if args.from_db and (template is not None or expr is not None):
+        tables = find_output_tables([os.path.abspath(template)] if template is not None else [], template_dir,
+                                    [expr] if expr is not None else [])
+    data = load_data(args, tables)
+    if template is not None:
+        return render(template, data, template_dir)
+    if expr is not None:
+        return evaluate(expr, data)
+    return data
+
+
+class ConfigDBCache:
+    """Keep a copy of config DB data between requests served by sonic-cfggen --server.
+
+    A copy is only reused while a keyspace notification subscription on that
+    database is alive, and it is dropped on every notification received.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dbs = {}
+
+    def get_config(self, namespace, db_kwargs):
+        db_key = (namespace, db_kwargs.get('unix_socket_path'))
+        with self._lock:
+            if db_key not in self._dbs:
+                self._dbs[db_key] = _CachedConfigDB(namespace, db_kwargs)
+            cached_db = self._dbs[db_key]
+        return cached_db.get_config()
+
+
+class _CachedConfigDB:
+    def __init__(self, namespace, db_kwargs):
+        self.configdb = connect_config_db(namespace, db_kwargs)
+        self.data = None
+        self.generation = 0
+        self.watching = False
+        # Shared by the watcher and get_config(), so data is only stored if the
+        # subscription was alive and saw no change since the data was read
+        self._lock = threading.Lock()
+        watcher = threading.Thread(target=self._watch)
+        watcher.daemon = True
+        watcher.start()
+
+    def _watch(self):
+        try:
+            client = self.configdb.get_redis_client(self.configdb.db_name)
+            events = client.config_get('notify-keyspace-events').get('notify-keyspace-events', '')
+            if 'K' not in events or not ('A' in events or set('gh') <= set(events)):
+                raise ValueError('keyspace notifications of hash changes are disabled')
+            pubsub = client.pubsub()
+            pubsub.psubscribe('__keyspace@{}__:*'.format(self.configdb.get_dbid(self.configdb.db_name)))
+            with self._lock:
+                self.watching = True
+                self.generation += 1
+            for message in pubsub.listen():
+                if message['type'] == 'pmessage':
+                    with self._lock:
+                        self.generation += 1
+                        self.data = None
+        except Exception as e:
+            print('Stop caching config DB data: {}'.format(e), file=sys.stderr)
+        with self._lock:
+            self.watching = False
+            self.generation += 1
+            self.data = None
+
+    def get_config(self):
+        with self._lock:
+            data = self.data
+            generation = self.generation
+        if data is None:
+            data = configdb_snapshot.get_config_snapshot(self.configdb.get_redis_client(self.configdb.db_name))
+            with self._lock:
+                if self.watching and generation == self.generation:
+                    self.data = data
+        return data
+
+
+def _recv_all(conn):
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return ''.join(chunks)
+
+def _serve_request(conn):
+    request = json.loads(_recv_all(conn))
+    out = StringIO()
+    err = StringIO()
+    saved = (sys.stdout, sys.stderr, os.getcwd())
+    rc = 0
+    try:
+        sys.stdout, sys.stderr = out, err
+        os.chdir(request.get('cwd', '/'))
+        main(request['argv'])
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            rc = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            rc = 1
+    except Exception:
+        traceback.print_exc()
+        rc = 1
+    finally:
+        sys.stdout, sys.stderr = saved[0], saved[1]
+        os.chdir(saved[2])
+    conn.sendall(json.dumps({'rc': rc, 'stdout': out.getvalue(), 'stderr': err.getvalue()}))
+
+def serve(socket_path):
+    """Answer sonic-cfggen-client requests on a unix socket, one at a time.
+
+    Each request carries the command line arguments and working directory of
+    the client. It is handled by main() in this process, so the heavy imports
+    are paid once and config DB data is read from config_db_cache. Requests
+    are serialized because main() redirects sys.stdout and changes the working
+    directory; a client that stalls only holds the others for
+    CFGGEN_SERVER_TIMEOUT seconds.
+    """
+    global config_db_cache
+    config_db_cache = ConfigDBCache()
+    portconfig.get_port_config_service().watch_db()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(16)
+    while True:
+        conn, _ = server.accept()
+        conn.settimeout(CFGGEN_SERVER_TIMEOUT)
+        try:
+            _serve_request(conn)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            conn.close()
+
+
+def main(argv=None):
+    global profiler
+    parser=argparse.ArgumentParser(description="Render configuration file from minigraph data and jinja2 template.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-m", "--minigraph", help="minigraph xml file", nargs='?', const='/etc/sonic/minigraph.xml')
+    group.add_argument("-M", "--device-description", help="device description xml file")
+    group.add_argument("-k", "--hwsku", help="HwSKU")
+    parser.add_argument("-n", "--namespace", help="namespace name", nargs='?', const=None, default=None)
+    parser.add_argument("-p", "--port-config", help="port config file, used with -m or -k", nargs='?', const=None)
+    parser.add_argument("-S", "--hwsku-config", help="hwsku config file, used with -p and -m or -k", nargs='?', const=None)
+    parser.add_argument("-y", "--yaml", help="yaml file that contains additional variables", action='append', default=[])
+    parser.add_argument("-j", "--json", help="json file that contains additional variables", action='append', default=[])
+    parser.add_argument("-a", "--additional-data", help="addition data, in json string")
+    parser.add_argument("-d", "--from-db", help="read config from configdb", action='store_true')
+    parser.add_argument("-H", "--platform-info", help="read platform and hardware info", action='store_true')
+    parser.add_argument("-s", "--redis-unix-sock-file", help="unix sock file for redis connection")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-t", "--template", help="render the data with the template file, as TEMPLATE[,OUTPUT]; can be repeated", action='append', type=parse_template)
+    parser.add_argument("-T", "--template_dir", help="search base for the template files", action='store')
+    group.add_argument("-v", "--var", help="print the value of a variable, support jinja2 expression")
+    group.add_argument("--var-json", help="print the value of a variable, in json format")
+    group.add_argument("-e", "--export", help="print the value of a jinja2 expression as NAME=EXPR, can be repeated", action='append', type=parse_export, metavar='NAME=EXPR')
+    group.add_argument("-w", "--write-to-db", help="write config into configdb", action='store_true')
+    group.add_argument("--print-data", help="print all data", action='store_true')
+    group.add_argument("--preset", help="generate sample configuration from a preset template", choices=config_samples.get_available_config())
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-K", "--key", help="Lookup for a specific key")
+    parser.add_argument("--no-cache", help="do not cache the data merged from the input files, see data_cache.py", action='store_true')
+    parser.add_argument("--replace", help="with -w, also delete the entries and fields of configdb missing from the data", action='store_true')
+    parser.add_argument("--print-delta", help="with -w, print the number of changed entries per table to stderr", action='store_true')
+    parser.add_argument("--if-changed", help="with -t TEMPLATE,OUTPUT, only write the output files whose content changes, and exit with %d if none does" % UNCHANGED_EXIT_CODE, action='store_true')
+    parser.add_argument("--jobs", help="number of worker processes to render templates given with -t, or to build the namespaces of --all-namespaces, and of threads writing them", type=int, default=1)
+    parser.add_argument("--all-namespaces", help="with -m and -w or --print-data, build the data of the host and of every asic from one parse of the minigraph; a '{}' in the port config file name stands for the asic id", action='store_true')
+    parser.add_argument("--export-format", help="output format of --export values", choices=['shell', 'json'], default='shell')
+    parser.add_argument("--server", help="serve sonic-cfggen-client requests on a unix socket", nargs='?', const=CFGGEN_SERVER_SOCKET, metavar='SOCKET')
+    parser.add_argument("--profile", help="print the time of the phases of this invocation as json to stderr, or save it into FILE", nargs='?', const='-', metavar='FILE')
+    parser.add_argument("--profile-dump", help="with --profile, also save a cProfile dump into FILE", metavar='FILE')
+    parser.add_argument("--compile-templates", help="fill the jinja2 bytecode cache with the templates under a directory", nargs='?', const='/usr/share/sonic/templates', metavar='DIR')
+    args = parser.parse_args(argv)
+
+    if args.if_changed and (not args.template or any(output_file is None for (_, output_file) in args.template)):
+        parser.error('--if-changed needs -t TEMPLATE,OUTPUT')
+
+    if args.server is not None:
+        if config_db_cache is not None:
+            parser.error('--server is not supported in a sonic-cfggen-client request')
+        serve(args.server)
+
+    (report, dump) = cfggen_profile.get_profile_settings(args.profile, args.profile_dump)
+    profiler = cfggen_profile.Profiler(report, dump, sys.argv[1:] if argv is None else argv)
+    profiler.start()
+    rc = 0
+    try:
+        run(parser, args)
+    except SystemExit as e:
+        rc = e.code if e.code is None or isinstance(e.code, int) else 1
+        raise
+    except Exception:
+        rc = 1
+        raise
+    finally:
+        profiler.stop(rc or 0)
+        profiler = cfggen_profile.Profiler()
+
+def run(parser, args):
+    """Produce the outputs of the parsed command line"""
+    if args.compile_templates is not None:
+        with profiler.phase('compile'):
+            count = compile_templates(args.compile_templates)
+        profiler.count('templates', count)
+        print('Compiled %d templates, %s' % (count, redis_bcc.format_stats()), file=sys.stderr)
+        return
+
+    db_kwargs = get_db_kwargs(args)
+
+    if args.all_namespaces:
+        if args.minigraph is None or not (args.write_to_db or args.print_data):
+            parser.error('--all-namespaces needs -m and -w or --print-data')
+        if args.namespace is not None or args.json or args.yaml or args.additional_data is not None or args.from_db:
+            parser.error('--all-namespaces only reads the minigraph and platform info, not -n, -j, -y, -a or -d')
+        with profiler.phase('platform_info'):
+            platform = sonic_device_util.get_platform_info(sonic_device_util.get_machine_info())
+        generate_all_namespaces(args, platform, db_kwargs)
+        return
+
+    # Dicts do not keep their iteration order through the cache, so it is
+    # only used for outputs that sort the data or do not depend on its order
+    use_cache = not args.no_cache and (args.print_data or args.var_json is not None or args.write_to_db or args.preset is not None)
+    tables = None
+    lookup_key = None
+    if args.from_db:
+        # Only read the tables the output can refer to
+        with profiler.phase('find_tables'):
+            tables = find_needed_tables(args)
+        lookup_key = args.key if args.var_json is not None else None
+    data = load_data(args, tables, lookup_key, use_cache)
+    profiler.count_data(data)
+
+    if args.template:
+        with profiler.phase('sort'):
+            sort_data(data)
+        with profiler.phase('render'):
+            written = render_templates(args.template, args.template_dir, data, args.jobs, args.if_changed)
+        profiler.count('templates', len(args.template))
+        profiler.count('files_written', written)
+        if args.if_changed and not written:
+            sys.exit(UNCHANGED_EXIT_CODE)
+
+    if args.var != None:
+        with profiler.phase('expressions'):
+            print(evaluate(args.var, data))
+
+    if args.export:
+        with profiler.phase('expressions'):
+            values = render_exports(args.export, data)
+        if args.export_format == 'json':
+            print(json.dumps(values, indent=4))
+        else:
+            for name, value in values.items():
+                print('%s=%s' % (name, pipes.quote(value.encode('utf-8'))))
+
+    if args.var_json != None and args.var_json in data:
+        with profiler.phase('output'):
+            if args.key != None:
+                print_serialized(data[args.var_json], args.key)
+            else:
+                print_serialized(data[args.var_json])
+
+    if args.write_to_db:
+        with profiler.phase('db_write'):
+            configdb = connect_config_db(args.namespace, db_kwargs, wait_for_init=False)
+            delta = configdb_delta.write_config_delta(configdb.get_redis_client(configdb.db_name), FormatConverter.output_to_db(data), args.replace)
+        profiler.count('db_changes', len(delta))
+        if args.print_delta:
+            print(delta.format_summary(), file=sys.stderr)
+
+    if args.print_data:
+        with profiler.phase('output'):
+            print_serialized(data)
+
+    if args.preset != None:
+        with profiler.phase('output'):
+            data = config_samples.generate_sample_config(data, args.preset)
+            print_serialized(data)
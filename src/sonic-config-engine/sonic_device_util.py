@@ -1,11 +1,15 @@
 #!/usr/bin/env python
 import os
-import yaml
 import subprocess
 import re
-from natsort import natsorted
 import glob
-from swsssdk import ConfigDBConnector, SonicDBConfig
+import json
+import tempfile
+import threading
+import lazy_import
+natsort = lazy_import.module('natsort')
+swsssdk = lazy_import.module('swsssdk')
+yaml = lazy_import.module('yaml')
 
 DOCUMENTATION = '''
 ---
@@ -26,17 +30,49 @@ NAMESPACE_PATH_GLOB = '/run/netns/*'
 ASIC_CONF_FILENAME = 'asic.conf'
 FRONTEND_ASIC_SUB_ROLE = 'FrontEnd'
 BACKEND_ASIC_SUB_ROLE = 'BackEnd'
-def get_machine_info():
-    if not os.path.isfile('/host/machine.conf'):
+MACHINE_CONF_FILE = '/host/machine.conf'
+SONIC_VERSION_FILE = '/etc/sonic/sonic_version.yml'
+BOOT_ID_FILE = '/proc/sys/kernel/random/boot_id'
+DEVICE_IDENTITY_FILE = '/var/run/sonic-device-identity.json'
+DEVICE_IDENTITY_FILE_ENV = 'SONIC_DEVICE_IDENTITY_FILE'
+
+# (file name, parse) -> (version, content) of read_file()
+_files = {}
+
+def get_file_version(filename):
+    try:
+        st = os.stat(filename)
+    except OSError:
         return None
+    return (st.st_mtime, st.st_size)
+
+def read_file(filename, parse):
+    """Return parse(file), called again only when the file changes, or None if there is no such file"""
+    version = get_file_version(filename)
+    if version is None:
+        return None
+    key = (filename, parse)
+    cached = _files.get(key)
+    if cached is None or cached[0] != version:
+        with open(filename) as f:
+            cached = (version, parse(f))
+        _files[key] = cached
+    return cached[1]
+
+def parse_machine_conf(machine_file):
     machine_vars = {}
-    with open('/host/machine.conf') as machine_file:
-        for line in machine_file:
-            tokens = line.split('=')
-            if len(tokens) < 2:
-                continue
-            machine_vars[tokens[0]] = tokens[1].strip()
-    return machine_vars 
+    for line in machine_file:
+        tokens = line.split('=')
+        if len(tokens) < 2:
+            continue
+        machine_vars[tokens[0]] = tokens[1].strip()
+    return machine_vars
+
+def get_machine_info():
+    machine_vars = read_file(MACHINE_CONF_FILE, parse_machine_conf)
+    if machine_vars is None:
+        return None
+    return dict(machine_vars)
 
 def get_npu_id_from_name(npu_name):
     if npu_name.startswith(NPU_NAME_PREFIX):
@@ -44,21 +80,26 @@ def get_npu_id_from_name(npu_name):
     else:
         return None
 
+def get_asic_conf_file_path(platform):
+    return os.path.join(SONIC_DEVICE_PATH, platform, ASIC_CONF_FILENAME)
+
+def parse_asic_conf(asic_conf_file):
+    for line in asic_conf_file:
+        tokens = line.split('=')
+        if len(tokens) < 2:
+           continue
+        if tokens[0].lower() == 'num_asic':
+            num_npus = tokens[1].strip()
+    return int(num_npus)
+
 def get_num_npus():
     platform = get_platform_info(get_machine_info())
     if not platform:
         return 1
-    asic_conf_file_path = os.path.join(SONIC_DEVICE_PATH, platform, ASIC_CONF_FILENAME)
-    if not os.path.isfile(asic_conf_file_path):
+    num_npus = read_file(get_asic_conf_file_path(platform), parse_asic_conf)
+    if num_npus is None:
         return 1
-    with open(asic_conf_file_path) as asic_conf_file:
-        for line in asic_conf_file:
-            tokens = line.split('=')
-            if len(tokens) < 2:
-               continue
-            if tokens[0].lower() == 'num_asic':
-                num_npus = tokens[1].strip()
-        return int(num_npus)
+    return num_npus
 
 def get_namespaces():
     """
@@ -69,25 +110,30 @@ def get_namespaces():
     for path in glob.glob(NAMESPACE_PATH_GLOB):
         ns = os.path.basename(path)
         ns_list.append(ns)
-    return natsorted(ns_list)
+    return natsort.natsorted(ns_list)
+
+# Connection to config DB of get_hwsku()
+_config_db = None
 
 def get_hwsku():
-    config_db = ConfigDBConnector()
-    config_db.connect()
-    metadata = config_db.get_table('DEVICE_METADATA')
+    global _config_db
+    if _config_db is None:
+        config_db = swsssdk.ConfigDBConnector()
+        config_db.connect()
+        _config_db = config_db
+    metadata = _config_db.get_table('DEVICE_METADATA')
     return metadata['localhost']['hwsku']
 
-def get_platform():
-    if not os.path.isfile('/host/machine.conf'):
-        return ''
- 
-    with open('/host/machine.conf') as machine_conf:
-        for line in machine_conf:
-            tokens = line.split('=')
-            if tokens[0].strip() == 'onie_platform' or tokens[0].strip() == 'aboot_platform':
-                return tokens[1].strip()
+def parse_platform(machine_conf):
+    for line in machine_conf:
+        tokens = line.split('=')
+        if tokens[0].strip() == 'onie_platform' or tokens[0].strip() == 'aboot_platform':
+            return tokens[1].strip()
     return ''
 
+def get_platform():
+    return read_file(MACHINE_CONF_FILE, parse_platform) or ''
+
 def is_multi_npu():
     num_npus = get_num_npus()
     return (num_npus > 1)
@@ -101,22 +147,84 @@ def get_all_namespaces():
     front_ns = []
     back_ns = []
     num_npus = get_num_npus()
-    SonicDBConfig.load_sonic_global_db_config()
+    swsssdk.SonicDBConfig.load_sonic_global_db_config()
     
-    if is_multi_npu():
-        for npu in range(num_npus):
-            namespace = "{}{}".format(NPU_NAME_PREFIX, npu)
-            config_db = ConfigDBConnector(use_unix_socket_path=True, namespace=namespace)
-            config_db.connect()
-
-            metadata = config_db.get_table('DEVICE_METADATA')
-            if metadata['localhost']['sub_role'] == FRONTEND_ASIC_SUB_ROLE:
+    if num_npus > 1:
+        namespaces = ["{}{}".format(NPU_NAME_PREFIX, npu) for npu in range(num_npus)]
+        metadata = for_each_namespace(lambda namespace, config_db: config_db.get_entry('DEVICE_METADATA', 'localhost'), namespaces)
+        for namespace in namespaces:
+            if metadata[namespace]['sub_role'] == FRONTEND_ASIC_SUB_ROLE:
                 front_ns.append(namespace)
-            elif metadata['localhost']['sub_role'] == BACKEND_ASIC_SUB_ROLE:
+            elif metadata[namespace]['sub_role'] == BACKEND_ASIC_SUB_ROLE:
                 back_ns.append(namespace)
 
     return {'front_ns':front_ns, 'back_ns':back_ns}
 
+# (namespace, connection arguments) -> ConfigDBConnector of get_namespace_config_db()
+_namespace_config_dbs = {}
+_namespace_config_dbs_lock = threading.Lock()
+
+def get_namespace_config_db(namespace=None, wait_for_init=True, **db_kwargs):
+    """
+    Return a connection to the config DB of a namespace, or of the host for
+    None or '', made on the first call for the namespace and reused by the
+    next ones. db_kwargs are passed to ConfigDBConnector, like
+    unix_socket_path.
+    """
+    key = (namespace or None, tuple(sorted(db_kwargs.items())))
+    with _namespace_config_dbs_lock:
+        config_db = _namespace_config_dbs.get(key)
+    if config_db is None:
+        if namespace:
+            config_db = swsssdk.ConfigDBConnector(use_unix_socket_path=True, namespace=namespace, **db_kwargs)
+        else:
+            config_db = swsssdk.ConfigDBConnector(**db_kwargs)
+        config_db.connect(wait_for_init)
+        with _namespace_config_dbs_lock:
+            config_db = _namespace_config_dbs.setdefault(key, config_db)
+    return config_db
+
+def get_asic_namespaces():
+    """Return the namespaces of the asics in the global database config, none on a single asic device"""
+    if not is_multi_npu():
+        return []
+    swsssdk.SonicDBConfig.load_sonic_global_db_config()
+    return natsort.natsorted(namespace for namespace in swsssdk.SonicDBConfig.get_ns_list() if namespace)
+
+def for_each_namespace(func, namespaces=None, jobs=None, wait_for_init=True, **db_kwargs):
+    """
+    Call func(namespace, config_db) with the config DB of every namespace,
+    in parallel threads, and return the results by namespace.
+
+    Keyword arguments:
+    namespaces -- the namespaces, '' for the host; by default the asic namespaces
+    jobs -- number of threads, one per namespace by default
+    wait_for_init, db_kwargs -- see get_namespace_config_db()
+
+    The calls mostly wait for the databases, so the threads run them in
+    about the time of the slowest one. The first exception raised by a call
+    is raised again once they are all done.
+    """
+    if namespaces is None:
+        namespaces = get_asic_namespaces()
+    namespaces = list(namespaces)
+
+    def call(namespace):
+        return func(namespace, get_namespace_config_db(namespace, wait_for_init, **db_kwargs))
+
+    jobs = min(jobs or len(namespaces), len(namespaces))
+    if jobs <= 1:
+        return dict((namespace, call(namespace)) for namespace in namespaces)
+
+    from multiprocessing.pool import ThreadPool
+    pool = ThreadPool(jobs)
+    try:
+        results = pool.map(call, namespaces)
+    finally:
+        pool.close()
+        pool.join()
+    return dict(zip(namespaces, results))
+
 def get_platform_info(machine_info):
     if machine_info != None:
         if machine_info.has_key('onie_platform'):
@@ -125,16 +233,138 @@ def get_platform_info(machine_info):
             return machine_info['aboot_platform']
     return None
 
+def parse_sonic_version(stream):
+    if yaml.__version__ >= "5.1":
+        return yaml.full_load(stream)
+    else:
+        return yaml.load(stream)
+
 def get_sonic_version_info():
-    if not os.path.isfile('/etc/sonic/sonic_version.yml'):
+    data = read_file(SONIC_VERSION_FILE, parse_sonic_version)
+    if data is None:
         return None
-    data = {}
-    with open('/etc/sonic/sonic_version.yml') as stream:
-        if yaml.__version__ >= "5.1":
-            data = yaml.full_load(stream)
-        else:
-            data = yaml.load(stream)
-    return data
+    return dict(data)
+
+def get_boot_id():
+    try:
+        with open(BOOT_ID_FILE) as f:
+            return f.read().strip()
+    except IOError:
+        return None
+
+def get_device_identity_file():
+    """Return the file the device identity is saved to, or None if saving is disabled with an empty SONIC_DEVICE_IDENTITY_FILE"""
+    return os.environ.get(DEVICE_IDENTITY_FILE_ENV, DEVICE_IDENTITY_FILE) or None
+
+def get_identity_versions():
+    """Return the versions of the files the device identity is read from"""
+    versions = [get_file_version(MACHINE_CONF_FILE), get_file_version(SONIC_VERSION_FILE)]
+    platform = get_platform_info(get_machine_info())
+    if platform:
+        versions.append(get_file_version(get_asic_conf_file_path(platform)))
+    # As saved to json
+    return [list(version) if version else None for version in versions]
+
+def _to_str(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if isinstance(value, list):
+        return [_to_str(item) for item in value]
+    return value
+
+class DeviceIdentity(object):
+    """
+    The identity of the device: platform, hwsku, number of asics, namespaces
+    of the asics and asic type, each read on its first use.
+
+    The fields read from files are saved to DEVICE_IDENTITY_FILE with the
+    boot id and the versions of machine.conf, sonic_version.yml and
+    asic.conf, so that the processes started later in the same boot read
+    them from there. The hwsku comes from config DB, which a config reload
+    can change within a boot, so it is only kept by the process. Use
+    get_device_identity() to share the identity of the process.
+    """
+    FIELDS = ('platform', 'hwsku', 'asic_count', 'namespaces', 'asic_type')
+    SAVED_FIELDS = ('platform', 'asic_count', 'namespaces', 'asic_type')
+
+    def __init__(self, versions):
+        self.versions = versions
+        self._fields = self._load()
+
+    def _load(self):
+        filename = get_device_identity_file()
+        if filename is None:
+            return {}
+        try:
+            with open(filename) as f:
+                saved = json.load(f)
+            if saved['boot_id'] != get_boot_id() or saved['versions'] != self.versions:
+                return {}
+            return dict((str(field), _to_str(value)) for field, value in saved['fields'].items() if field in self.SAVED_FIELDS)
+        except (IOError, OSError, ValueError, KeyError, AttributeError):
+            return {}
+
+    def _save(self):
+        """Save the fields read, silently giving up if the file is not writable"""
+        filename = get_device_identity_file()
+        if filename is None:
+            return
+        fields = dict((field, value) for field, value in self._fields.items() if field in self.SAVED_FIELDS)
+        saved = {'boot_id': get_boot_id(), 'versions': self.versions, 'fields': fields}
+        try:
+            (fd, tmp_path) = tempfile.mkstemp(dir=os.path.dirname(filename), suffix='.tmp')
+        except (IOError, OSError):
+            return
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(saved, f)
+            os.rename(tmp_path, filename)
+        except (IOError, OSError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _read_platform(self):
+        return get_platform_info(get_machine_info())
+
+    def _read_hwsku(self):
+        return get_hwsku()
+
+    def _read_asic_count(self):
+        return get_num_npus()
+
+    def _read_namespaces(self):
+        num_npus = self.get('asic_count')
+        if num_npus <= 1:
+            return []
+        return ["{}{}".format(NPU_NAME_PREFIX, npu) for npu in range(num_npus)]
+
+    def _read_asic_type(self):
+        version_info = get_sonic_version_info()
+        return version_info.get('asic_type') if version_info else None
+
+    def get(self, field):
+        """Return a field of the identity, read and saved on its first use"""
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        if field not in self._fields:
+            self._fields[field] = getattr(self, '_read_' + field)()
+            if field in self.SAVED_FIELDS:
+                self._save()
+        value = self._fields[field]
+        return list(value) if isinstance(value, list) else value
+
+    def to_dict(self):
+        return dict((field, self.get(field)) for field in self.FIELDS)
+
+_device_identity = None
+
+def get_device_identity():
+    """Return the DeviceIdentity of the process, made again when machine.conf, sonic_version.yml or asic.conf changes"""
+    global _device_identity
+    versions = get_identity_versions()
+    if _device_identity is None or _device_identity.versions != versions:
+        _device_identity = DeviceIdentity(versions)
+    return _device_identity
 
 def valid_mac_address(mac):
     return bool(re.match("^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$", mac))
@@ -0,0 +1,165 @@
+"""template_filters.py
+
+The ip prefix filters of the jinja2 templates, shared by sonic-cfggen and the
+TemplateFabric of bgpcfgd: ipv4, ipv6, ip, network, prefixlen, netmask,
+broadcast, ip_network and pfx_filter.
+
+Templates apply several of them to the same prefix, in loops over every
+interface, and building a netaddr.IPNetwork costs far more than the filters
+themselves. A prefix is parsed once and kept in an LRU of MAX_CACHED_PREFIXES
+entries, invalid ones included. The cached ParsedPrefix objects are shared by
+all the templates of the process, so they are read-only; the string of each
+of their attributes is computed on its first use.
+
+    env.filters.update(template_filters.get_filters())
+"""
+
+import threading
+from collections import OrderedDict
+from functools import partial
+
+import lazy_import
+netaddr = lazy_import.module('netaddr')
+
+MAX_CACHED_PREFIXES = 16384
+
+# Attributes of a prefix there is a filter for, e.g. {{ prefix | prefixlen }}
+PREFIX_ATTRS = ['ip', 'network', 'prefixlen', 'netmask', 'broadcast']
+
+# Parsed prefixes by their string, least recently used first, None for invalid ones
+_prefixes = OrderedDict()
+_prefixes_lock = threading.Lock()
+
+# Hits and misses of the parsed prefixes of this process
+stats = {'hit': 0, 'miss': 0}
+
+
+class ParsedPrefix(object):
+    """Read-only view of the netaddr.IPNetwork of a prefix"""
+
+    __slots__ = ('version', '_network', '_strings')
+
+    def __init__(self, network):
+        object.__setattr__(self, 'version', network.version)
+        object.__setattr__(self, '_network', network)
+        object.__setattr__(self, '_strings', {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError('parsed prefixes are shared, %s cannot be set' % name)
+
+    def __delattr__(self, name):
+        raise AttributeError('parsed prefixes are shared, %s cannot be deleted' % name)
+
+    def get_string(self, attr):
+        """Return str(getattr(netaddr.IPNetwork(prefix), attr))"""
+        value = self._strings.get(attr)
+        if value is None:
+            value = self._strings[attr] = str(getattr(self._network, attr))
+        return value
+
+    def get_network_address(self):
+        """Return a new netaddr.IPAddress of the network address"""
+        return self._network.network
+
+    def to_ip_network(self):
+        """Return a new netaddr.IPNetwork of the prefix, which the caller can change"""
+        return netaddr.IPNetwork(self._network)
+
+    def __str__(self):
+        return str(self._network)
+
+    def __repr__(self):
+        return 'ParsedPrefix(%r)' % str(self._network)
+
+
+def parse_prefix(value):
+    """Return the ParsedPrefix of str(value), or None if it is not an ip address or prefix"""
+    if isinstance(value, ParsedPrefix):
+        return value
+    try:
+        key = str(value)
+    except UnicodeError:
+        return None
+    with _prefixes_lock:
+        if key in _prefixes:
+            stats['hit'] += 1
+            prefix = _prefixes[key] = _prefixes.pop(key)
+            return prefix
+    try:
+        prefix = ParsedPrefix(netaddr.IPNetwork(key))
+    except (netaddr.NotRegisteredError, netaddr.AddrFormatError, netaddr.AddrConversionError, ValueError, TypeError):
+        prefix = None
+    with _prefixes_lock:
+        stats['miss'] += 1
+        _prefixes[key] = prefix
+        while len(_prefixes) > MAX_CACHED_PREFIXES:
+            _prefixes.popitem(last=False)
+    return prefix
+
+def clear_cache():
+    with _prefixes_lock:
+        _prefixes.clear()
+
+
+def is_ipv4(value):
+    """ Return True if the value is an ipv4 address """
+    if not value:
+        return False
+    if isinstance(value, netaddr.IPNetwork):
+        return value.version == 4
+    prefix = parse_prefix(value)
+    return prefix is not None and prefix.version == 4
+
+def is_ipv6(value):
+    """ Return True if the value is an ipv6 address """
+    if not value:
+        return False
+    if isinstance(value, netaddr.IPNetwork):
+        return value.version == 6
+    prefix = parse_prefix(value)
+    return prefix is not None and prefix.version == 6
+
+def prefix_attr(attr, value):
+    """ Return the string of an attribute of the ip prefix value, None if it is not one """
+    if not value:
+        return None
+    prefix = parse_prefix(value)
+    if prefix is None:
+        return None
+    return prefix.get_string(attr)
+
+def ip_network(value):
+    """ Extract network for network prefix """
+    prefix = parse_prefix(value)
+    if prefix is None:
+        return "Invalid ip address %s" % value
+    return prefix.get_network_address()
+
+def pfx_filter(value):
+    """INTERFACE Table can have keys in one of the two formats:
+       string or tuple - This filter skips the string keys and only
+       take into account the tuple.
+       For eg - VLAN_INTERFACE|Vlan1000 vs VLAN_INTERFACE|Vlan1000|192.168.0.1/21
+    """
+    table = OrderedDict()
+
+    if not value:
+        return table
+
+    for key, val in value.items():
+        if not isinstance(key, tuple):
+            continue
+        table[key] = val
+    return table
+
+def get_filters(attrs=PREFIX_ATTRS):
+    """Return the filters by name, with a filter for each of attrs"""
+    filters = {
+        'ipv4': is_ipv4,
+        'ipv6': is_ipv6,
+        'pfx_filter': pfx_filter,
+        'ip_network': ip_network,
+    }
+    for attr in attrs:
+        filters[attr] = partial(prefix_attr, attr)
+    return filters
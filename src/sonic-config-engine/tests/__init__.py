@@ -0,0 +1,16 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Every sonic-cfggen run of the tests, in process or as a subprocess, keeps its
+# caches, manifest and device identity in a directory of its own instead of
+# the ones of the system under /var
+WORK_DIR = tempfile.mkdtemp(prefix='sonic-cfggen-tests-')
+atexit.register(shutil.rmtree, WORK_DIR, True)
+
+os.environ['SONIC_CFGGEN_CACHE_DIR'] = os.path.join(WORK_DIR, 'cache')
+os.environ['SONIC_CFGGEN_BYTECODE_DIR'] = os.path.join(WORK_DIR, 'cache', 'bytecode')
+os.environ['SONIC_CFGGEN_MANIFEST'] = os.path.join(WORK_DIR, 'cache', 'rendered.json')
+os.environ['SONIC_DEVICE_IDENTITY_FILE'] = os.path.join(WORK_DIR, 'sonic-device-identity.json')
+os.environ['SONIC_CFGGEN_PROFILE_LOG'] = os.path.join(WORK_DIR, 'sonic-cfggen-profile.log')
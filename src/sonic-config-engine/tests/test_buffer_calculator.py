@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+import buffer_calculator
+
+PORTS2CABLE = {
+    'torrouter_server': '5m',
+    'leafrouter_torrouter': '40m',
+    'spinerouter_leafrouter': '300m',
+}
+
+
+class TestBufferCalculator(TestCase):
+
+    def setUp(self):
+        self.ports = ['Ethernet0', 'Ethernet4', 'Ethernet8', 'Ethernet12', 'Ethernet16']
+        self.device_neighbor = {
+            'Ethernet0': {'name': 'ARISTA01T1', 'port': 'Ethernet1'},
+            'Ethernet4': {'name': 'ARISTA02T1', 'port': 'Ethernet1'},
+            'Ethernet8': {'name': 'unknown', 'port': 'Ethernet1'},
+        }
+        self.device_neighbor_metadata = {
+            'ARISTA01T1': {'type': 'LeafRouter'},
+            'ARISTA02T1': {'type': 'SpineRouter'},
+        }
+        self.vlan_member = {('Vlan1000', 'Ethernet8'): {}, ('Vlan1000', 'Ethernet12'): {}}
+
+    def test_cable_lengths(self):
+        cable_lengths = buffer_calculator.get_cable_lengths(
+            self.ports, 'ToRRouter', PORTS2CABLE, '300m', self.device_neighbor, self.device_neighbor_metadata, self.vlan_member)
+        self.assertEqual(cable_lengths.items(), [
+            ('Ethernet0', '40m'), ('Ethernet4', '300m'), ('Ethernet8', '5m'), ('Ethernet12', '5m'), ('Ethernet16', '300m')])
+
+    def test_cable_lengths_reversed_roles(self):
+        cable_lengths = buffer_calculator.get_cable_lengths(
+            self.ports, 'LeafRouter', PORTS2CABLE, '5m', self.device_neighbor, self.device_neighbor_metadata, self.vlan_member)
+        # Only a ToRRouter has servers in its VLANs
+        self.assertEqual(cable_lengths.values(), ['5m', '300m', '5m', '5m', '5m'])
+        cable_lengths = buffer_calculator.get_cable_lengths(
+            self.ports, 'SpineRouter', PORTS2CABLE, '40m', self.device_neighbor, self.device_neighbor_metadata)
+        self.assertEqual(cable_lengths.values(), ['300m', '40m', '40m', '40m', '40m'])
+
+    def test_cable_lengths_no_tables(self):
+        cable_lengths = buffer_calculator.get_cable_lengths(self.ports, '', PORTS2CABLE, '5m')
+        self.assertEqual(cable_lengths.values(), ['5m'] * 5)
+        cable_lengths = buffer_calculator.get_cable_lengths(self.ports, 'ToRRouter', PORTS2CABLE, '40m', self.device_neighbor)
+        self.assertEqual(cable_lengths.values(), ['40m'] * 5)
@@ -1,6 +1,9 @@
 from unittest import TestCase
+import json
 import subprocess
 import os
+import shutil
+import tempfile
 
 TOR_ROUTER = 'ToRRouter'
 BACKEND_TOR_ROUTER = 'BackEndToRRouter'
@@ -19,6 +22,14 @@ class TestCfgGen(TestCase):
         self.sample_device_desc = os.path.join(self.test_dir, 'device.xml')
         self.port_config = os.path.join(self.test_dir, 't0-sample-port-config.ini')
 
+    def set_env(self, name, value):
+        """Set an environment variable of sonic-cfggen until the end of the test"""
+        if name in os.environ:
+            self.addCleanup(os.environ.__setitem__, name, os.environ[name])
+        else:
+            self.addCleanup(os.environ.pop, name, None)
+        os.environ[name] = value
+
     def run_script(self, argument, check_stderr=False):
         print '\n    Running sonic-cfggen ' + argument
         if check_stderr:
@@ -38,6 +49,14 @@ class TestCfgGen(TestCase):
         output = self.run_script(argument)
         self.assertEqual(output, '')
 
+    def test_hwsku_without_port_config(self):
+        argument = '-k ACS-MSN2700 -p "' + os.path.join(self.test_dir, 'sample_platform.json') + '" -S "' + \
+                   os.path.join(self.test_dir, 'sample_hwsku.json') + '" --print-data'
+        process = subprocess.Popen(self.script_file + ' ' + argument, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        (output, error) = process.communicate()
+        self.assertEqual(process.returncode, 1)
+        self.assertEqual(error, 'Failed to get port config\n')
+
     def test_device_desc(self):
         argument = '-v "DEVICE_METADATA[\'localhost\'][\'hwsku\']" -M "' + self.sample_device_desc + '"'
         output = self.run_script(argument)
@@ -90,6 +109,16 @@ class TestCfgGen(TestCase):
         output = self.run_script(argument)
         self.assertEqual(output.strip(), '{\n    "k11": "v11"\n}')
 
+    def test_export_shell(self):
+        argument = '-a \'{"k1":{"k11":"v 11"}}\' -e K11="k1[\'k11\']" -e K12="k1[\'k12\']" -e K2="k2[\'k21\']"'
+        output = self.run_script(argument)
+        self.assertEqual(output.strip(), "K11='v 11'\nK12=''\nK2=''")
+
+    def test_export_json(self):
+        argument = '-m "' + self.sample_graph + '" -e HWSKU="DEVICE_METADATA[\'localhost\'][\'hwsku\']" -e TYPE="DEVICE_METADATA[\'localhost\'][\'type\']" --export-format json'
+        output = self.run_script(argument)
+        self.assertEqual(output.strip(), '{\n    "HWSKU": "Force10-Z9100", \n    "TYPE": "LeafRouter"\n}')
+
     def test_var_json_data(self):
         argument = '-m "' + self.sample_graph_simple + '" -p "' + self.port_config + '" --var-json VLAN_MEMBER'
         output = self.run_script(argument)
@@ -106,6 +135,122 @@ class TestCfgGen(TestCase):
         output = self.run_script(argument)
         self.assertEqual(output.strip(), 'value1\nvalue2')
 
+    def test_render_multiple_templates(self):
+        template = os.path.join(self.test_dir, 'test.j2')
+        output_dir = tempfile.mkdtemp()
+        try:
+            for jobs in ['1', '2']:
+                outputs = [os.path.join(output_dir, 'out{}_{}'.format(jobs, i)) for i in range(3)]
+                argument = '-y ' + os.path.join(self.test_dir, 'test.yml') + ' --jobs ' + jobs + ' -t ' + template + \
+                           ''.join(' -t {},{}'.format(template, output) for output in outputs)
+                output = self.run_script(argument)
+                self.assertEqual(output.strip(), 'value1\nvalue2')
+                for output_file in outputs:
+                    with open(output_file) as f:
+                        self.assertEqual(f.read(), output)
+        finally:
+            shutil.rmtree(output_dir)
+
+    def test_data_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        yaml_file = os.path.join(cache_dir, 'test.yml')
+        shutil.copy(os.path.join(self.test_dir, 'test.yml'), yaml_file)
+        argument = '-m "' + self.sample_graph_t0 + '" -p "' + self.port_config + '" -y ' + yaml_file + ' --print-data'
+        self.set_env('SONIC_CFGGEN_CACHE_DIR', cache_dir)
+        try:
+            expected = self.run_script(argument + ' --no-cache', True)
+            self.assertTrue('Warning: Ignoring Control Plane ACL NTP_ACL without type' in expected)
+            # The first run fills the cache, the second one is a hit replaying the warnings
+            for _ in range(2):
+                self.assertEqual(self.run_script(argument, True), expected)
+            self.assertEqual(len([name for name in os.listdir(cache_dir) if name.endswith('.pickle')]), 1)
+            with open(yaml_file, 'a') as f:
+                f.write('yml_extra: value3\n')
+            self.assertTrue('"yml_extra": "value3"' in self.run_script(argument))
+            self.assertEqual(len([name for name in os.listdir(cache_dir) if name.endswith('.pickle')]), 2)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_render_if_changed(self):
+        output_dir = tempfile.mkdtemp()
+        output_file = os.path.join(output_dir, 'out')
+        expected_file = os.path.join(output_dir, 'expected')
+        argument = '-y ' + os.path.join(self.test_dir, 'test.yml') + ' -t ' + os.path.join(self.test_dir, 'test.j2') + ','
+        self.set_env('SONIC_CFGGEN_MANIFEST', os.path.join(output_dir, 'rendered.json'))
+        try:
+            self.run_script(argument + expected_file)
+            with open(expected_file) as f:
+                expected = f.read()
+            argument += output_file + ' --if-changed'
+            self.run_script(argument)
+            with open(output_file) as f:
+                self.assertEqual(f.read(), expected)
+            inode = os.stat(output_file).st_ino
+            with self.assertRaises(subprocess.CalledProcessError) as cm:
+                self.run_script(argument)
+            self.assertEqual(cm.exception.returncode, 3)
+            self.assertEqual(os.stat(output_file).st_ino, inode)
+            # A target edited by hand is compared by content and rendered again
+            with open(output_file, 'w') as f:
+                f.write('edited\n')
+            self.run_script(argument)
+            with open(output_file) as f:
+                self.assertEqual(f.read(), expected)
+        finally:
+            shutil.rmtree(output_dir)
+
+    def test_bytecode_cache(self):
+        template_dir = tempfile.mkdtemp()
+        bytecode_dir = os.path.join(template_dir, 'bytecode')
+        template = os.path.join(template_dir, 'test.j2')
+        shutil.copy(os.path.join(self.test_dir, 'test.j2'), template)
+        argument = '-y ' + os.path.join(self.test_dir, 'test.yml') + ' -t ' + template
+        self.set_env('SONIC_CFGGEN_BYTECODE_DIR', bytecode_dir)
+        try:
+            output = self.run_script('--compile-templates ' + template_dir, True)
+            self.assertEqual(output.strip(), 'Compiled 1 templates, jinja2 bytecode cache: 0 memory hits, 0 disk hits, 0 redis hits, 2 misses')
+            output = self.run_script('--compile-templates ' + template_dir, True)
+            self.assertEqual(output.strip(), 'Compiled 1 templates, jinja2 bytecode cache: 0 memory hits, 2 disk hits, 0 redis hits, 0 misses')
+            self.assertEqual(self.run_script(argument).strip(), 'value1\nvalue2')
+            # An edited template has another checksum, so it is not served the old bytecode
+            with open(template, 'a') as f:
+                f.write('edited\n')
+            self.assertEqual(self.run_script(argument).strip(), 'value1\nvalue2\nedited')
+            self.assertEqual(len([name for name in os.listdir(bytecode_dir) if name.endswith('.cache')]), 3)
+        finally:
+            shutil.rmtree(template_dir)
+
+    def test_profile(self):
+        profile_dir = tempfile.mkdtemp()
+        report_file = os.path.join(profile_dir, 'report.json')
+        log_file = os.path.join(profile_dir, 'profile.log')
+        argument = '-m "' + self.sample_graph_t0 + '" -p "' + self.port_config + '" -t ' + os.path.join(self.test_dir, 'test.j2')
+        self.set_env('SONIC_CFGGEN_PROFILE_LOG', log_file)
+        try:
+            expected = self.run_script(argument)
+            self.assertEqual(self.run_script(argument + ' --profile ' + report_file + ' --profile-dump ' + os.path.join(profile_dir, 'cfggen.prof')), expected)
+            with open(report_file) as f:
+                report = json.load(f)
+            self.assertEqual(report['rc'], 0)
+            self.assertEqual(set(report['phases']), set(['platform_info', 'minigraph', 'sort', 'render']))
+            self.assertTrue(report['phases']['minigraph']['wall_ms'] > 0)
+            self.assertTrue('minigraph' in report['imports_ms'])
+            self.assertEqual(report['counts']['templates'], 1)
+            self.assertTrue(report['counts']['entries'] > 0)
+            self.assertTrue(os.path.getsize(os.path.join(profile_dir, 'cfggen.prof')) > 0)
+
+            # The environment enables the profile of every call, each one appends its record to the log
+            os.environ['SONIC_CFGGEN_PROFILE'] = os.path.join(profile_dir, 'report-{pid}.json')
+            self.run_script('-a \'{"X": {"a": {}}}\' -v X')
+            del os.environ['SONIC_CFGGEN_PROFILE']
+            with open(log_file) as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual([set(record['phases']) for record in records], [set(report['phases']), set(['platform_info', 'expressions'])])
+            self.assertEqual(len([name for name in os.listdir(profile_dir) if name.startswith('report-')]), 1)
+        finally:
+            os.environ.pop('SONIC_CFGGEN_PROFILE', None)
+            shutil.rmtree(profile_dir)
+
     # FIXME: This test depends heavily on the ordering of the interfaces and
     # it is not at all intuitive what that ordering should be. Could make it
     # more robust by adding better parsing logic.
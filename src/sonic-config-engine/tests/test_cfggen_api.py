@@ -0,0 +1,98 @@
+from unittest import TestCase
+import copy
+import json
+import os
+import subprocess
+from collections import OrderedDict
+from StringIO import StringIO
+
+import sonic_cfggen
+
+
+class TestCfgGenApi(TestCase):
+
+    def setUp(self):
+        self.test_dir = os.path.dirname(os.path.realpath(__file__))
+        self.script_file = os.path.join(self.test_dir, '..', 'sonic-cfggen')
+        self.t0_minigraph = os.path.join(self.test_dir, 't0-sample-graph.xml')
+        self.t0_port_config = os.path.join(self.test_dir, 't0-sample-port-config.ini')
+        self.sources = {'minigraph': self.t0_minigraph, 'port_config': self.t0_port_config}
+        self.cli_sources = '-m ' + self.t0_minigraph + ' -p ' + self.t0_port_config
+
+    def run_script(self, argument):
+        return subprocess.check_output(self.script_file + ' ' + argument, stderr=open(os.devnull, 'w'), shell=True)
+
+    def test_expression(self):
+        expr = "DEVICE_METADATA['localhost']['hwsku']"
+        output = self.run_script(self.cli_sources + ' -v "' + expr + '"')
+        self.assertEqual(sonic_cfggen.generate(expr=expr, **self.sources), output.rstrip('\n'))
+
+    def test_template(self):
+        template = os.path.join(self.test_dir, '..', '..', '..', 'dockers', 'docker-fpm-quagga', 'bgpd.conf.j2')
+        with open(os.path.join(self.test_dir, 'sample_output', 'bgpd_quagga.conf')) as f:
+            expected = f.read()
+        self.assertEqual(sonic_cfggen.generate(template=template, **self.sources) + '\n', expected)
+
+    def test_layering(self):
+        # Like on the command line, yaml files override the minigraph and additional data overrides both
+        sources = dict(self.sources, yaml=[os.path.join(self.test_dir, 'test.yml')],
+                       additional_data={'DEVICE_METADATA': {'localhost': {'hostname': 'api-host'}}, 'yml_item': 'overridden'})
+        data = sonic_cfggen.generate(**sources)
+        self.assertEqual(data['yml_item'], 'overridden')
+        self.assertEqual(data['DEVICE_METADATA']['localhost']['hostname'], 'api-host')
+        self.assertEqual(data['DEVICE_METADATA']['localhost']['hwsku'], 'Force10-S6000')
+
+        cli_data = json.loads(self.run_script(self.cli_sources + ' --print-data --no-cache'))
+        data = sonic_cfggen.FormatConverter.to_serialized(sonic_cfggen.generate(**self.sources))
+        self.assertEqual(json.loads(json.dumps(data, cls=sonic_cfggen.minigraph_encoder)), cli_data)
+
+    def test_reuse_data(self):
+        data = sonic_cfggen.load_data(sonic_cfggen.get_sources(**self.sources))
+        template = os.path.join(self.test_dir, 'test.j2')
+        self.assertEqual(sonic_cfggen.evaluate("DEVICE_METADATA['localhost']['hostname']", data), 'switch-t0')
+        self.assertEqual(sonic_cfggen.render(template, dict(data, yml_item=['a', 'b'])), 'a\nb\n')
+
+    def test_bad_arguments(self):
+        self.assertRaises(TypeError, sonic_cfggen.get_sources, mini_graph=self.t0_minigraph)
+        self.assertRaises(ValueError, sonic_cfggen.generate, template='test.j2', expr='x')
+
+    def assert_streamed(self, data, lookup_key=None):
+        expected = json.dumps(sonic_cfggen.FormatConverter.to_serialized(copy.deepcopy(data), lookup_key),
+                              indent=4, cls=sonic_cfggen.minigraph_encoder) + '\n'
+        unchanged = copy.deepcopy(data)
+        stream = StringIO()
+        sonic_cfggen.print_serialized(data, lookup_key, stream=stream, buffer_size=16)
+        self.assertEqual(stream.getvalue(), expected)
+        self.assertEqual(data, unchanged)
+
+    def test_print_serialized(self):
+        self.assert_streamed(sonic_cfggen.generate(**self.sources))
+        self.assert_streamed({
+            'VLAN_MEMBER': {('Vlan1000', 'Ethernet8'): {'tagging_mode': 'untagged'}, 'Vlan1000|Ethernet4': {},
+                            ('Vlan1000', 'Ethernet12'): {'tagging_mode': 'tagged'}},
+            'PORT': {u'Ethernet10': {u'lanes': u'10', 'mtu': 9100}, 'Ethernet2': {'lanes': '2'}},
+            'EMPTY': {},
+            'ordered': OrderedDict([('z', [1, {'b': 2, 'a': None}]), ('a', 1.5)]),
+            'list': ['x', {'y': True}],
+            'SAME_KEY': {('Vlan1', 'Ethernet0'): {'a': '1'}, 'Vlan1|Ethernet0': {'b': '2'}, 'Vlan1|Ethernet1': {}},
+            'SAME_ORDER': {'Ethernet1': {'a': '1'}, 'Ethernet01': {'b': '2'}, 'Ethernet001': {}},
+        })
+        self.assert_streamed(['not', 'a', 'dict'])
+        self.assert_streamed({})
+
+    def test_print_serialized_lookup(self):
+        data = {('Vlan1000', 'Ethernet8'): {'tagging_mode': 'untagged'}, ('Vlan1000', 'Ethernet4'): {'tagging_mode': 'tagged'}}
+        self.assert_streamed(data, 'Vlan1000|Ethernet4')
+        self.assert_streamed(data, 'Vlan2000|Ethernet4')
+
+    def test_print_serialized_lookup_first_match(self):
+        data = dict(((u'Vlan1000', u'Ethernet{}'.format(i)), {'tagging_mode': 'untagged'}) for i in range(0, 160, 4))
+        data.update(((u'Ethernet0', u'10.0.0.{}/31'.format(i)), {}) for i in range(40))
+        for lookup_key in ('Vlan1000', 'Ethernet0', 'Ethernet100', '10.0.0.21/31'):
+            self.assert_streamed(data, lookup_key)
+        stream = StringIO()
+        sonic_cfggen.print_serialized(data, 'Ethernet0', stream=stream)
+        self.assertEqual(json.loads(stream.getvalue()), {'Ethernet0|10.0.0.0/31': {}})
+        stream = StringIO()
+        sonic_cfggen.print_serialized(data, 'Vlan1000', stream=stream)
+        self.assertEqual(json.loads(stream.getvalue()), {'Vlan1000|Ethernet0': {'tagging_mode': 'untagged'}})
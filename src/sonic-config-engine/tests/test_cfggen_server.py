@@ -0,0 +1,207 @@
+from unittest import TestCase
+import Queue
+import subprocess
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import configdb_snapshot
+import sonic_cfggen
+
+
+class TestCfgGenServer(TestCase):
+
+    def setUp(self):
+        self.test_dir = os.path.dirname(os.path.realpath(__file__))
+        self.script_file = os.path.join(self.test_dir, '..', 'sonic-cfggen')
+        self.client_file = os.path.join(self.test_dir, '..', 'sonic-cfggen-client')
+        self.sample_graph_simple = os.path.join(self.test_dir, 'simple-sample-graph.xml')
+        self.port_config = os.path.join(self.test_dir, 't0-sample-port-config.ini')
+        self.socket_path = os.path.join(tempfile.mkdtemp(), 'cfggen.sock')
+        self.server = subprocess.Popen([self.script_file, '--server', self.socket_path])
+        for _ in range(100):
+            if os.path.exists(self.socket_path):
+                break
+            time.sleep(0.1)
+
+    def tearDown(self):
+        self.server.kill()
+        self.server.wait()
+        os.remove(self.socket_path)
+        os.rmdir(os.path.dirname(self.socket_path))
+
+    def run_client(self, argument, socket_path=None):
+        env = dict(os.environ, SONIC_CFGGEN_SOCKET=socket_path or self.socket_path)
+        return subprocess.check_output(self.client_file + ' ' + argument, shell=True, env=env)
+
+    def run_script(self, argument):
+        return subprocess.check_output(self.script_file + ' ' + argument, shell=True)
+
+    def test_server_expression(self):
+        argument = '-a \'{"key1":"value1"}\' -v key1'
+        self.assertEqual(self.run_client(argument).strip(), 'value1')
+
+    def test_server_same_output_as_script(self):
+        for argument in ['-m "' + self.sample_graph_simple + '" -p "' + self.port_config + '" --var-json VLAN_MEMBER',
+                         '-m "' + self.sample_graph_simple + '" -p "' + self.port_config + '" -v PORTCHANNEL',
+                         '-y test.yml -t test.j2']:
+            os.chdir(self.test_dir)
+            self.assertEqual(self.run_client(argument), self.run_script(argument))
+
+    def test_server_exit_code(self):
+        with self.assertRaises(subprocess.CalledProcessError) as cm:
+            self.run_client('--no-such-option')
+        self.assertEqual(cm.exception.returncode, 2)
+
+    def test_client_fallback(self):
+        # Without a server the client runs sonic-cfggen itself
+        env_path = os.path.dirname(os.path.realpath(self.script_file)) + os.pathsep + os.environ.get('PATH', '')
+        output = subprocess.check_output(self.client_file + ' -a \'{"key1":"value1"}\' -v key1', shell=True,
+                                         env=dict(os.environ, PATH=env_path, SONIC_CFGGEN_SOCKET=self.socket_path + '.none'))
+        self.assertEqual(output.strip(), 'value1')
+
+    def test_client_timeout(self):
+        # A server not answering within SONIC_CFGGEN_TIMEOUT is given up on, the request is not run again
+        socket_path = self.socket_path + '.stalled'
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(socket_path)
+        server.listen(1)
+        try:
+            env_path = os.path.dirname(os.path.realpath(self.script_file)) + os.pathsep + os.environ.get('PATH', '')
+            client = subprocess.Popen(self.client_file + ' -a \'{"key1":"value1"}\' -v key1', shell=True,
+                                      stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                      env=dict(os.environ, PATH=env_path, SONIC_CFGGEN_SOCKET=socket_path, SONIC_CFGGEN_TIMEOUT='0.5'))
+            (output, error) = client.communicate()
+            self.assertEqual(client.returncode, 1)
+            self.assertEqual(output, '')
+            self.assertIn('timed out', error)
+        finally:
+            server.close()
+            os.remove(socket_path)
+
+    def test_client_no_reply(self):
+        # A server closing the connection may have run part of the request, it is not run again
+        socket_path = self.socket_path + '.closing'
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(socket_path)
+        server.listen(1)
+        def close_connection():
+            conn, _ = server.accept()
+            conn.recv(65536)
+            conn.close()
+        closer = threading.Thread(target=close_connection)
+        closer.start()
+        try:
+            env_path = os.path.dirname(os.path.realpath(self.script_file)) + os.pathsep + os.environ.get('PATH', '')
+            client = subprocess.Popen(self.client_file + ' -a \'{"key1":"value1"}\' -v key1', shell=True,
+                                      stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                      env=dict(os.environ, PATH=env_path, SONIC_CFGGEN_SOCKET=socket_path))
+            (output, error) = client.communicate()
+            self.assertEqual(client.returncode, 1)
+            self.assertEqual(output, '')
+            self.assertIn('no reply from the server', error)
+        finally:
+            closer.join()
+            server.close()
+            os.remove(socket_path)
+
+
+class FakePubSub(object):
+
+    def __init__(self):
+        self.messages = Queue.Queue()
+        self.subscribing = threading.Event()
+        self.subscribing.set()
+
+    def psubscribe(self, pattern):
+        self.subscribing.wait()
+
+    def listen(self):
+        while True:
+            yield self.messages.get()
+
+
+class FakeConfigDBConnector(object):
+    db_name = 'CONFIG_DB'
+
+    def __init__(self):
+        self.subscriber = FakePubSub()
+        self.keyspace_events = 'AKE'
+
+    def get_redis_client(self, db_name):
+        return self
+
+    def pubsub(self):
+        return self.subscriber
+
+    def config_get(self, pattern):
+        return {'notify-keyspace-events': self.keyspace_events}
+
+    def get_dbid(self, db_name):
+        return 4
+
+
+class TestConfigDBCache(TestCase):
+
+    def setUp(self):
+        self.configdb = FakeConfigDBConnector()
+        self.snapshots = []
+        self.on_snapshot = None
+        self.saved = (sonic_cfggen.connect_config_db, configdb_snapshot.get_config_snapshot)
+        sonic_cfggen.connect_config_db = lambda namespace, db_kwargs: self.configdb
+        configdb_snapshot.get_config_snapshot = self.get_config_snapshot
+
+    def tearDown(self):
+        (sonic_cfggen.connect_config_db, configdb_snapshot.get_config_snapshot) = self.saved
+
+    def get_config_snapshot(self, client):
+        self.snapshots.append(client)
+        if self.on_snapshot:
+            self.on_snapshot()
+        return {'PORT': {'Ethernet{}'.format(len(self.snapshots)): {}}}
+
+    def wait(self, condition):
+        for _ in range(100):
+            if condition():
+                return
+            time.sleep(0.01)
+        self.fail('the watcher did not catch up')
+
+    def notify(self, cached_db):
+        generation = cached_db.generation
+        self.configdb.subscriber.messages.put({'type': 'pmessage'})
+        self.wait(lambda: cached_db.generation > generation)
+
+    def test_change_while_reading(self):
+        cached_db = sonic_cfggen._CachedConfigDB(None, {})
+        self.wait(lambda: cached_db.watching)
+        # Data read while a change happens is returned but not kept
+        self.on_snapshot = lambda: self.notify(cached_db)
+        self.assertEqual(cached_db.get_config(), {'PORT': {'Ethernet1': {}}})
+        self.assertIsNone(cached_db.data)
+        self.on_snapshot = None
+        self.assertEqual(cached_db.get_config(), {'PORT': {'Ethernet2': {}}})
+        self.assertEqual(cached_db.get_config(), {'PORT': {'Ethernet2': {}}})
+        self.assertEqual(len(self.snapshots), 2)
+        self.notify(cached_db)
+        self.assertEqual(cached_db.get_config(), {'PORT': {'Ethernet3': {}}})
+
+    def test_read_before_subscription(self):
+        # Changes made before the subscription are not seen, so neither is data read then kept
+        self.configdb.subscriber.subscribing.clear()
+        cached_db = sonic_cfggen._CachedConfigDB(None, {})
+        self.on_snapshot = lambda: (self.configdb.subscriber.subscribing.set(), self.wait(lambda: cached_db.watching))
+        self.assertEqual(cached_db.get_config(), {'PORT': {'Ethernet1': {}}})
+        self.assertIsNone(cached_db.data)
+
+    def test_keyspace_events_disabled(self):
+        # Without notifications of the changes, nothing is kept
+        self.configdb.keyspace_events = ''
+        cached_db = sonic_cfggen._CachedConfigDB(None, {})
+        self.wait(lambda: cached_db.generation > 0)
+        self.assertFalse(cached_db.watching)
+        self.assertEqual(cached_db.get_config(), {'PORT': {'Ethernet1': {}}})
+        self.assertEqual(cached_db.get_config(), {'PORT': {'Ethernet2': {}}})
+        self.assertIsNone(cached_db.data)
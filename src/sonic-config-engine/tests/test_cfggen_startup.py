@@ -0,0 +1,20 @@
+from unittest import TestCase
+import json
+import os
+import subprocess
+import sys
+
+
+class TestCfgGenStartup(TestCase):
+
+    def setUp(self):
+        self.test_dir = os.path.dirname(os.path.realpath(__file__))
+        self.bench_file = os.path.join(self.test_dir, '..', 'benchmarks', 'bench_cfggen_startup.py')
+
+    def test_imports_per_mode(self):
+        # The start time depends on the machine, the modules imported by each mode do not
+        output = subprocess.check_output([sys.executable, self.bench_file, '--imports-only', '--json'])
+        results = json.loads(output)
+        self.assertTrue(results)
+        for result in results:
+            self.assertEqual(result['unexpected_modules'], [], '%s imports %s' % (result['mode'], ', '.join(result['unexpected_modules'])))
@@ -0,0 +1,184 @@
+from unittest import TestCase
+
+import redis
+
+import configdb_delta
+from configdb_delta import compute_delta
+
+
+class FakePipeline(object):
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+        self.watched = None
+
+    def watch(self, *keys):
+        self.watched = dict((key, self.client.versions.get(key, 0)) for key in keys)
+
+    def multi(self):
+        pass
+
+    def reset(self):
+        self.commands = []
+        self.watched = None
+
+    def hgetall(self, key):
+        self.commands.append(lambda: dict(self.client.data.get(key, {})))
+
+    def delete(self, key):
+        self.commands.append(lambda: self.client.delete(key))
+
+    def hmset(self, key, fields):
+        self.commands.append(lambda: self.client.hmset(key, fields))
+
+    def hdel(self, key, *fields):
+        self.commands.append(lambda: self.client.hdel(key, *fields))
+
+    def execute(self, raise_on_error=True):
+        if self.watched is not None:
+            if self.client.on_exec:
+                self.client.on_exec.pop(0)(self.client)
+            if any(self.client.versions.get(key, 0) != version for key, version in self.watched.items()):
+                raise redis.exceptions.WatchError('Watched variable changed.')
+        return [command() for command in self.commands]
+
+
+class FakeRedis(object):
+    """Hashes of a redis database with a version per key, changed by other writers in on_exec"""
+
+    def __init__(self, data):
+        self.data = data
+        self.versions = {}
+        self.on_exec = []
+
+    def scan_iter(self, match, count):
+        prefix = match.rstrip('*')
+        return iter([key for key in self.data if key.startswith(prefix)])
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        def run(args):
+            raise redis.exceptions.ResponseError('scripting disabled')
+        return run
+
+    def touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def delete(self, key):
+        self.data.pop(key, None)
+        self.touch(key)
+
+    def hmset(self, key, fields):
+        self.data.setdefault(key, {}).update(fields)
+        self.touch(key)
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.data[key].pop(field, None)
+        self.touch(key)
+
+
+class TestConfigDbDelta(TestCase):
+
+    def setUp(self):
+        self.current = {
+            'PORT|Ethernet0': {'alias': 'etp1', 'mtu': '9100'},
+            'PORT|Ethernet4': {'alias': 'etp2', 'mtu': '9100'},
+            'VLAN|Vlan1000': {'vlanid': '1000', 'members@': 'Ethernet0,Ethernet4'},
+            'INTERFACE|Ethernet0|10.0.0.0/31': {'NULL': 'NULL'},
+        }
+
+    def test_unchanged(self):
+        data = {
+            'PORT': {'Ethernet0': {'alias': 'etp1', 'mtu': 9100}},
+            'VLAN': {'Vlan1000': {'vlanid': '1000', 'members': ['Ethernet0', 'Ethernet4']}},
+            'INTERFACE': {('Ethernet0', '10.0.0.0/31'): {}},
+        }
+        delta = compute_delta(self.current, data)
+        self.assertEqual(len(delta), 0)
+        self.assertEqual(delta.summary, {})
+
+    def test_merge(self):
+        data = {
+            'PORT': {
+                'Ethernet0': {'mtu': '1500'},
+                'Ethernet4': None,
+                'Ethernet8': {'alias': 'etp3'},
+            },
+            'VLAN': {'Vlan1000': {'members': ['Ethernet0']}},
+        }
+        delta = compute_delta(self.current, data)
+        self.assertEqual(delta.set_fields, {
+            'PORT|Ethernet0': {'mtu': '1500'},
+            'PORT|Ethernet8': {'alias': 'etp3'},
+            'VLAN|Vlan1000': {'members@': 'Ethernet0'},
+        })
+        self.assertEqual(delta.del_keys, {'PORT|Ethernet4'})
+        self.assertEqual(delta.del_fields, {})
+        self.assertEqual(delta.summary, {
+            'PORT': {'added': 1, 'modified': 1, 'deleted': 1},
+            'VLAN': {'added': 0, 'modified': 1, 'deleted': 0},
+        })
+
+    def test_replace(self):
+        data = {
+            'PORT': {'Ethernet0': {'alias': 'etp1'}},
+            'VLAN': {'Vlan1000': {'vlanid': '1000', 'members': ['Ethernet0', 'Ethernet4']}},
+        }
+        delta = compute_delta(self.current, data, replace=True)
+        self.assertEqual(delta.set_fields, {})
+        self.assertEqual(delta.del_fields, {'PORT|Ethernet0': ['mtu']})
+        self.assertEqual(delta.del_keys, {'PORT|Ethernet4', 'INTERFACE|Ethernet0|10.0.0.0/31'})
+        self.assertEqual(delta.format_summary(),
+                         'INTERFACE: 0 added, 0 modified, 1 deleted\n'
+                         'PORT: 0 added, 1 modified, 1 deleted')
+
+    def test_delete_table(self):
+        delta = compute_delta(self.current, {'PORT': None})
+        self.assertEqual(delta.del_keys, {'PORT|Ethernet0', 'PORT|Ethernet4'})
+
+
+class TestWriteConfigDelta(TestCase):
+
+    def setUp(self):
+        self.client = FakeRedis({
+            'PORT|Ethernet0': {'alias': 'etp1', 'mtu': '9100'},
+            'PORT|Ethernet4': {'alias': 'etp2', 'mtu': '9100'},
+        })
+
+    def test_write(self):
+        delta = configdb_delta.write_config_delta(self.client, {'PORT': {'Ethernet0': {'mtu': '1500'}}})
+        self.assertEqual(delta.summary, {'PORT': {'added': 0, 'modified': 1, 'deleted': 0}})
+        self.assertEqual(self.client.data['PORT|Ethernet0'], {'alias': 'etp1', 'mtu': '1500'})
+        self.assertEqual(self.client.versions, {'PORT|Ethernet0': 1})
+
+    def test_changed_after_watch(self):
+        # Another writer deleting the entry before EXEC makes it written again in full
+        self.client.on_exec.append(lambda client: client.delete('PORT|Ethernet4'))
+        delta = configdb_delta.write_config_delta(self.client, {'PORT': {'Ethernet4': {'alias': 'etp2', 'mtu': '1500'}}})
+        self.assertEqual(delta.summary, {'PORT': {'added': 1, 'modified': 0, 'deleted': 0}})
+        self.assertEqual(self.client.data['PORT|Ethernet4'], {'alias': 'etp2', 'mtu': '1500'})
+
+    def test_changed_before_watch(self):
+        # Another writer deleting the entry after it was read, the delta is computed again
+        compute = configdb_delta.compute_delta
+        def compute_then_change(current, data, replace=False):
+            configdb_delta.compute_delta = compute
+            self.client.delete('PORT|Ethernet0')
+            return compute(current, data, replace)
+        configdb_delta.compute_delta = compute_then_change
+        try:
+            delta = configdb_delta.write_config_delta(self.client, {'PORT': {'Ethernet0': {'alias': 'etp1', 'mtu': '1500'}}})
+        finally:
+            configdb_delta.compute_delta = compute
+        self.assertEqual(delta.set_fields, {'PORT|Ethernet0': {'alias': 'etp1', 'mtu': '1500'}})
+        self.assertEqual(self.client.data['PORT|Ethernet0'], {'alias': 'etp1', 'mtu': '1500'})
+
+    def test_retries(self):
+        self.client.on_exec = [lambda client: client.touch('PORT|Ethernet0')] * configdb_delta.WRITE_RETRIES
+        with self.assertRaises(redis.exceptions.WatchError):
+            configdb_delta.write_config_delta(self.client, {'PORT': {'Ethernet0': {'mtu': '1500'}}})
+        self.assertEqual(self.client.data['PORT|Ethernet0'], {'alias': 'etp1', 'mtu': '9100'})
@@ -0,0 +1,157 @@
+from unittest import TestCase
+
+import redis
+
+import configdb_snapshot
+
+
+def cjson_encode(hashes):
+    """Encode like the cjson of the redis Lua scripts, which copies the bytes of the strings as they are"""
+    return '{' + ','.join('"%s":{%s}' % (key, ','.join('"%s":"%s"' % field for field in sorted(raw_data.items())))
+                          for key, raw_data in sorted(hashes.items())) + '}'
+
+
+class FakePipeline(object):
+
+    def __init__(self, client):
+        self.client = client
+        self.keys = []
+
+    def hgetall(self, key):
+        self.keys.append(key)
+
+    def execute(self, raise_on_error=True):
+        self.client.round_trips += 1
+        results = []
+        for key in self.keys:
+            value = self.client.data.get(key, {})
+            if not isinstance(value, dict):
+                value = redis.exceptions.ResponseError('WRONGTYPE Operation against a key holding the wrong kind of value')
+            results.append(value)
+        return results
+
+
+class FakeRedis(object):
+    """Keys of a redis database, SCAN returning them in pages of count keys"""
+
+    def __init__(self, data, scripting=True):
+        self.data = data
+        self.scripting = scripting
+        self.round_trips = 0
+        self.matches = []
+
+    def _scan(self, cursor, match, count):
+        if int(cursor) == 0:
+            self.matches.append(match)
+        keys = sorted(key for key in self.data if key.startswith(match.rstrip('*')))
+        cursor = int(cursor)
+        page = keys[cursor:cursor + count]
+        next_cursor = cursor + count if cursor + count < len(keys) else 0
+        return (next_cursor, page)
+
+    def scan_iter(self, match, count):
+        cursor = 0
+        while True:
+            (cursor, page) = self._scan(cursor, match, count)
+            for key in page:
+                yield key
+            if cursor == 0:
+                break
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        def run(args):
+            self.round_trips += 1
+            if not self.scripting:
+                raise redis.exceptions.ResponseError('NOSCRIPT scripting is disabled')
+            (cursor, page) = self._scan(args[0], args[1], args[2])
+            tables = args[3:]
+            hashes = dict((key, self.data[key]) for key in page if isinstance(self.data[key], dict) and self.data[key]
+                          and (not tables or key.split('|')[0] in tables))
+            return [str(cursor), cjson_encode(hashes)]
+        return run
+
+
+class TestConfigDBSnapshot(TestCase):
+
+    def setUp(self):
+        self.data = dict(('PORT|Ethernet{}'.format(i), {'alias': 'etp{}'.format(i), 'lanes@': '{0},{1}'.format(i, i + 1)})
+                         for i in range(0, 40, 4))
+        self.data.update(('VLAN_MEMBER|Vlan1000|Ethernet{}'.format(i), {'tagging_mode': 'untagged'}) for i in range(0, 40, 4))
+        self.data['LOOPBACK_INTERFACE|Loopback0'] = {'NULL': 'NULL'}
+        self.data['PORTCHANNEL|PortChannel01'] = {'mtu': '9100'}
+        # Not table entries
+        self.data['CONFIG_DB_INITIALIZED'] = '1'
+        self.data['VLAN|Vlan1000'] = 'not a hash'
+
+    def test_scan_hashes(self):
+        client = FakeRedis(self.data)
+        hashes = dict(configdb_snapshot.scan_hashes(client, ['PORT', 'LOOPBACK_INTERFACE'], count=3))
+        self.assertEqual(sorted(hashes), ['LOOPBACK_INTERFACE|Loopback0'] + sorted('PORT|Ethernet{}'.format(i) for i in range(0, 40, 4)))
+        self.assertEqual(hashes['PORT|Ethernet8'], {'alias': 'etp8', 'lanes@': '8,9'})
+        # A single pass over all the keys for several tables, one script call per page
+        self.assertEqual(client.matches, ['*'])
+        self.assertEqual(client.round_trips, 8)
+        hashes = dict(configdb_snapshot.scan_hashes(client, ['PORT'], count=3))
+        self.assertEqual(len(hashes), 10)
+        self.assertEqual(client.matches, ['*', 'PORT|*'])
+        self.assertEqual(dict(configdb_snapshot.scan_hashes(client, [])), {})
+        hashes = dict(configdb_snapshot.scan_hashes(client))
+        self.assertEqual(len(hashes), 22)
+        self.assertNotIn('CONFIG_DB_INITIALIZED', hashes)
+        self.assertNotIn('VLAN|Vlan1000', hashes)
+
+    def test_scan_keys(self):
+        client = FakeRedis(self.data)
+        keys = list(configdb_snapshot.scan_keys(client, ['VLAN_MEMBER', 'PORTCHANNEL', 'VLAN']))
+        self.assertEqual(sorted(keys), sorted(['PORTCHANNEL|PortChannel01', 'VLAN|Vlan1000'] +
+                                              ['VLAN_MEMBER|Vlan1000|Ethernet{}'.format(i) for i in range(0, 40, 4)]))
+        self.assertEqual(len(list(configdb_snapshot.scan_keys(client, ['PORT']))), 10)
+        self.assertEqual(len(list(configdb_snapshot.scan_keys(client))), 23)
+        self.assertEqual(list(configdb_snapshot.scan_keys(client, [])), [])
+        self.assertEqual(client.matches, ['*', 'PORT|*', '*'])
+
+    def test_read_hashes(self):
+        client = FakeRedis(self.data)
+        keys = ['PORT|Ethernet{}'.format(i) for i in range(0, 40, 4)] + ['VLAN|Vlan1000', 'PORT|Ethernet1']
+        hashes = list(configdb_snapshot.read_hashes(client, keys, batch_size=4))
+        # Keys gone or not hashes are skipped
+        self.assertEqual([key for (key, _) in hashes], keys[:10])
+        self.assertEqual(hashes[0][1], {'alias': 'etp0', 'lanes@': '0,1'})
+        self.assertEqual(client.round_trips, 3)
+        self.assertEqual(list(configdb_snapshot.read_hashes(client, [])), [])
+
+    def test_add_entries(self):
+        data = {'PORT': {'Ethernet0': {'mtu': '9100'}}}
+        configdb_snapshot.add_entries(data, [
+            ('PORT|Ethernet4', {'alias': 'etp4', 'lanes@': '4,5'}),
+            ('VLAN_MEMBER|Vlan1000|Ethernet4', {'tagging_mode': 'untagged'}),
+            ('LOOPBACK_INTERFACE|Loopback0', {'NULL': 'NULL'}),
+            ('LOOPBACK_INTERFACE|Loopback0|10.1.0.32/32', {'NULL': 'NULL'}),
+        ])
+        self.assertEqual(data, {
+            'PORT': {'Ethernet0': {'mtu': '9100'}, 'Ethernet4': {'alias': 'etp4', 'lanes': ['4', '5']}},
+            'VLAN_MEMBER': {('Vlan1000', 'Ethernet4'): {'tagging_mode': 'untagged'}},
+            'LOOPBACK_INTERFACE': {'Loopback0': {}, ('Loopback0', '10.1.0.32/32'): {}},
+        })
+
+    def test_snapshot(self):
+        expected = configdb_snapshot.add_entries({}, configdb_snapshot.read_hashes(
+            FakeRedis(self.data), configdb_snapshot.scan_keys(FakeRedis(self.data))))
+        self.assertEqual(len(expected), 4)
+        self.assertEqual(configdb_snapshot.get_config_snapshot(FakeRedis(self.data), batch_size=5), expected)
+        self.assertEqual(configdb_snapshot.get_config_snapshot(FakeRedis(self.data), ['VLAN_MEMBER', 'VLAN']),
+                         {'VLAN_MEMBER': expected['VLAN_MEMBER']})
+
+    def test_fallback(self):
+        expected = configdb_snapshot.get_config_snapshot(FakeRedis(self.data))
+        # Scripting disabled
+        client = FakeRedis(self.data, scripting=False)
+        self.assertEqual(configdb_snapshot.get_config_snapshot(client), expected)
+        # A field value that is not UTF-8 makes the json of the script invalid
+        self.data['PORT|Ethernet4']['description'] = 'port \xff'
+        snapshot = configdb_snapshot.get_config_snapshot(FakeRedis(self.data))
+        self.assertEqual(snapshot['PORT']['Ethernet4']['description'], 'port \xff')
+        self.assertEqual(snapshot['PORT']['Ethernet0'], expected['PORT']['Ethernet0'])
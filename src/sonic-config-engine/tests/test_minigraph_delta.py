@@ -0,0 +1,52 @@
+from unittest import TestCase
+import os
+import re
+import shutil
+import tempfile
+
+import minigraph_delta
+
+
+class TestMinigraphDelta(TestCase):
+
+    def setUp(self):
+        self.test_dir = os.path.dirname(os.path.realpath(__file__))
+        self.sample_graph = os.path.join(self.test_dir, 't0-sample-graph.xml')
+        self.port_config = os.path.join(self.test_dir, 't0-sample-port-config.ini')
+        self.work_dir = tempfile.mkdtemp()
+        with open(self.sample_graph) as f:
+            self.graph = f.read()
+        self.old_data = self.parse(self.graph)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def parse(self, graph):
+        filename = os.path.join(self.work_dir, 'minigraph.xml')
+        with open(filename, 'w') as f:
+            f.write(graph)
+        return minigraph_delta.parse_minigraph(filename, port_config_file=self.port_config)
+
+    def test_no_change(self):
+        delta = minigraph_delta.compute_minigraph_delta(self.old_data, self.parse(self.graph))
+        self.assertEqual(len(delta), 0)
+        self.assertEqual(minigraph_delta.get_affected_artifacts(delta), [])
+
+    def test_modified_fields(self):
+        graph = re.sub(r'<a:ASN>64600</a:ASN>(\s*<a:Hostname>ARISTA01T1)', r'<a:ASN>64601</a:ASN>\1', self.graph)
+        delta = minigraph_delta.compute_minigraph_delta(self.old_data, self.parse(graph))
+        self.assertEqual(delta.set_fields, {
+            'BGP_NEIGHBOR|10.0.0.57': {'asn': '64601'},
+            'BGP_NEIGHBOR|fc00::72': {'asn': '64601'},
+        })
+        self.assertEqual(delta.del_keys, set())
+        self.assertEqual(minigraph_delta.get_affected_artifacts(delta), ['bgpd'])
+        self.assertEqual(minigraph_delta.get_affected_artifacts(delta, {'acl': ['ACL_TABLE'], 'any': None}), ['any'])
+
+    def test_replaced_entries(self):
+        graph = self.graph.replace('10.0.0.57', '10.0.0.99')
+        delta = minigraph_delta.compute_minigraph_delta(self.old_data, self.parse(graph))
+        self.assertEqual(delta.del_keys, set(['BGP_NEIGHBOR|10.0.0.57']))
+        self.assertEqual(sorted(delta.set_fields), ['BGP_NEIGHBOR|10.0.0.99'])
+        self.assertEqual(delta.set_fields['BGP_NEIGHBOR|10.0.0.99']['name'], 'ARISTA01T1')
+        self.assertEqual(delta.summary, {'BGP_NEIGHBOR': {'added': 1, 'modified': 0, 'deleted': 1}})
@@ -0,0 +1,68 @@
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+import minigraph
+
+HEADER = '  <Hostname>switch-t0</Hostname>\n  <HwSku>Force10-S6000</HwSku>\n'
+
+
+class TestMinigraphParse(TestCase):
+
+    def setUp(self):
+        self.test_dir = os.path.dirname(os.path.realpath(__file__))
+        self.sample_graph = os.path.join(self.test_dir, 't0-sample-graph.xml')
+        self.port_config = os.path.join(self.test_dir, 't0-sample-port-config.ini')
+        self.work_dir = tempfile.mkdtemp()
+        with open(self.sample_graph) as f:
+            self.graph = f.read()
+        self.assertIn(HEADER, self.graph)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def write(self, graph):
+        filename = os.path.join(self.work_dir, 'minigraph.xml')
+        with open(filename, 'w') as f:
+            f.write(graph)
+        return filename
+
+    def parse_dom(self, filename):
+        (header, sections) = minigraph.read_minigraph(filename)
+        return minigraph.parse_sections(sections, header, port_config_file=self.port_config)
+
+    def assert_same_as_dom(self, filename):
+        self.assertEqual(minigraph.parse_xml(filename, port_config_file=self.port_config), self.parse_dom(filename))
+
+    def test_header_last(self):
+        self.assert_same_as_dom(self.sample_graph)
+
+    def test_one_pass(self):
+        iterparse = minigraph.ET.iterparse
+        files = []
+        def counting_iterparse(source, *args, **kwargs):
+            files.append(source)
+            return iterparse(source, *args, **kwargs)
+        minigraph.ET.iterparse = counting_iterparse
+        try:
+            minigraph.parse_xml(self.sample_graph, port_config_file=self.port_config)
+        finally:
+            minigraph.ET.iterparse = iterparse
+        self.assertEqual(files, [self.sample_graph])
+
+    def test_header_first(self):
+        # The sections after the header are streamed
+        graph = self.graph.replace(HEADER, '').replace('>\n  <CpgDec>', '>\n' + HEADER + '  <CpgDec>', 1)
+        filename = self.write(graph)
+        self.assert_same_as_dom(filename)
+        (header, sections) = minigraph.stream_minigraph(filename)
+        self.assertEqual(header, ['Force10-S6000', 'switch-t0', 'separated'])
+
+    def test_routing_config_mode_after_sections(self):
+        graph = self.graph.replace(HEADER, '').replace('>\n  <CpgDec>', '>\n' + HEADER + '  <CpgDec>', 1)
+        graph = graph.replace('</DeviceMiniGraph>', '  <DockerRoutingConfigMode>unified</DockerRoutingConfigMode>\n</DeviceMiniGraph>')
+        filename = self.write(graph)
+        self.assert_same_as_dom(filename)
+        results = minigraph.parse_xml(filename, port_config_file=self.port_config)
+        self.assertEqual(results['DEVICE_METADATA']['localhost']['docker_routing_config_mode'], 'unified')
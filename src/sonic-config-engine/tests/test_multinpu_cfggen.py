@@ -245,3 +245,14 @@ class TestMultiNpuCfgGen(TestCase):
         argument = "-m {} -p {} -n asic3 --var-json \"ACL_TABLE\"".format(self.sample_graph, self.port_config[3])
         output = json.loads(self.run_script(argument))
         self.assertDictEqual(output, {})
+
+    def test_all_namespaces(self):
+        port_config = os.path.join(self.test_data_dir, "sample_port_config-{}.ini")
+        for jobs in [1, NUM_ASIC + 1]:
+            argument = "-m {} -p \"{}\" --all-namespaces --print-data --jobs {}".format(self.sample_graph, port_config, jobs)
+            output = json.loads(self.run_script(argument))
+            self.assertItemsEqual(output.keys(), [''] + ['asic{}'.format(asic) for asic in range(NUM_ASIC)])
+            self.assertEqual(output[''], json.loads(self.run_script("-m {} --print-data".format(self.sample_graph))))
+            for asic in range(NUM_ASIC):
+                expected = json.loads(self.run_script_for_asic("-m {} --print-data".format(self.sample_graph), asic, self.port_config[asic]))
+                self.assertEqual(output['asic{}'.format(asic)], expected)
@@ -0,0 +1,150 @@
+from unittest import TestCase
+import argparse
+import os
+import shutil
+import tempfile
+
+import redis
+
+import sonic_cfggen
+
+TEMPLATES = {
+    'main.j2': "{% include 'included.j2' %}{% import 'macros.j2' as macros %}{{ macros.ports(PORT) }}",
+    'included.j2': "{% for vlan in VLAN %}{{ vlan }}{% endfor %}{% include 'main.j2' %}",
+    'macros.j2': "{% macro ports(table) %}{{ table }}{{ LOOPBACK_INTERFACE }}{% endmacro %}",
+    'child.j2': "{% extends 'base.j2' %}{% block body %}{{ DEVICE_METADATA['localhost']['hostname'] }}{% endblock %}",
+    'base.j2': "{{ MGMT_INTERFACE }}{% block body %}{% endblock %}{% from 'macros.j2' import ports %}",
+    'missing.j2': "{% include 'no_such_file.j2' ignore missing %}{{ ACL_TABLE }}",
+    'dynamic.j2': "{% include DEVICE_METADATA['localhost']['type'] + '.j2' %}",
+    'dynamic_included.j2': "{{ PORT }}{% include 'dynamic.j2' %}",
+    'invalid.j2': "{% for port in PORT %}",
+}
+
+
+class FakePipeline(object):
+
+    def __init__(self, client):
+        self.client = client
+        self.keys = []
+
+    def hgetall(self, key):
+        self.keys.append(key)
+
+    def execute(self, raise_on_error=True):
+        self.client.reads += len(self.keys)
+        return [self.client.hashes.get(key, {}) for key in self.keys]
+
+
+class FakeRedis(object):
+
+    def __init__(self, hashes):
+        self.hashes = hashes
+        self.reads = 0
+
+    def scan_iter(self, match, count):
+        prefix = match.rstrip('*')
+        return iter([key for key in self.hashes if key.startswith(prefix)])
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        def run(args):
+            raise redis.exceptions.ResponseError('scripting disabled')
+        return run
+
+
+class FakeConfigDBConnector(object):
+    db_name = 'CONFIG_DB'
+
+    def __init__(self, client):
+        self.client = client
+
+    def get_redis_client(self, db_name):
+        return self.client
+
+
+class TestNeededTables(TestCase):
+
+    def setUp(self):
+        self.template_dir = tempfile.mkdtemp()
+        for name, source in TEMPLATES.items():
+            with open(os.path.join(self.template_dir, name), 'w') as f:
+                f.write(source)
+
+    def tearDown(self):
+        shutil.rmtree(self.template_dir)
+
+    def template(self, name):
+        return os.path.join(self.template_dir, name)
+
+    def find_tables(self, templates=(), exprs=()):
+        return sonic_cfggen.find_output_tables([self.template(name) for name in templates], self.template_dir, list(exprs))
+
+    def parse_args(self, **kwargs):
+        args = argparse.Namespace(template=None, template_dir=self.template_dir, var=None, var_json=None, export=None,
+                                  write_to_db=False, print_data=False, preset=None)
+        for name, value in kwargs.items():
+            setattr(args, name, value)
+        return args
+
+    def test_chains(self):
+        # Includes, imports and the templates they include themselves, each read once
+        self.assertEqual(self.find_tables(['main.j2']), set(['VLAN', 'PORT', 'LOOPBACK_INTERFACE']))
+        self.assertEqual(self.find_tables(['child.j2']), set(['DEVICE_METADATA', 'MGMT_INTERFACE', 'LOOPBACK_INTERFACE']))
+        self.assertEqual(self.find_tables(['main.j2', 'child.j2']),
+                         set(['VLAN', 'PORT', 'LOOPBACK_INTERFACE', 'DEVICE_METADATA', 'MGMT_INTERFACE']))
+        self.assertEqual(self.find_tables(['missing.j2']), set(['ACL_TABLE']))
+
+    def test_dynamic(self):
+        # Any table can be read by a template only known when rendering
+        self.assertIsNone(self.find_tables(['dynamic.j2']))
+        self.assertIsNone(self.find_tables(['dynamic_included.j2']))
+        self.assertIsNone(self.find_tables(['main.j2', 'dynamic.j2']))
+        self.assertIsNone(self.find_tables(['invalid.j2']))
+
+    def test_expressions(self):
+        self.assertEqual(self.find_tables(exprs=["DEVICE_METADATA['localhost']['hwsku']"]), set(['DEVICE_METADATA']))
+        self.assertEqual(self.find_tables(['macros.j2'], ["PORT|length", "VLAN.keys()|join(',') + LOOPBACK_INTERFACE|string"]),
+                         set(['PORT', 'VLAN', 'LOOPBACK_INTERFACE']))
+
+    def test_needed_tables(self):
+        args = self.parse_args(var="DEVICE_METADATA['localhost']['hwsku']",
+                               export=[('PORTS', 'PORT.keys()|join(" ")'), ('ACL', 'ACL_TABLE|length')])
+        self.assertEqual(sonic_cfggen.find_needed_tables(args), set(['DEVICE_METADATA', 'PORT', 'ACL_TABLE']))
+        args = self.parse_args(template=[(self.template('child.j2'), None)], var_json='VLAN_MEMBER')
+        self.assertEqual(sonic_cfggen.find_needed_tables(args),
+                         set(['DEVICE_METADATA', 'MGMT_INTERFACE', 'LOOPBACK_INTERFACE', 'VLAN_MEMBER']))
+        args = self.parse_args(template=[(self.template('dynamic.j2'), None)], var_json='VLAN_MEMBER')
+        self.assertIsNone(sonic_cfggen.find_needed_tables(args))
+        # Outputs of all the data
+        for kwargs in ({'write_to_db': True}, {'print_data': True}, {'preset': 't1'}):
+            self.assertIsNone(sonic_cfggen.find_needed_tables(self.parse_args(**kwargs)))
+
+    def test_config_tables(self):
+        hashes = dict((u'VLAN_MEMBER|Vlan1000|Ethernet{}'.format(i), {u'tagging_mode': u'untagged'}) for i in range(0, 128, 4))
+        hashes.update((u'INTERFACE|Ethernet0|10.0.0.{}/31'.format(i), {u'NULL': u'NULL'}) for i in range(40))
+        hashes[u'INTERFACE|Ethernet0'] = {u'vrf_name': u'Vrf1'}
+        hashes[u'PORT|Ethernet0'] = {u'alias': u'etp1', u'lanes@': u'0,1'}
+        configdb = FakeConfigDBConnector(FakeRedis(hashes))
+
+        data = sonic_cfggen.get_config_tables(configdb, ['VLAN_MEMBER', 'INTERFACE', 'VLAN'], 'Ethernet0')
+        self.assertEqual(data, {
+            'VLAN_MEMBER': {(u'Vlan1000', u'Ethernet0'): {u'tagging_mode': u'untagged'}},
+            'INTERFACE': {(u'Ethernet0', u'10.0.0.0/31'): {}},
+        })
+        # Only the entry printed is read
+        self.assertEqual(configdb.client.reads, 2)
+
+        data = sonic_cfggen.get_config_tables(configdb, ['INTERFACE', 'PORT'], '10.0.0.21/31')
+        self.assertEqual(data, {'INTERFACE': {(u'Ethernet0', u'10.0.0.21/31'): {}}, 'PORT': {}})
+        data = sonic_cfggen.get_config_tables(configdb, ['PORT'], 'Ethernet0')
+        self.assertEqual(data, {'PORT': {u'Ethernet0': {u'alias': u'etp1', u'lanes': [u'0', u'1']}}})
+
+        # The entry --var-json prints from the whole table
+        tables = sonic_cfggen.get_config_tables(configdb, ['VLAN_MEMBER', 'INTERFACE', 'PORT'])
+        for table in tables:
+            for lookup_key in ('Ethernet0', 'Ethernet4', 'Vlan1000', '10.0.0.39/31', 'Ethernet2'):
+                data = sonic_cfggen.get_config_tables(configdb, [table], lookup_key)
+                self.assertEqual(sonic_cfggen.FormatConverter.to_serialized(data[table], lookup_key),
+                                 sonic_cfggen.FormatConverter.to_serialized(dict(tables[table]), lookup_key))
@@ -0,0 +1,88 @@
+from unittest import TestCase
+import cPickle as pickle
+import copy
+import random
+
+import natsort
+
+from ordered_table import OrderedTable, natural_items
+
+
+class TestOrderedTable(TestCase):
+
+    def setUp(self):
+        keys = ['Ethernet{}'.format(i) for i in range(0, 128, 4)]
+        keys += [('Vlan{}'.format(1000 + i % 3), 'Ethernet{}'.format(i)) for i in range(0, 64, 4)]
+        random.Random(1).shuffle(keys)
+        self.data = dict((key, {'index': str(i)}) for i, key in enumerate(keys))
+
+    def assert_natural(self, table):
+        expected = natsort.natsorted(dict(table).items())
+        self.assertEqual(table.items(), expected)
+        self.assertEqual(list(table), [key for (key, _) in expected])
+        self.assertEqual(table.keys(), [key for (key, _) in expected])
+        self.assertEqual(list(table.itervalues()), [value for (_, value) in expected])
+
+    def test_order(self):
+        table = OrderedTable(self.data)
+        self.assertEqual(table, self.data)
+        self.assert_natural(table)
+        self.assertEqual(table.keys()[:3], ['Ethernet0', 'Ethernet4', 'Ethernet8'])
+        self.assertEqual(natural_items(self.data), natsort.natsorted(self.data.items()))
+
+    def test_changes(self):
+        table = OrderedTable(self.data)
+        self.assert_natural(table)
+        table['Ethernet6'] = {}
+        table[('Vlan999', 'Ethernet0')] = {}
+        del table['Ethernet4']
+        table.pop(('Vlan1000', 'Ethernet0'))
+        table.pop('Ethernet5', None)
+        table.setdefault('Ethernet2', {})
+        self.assert_natural(table)
+        table.update({'Ethernet1': {}})
+        self.assert_natural(table)
+        table.popitem()
+        self.assert_natural(table)
+        table.clear()
+        self.assertEqual(table.items(), [])
+
+    def test_copies(self):
+        table = OrderedTable(self.data)
+        table.sort()
+        for other in (pickle.loads(pickle.dumps(table, pickle.HIGHEST_PROTOCOL)), copy.deepcopy(table), table.copy()):
+            self.assertIs(type(other), OrderedTable)
+            self.assertEqual(other.keys(), table.keys())
+            other['Ethernet3'] = {}
+            del other['Ethernet0']
+            self.assert_natural(other)
+        self.assert_natural(table)
+
+    def test_same_natural_key(self):
+        data = {'Ethernet01': {'index': '2'}, 'Ethernet1': {'index': '1'}, 'Ethernet001': {'index': '3'}}
+        self.assertEqual(natural_items(data), natsort.natsorted(data.items()))
+        table = OrderedTable(data)
+        self.assert_natural(table)
+        table['Ethernet0001'] = {'index': '0'}
+        table['Ethernet2'] = {}
+        self.assert_natural(table)
+        table['Ethernet001'] = {'index': '0'}
+        self.assert_natural(table)
+        del table['Ethernet1']
+        self.assert_natural(table)
+        other = pickle.loads(pickle.dumps(table, pickle.HIGHEST_PROTOCOL))
+        other['Ethernet01'] = {'index': '9'}
+        self.assert_natural(other)
+        # natsorted() orders them by their values when they are strings
+        table = OrderedTable({'Ethernet1': 'a', 'Ethernet01': 'b', 'Ethernet001': 'c'})
+        self.assertEqual(table.keys(), ['Ethernet1', 'Ethernet01', 'Ethernet001'])
+        table['Ethernet1'] = 'd'
+        self.assertEqual(table.keys(), ['Ethernet01', 'Ethernet001', 'Ethernet1'])
+        table['Ethernet0001'] = '0'
+        self.assert_natural(table)
+
+    def test_str_and_unicode_keys(self):
+        # Equal keys, but natsorted() puts str keys before tuples and unicode keys after them
+        for data in ({'Ethernet0': {}, (u'Ethernet0', u'10.0.0.0/31'): {}}, {u'Ethernet0': {}, (u'Ethernet0', u'10.0.0.0/31'): {}}):
+            self.assertEqual(natural_items(data), natsort.natsorted(data.items()))
+            self.assert_natural(OrderedTable(data))
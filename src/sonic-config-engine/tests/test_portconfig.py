@@ -0,0 +1,173 @@
+from unittest import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from Queue import Queue
+
+import portconfig
+
+
+class TestBreakoutEngine(TestCase):
+
+    def setUp(self):
+        self.test_dir = os.path.dirname(os.path.realpath(__file__))
+        self.platform_json = os.path.join(self.test_dir, 'sample_platform.json')
+        self.hwsku_json = os.path.join(self.test_dir, 'sample_hwsku.json')
+
+    def test_default_ports(self):
+        engine = portconfig.get_breakout_engine(self.platform_json, self.hwsku_json)
+        ports = engine.get_default_ports()
+        self.assertEqual(len(ports), 81)
+        self.assertEqual(ports['Ethernet8'], {'index': '3', 'lanes': '8', 'alias': 'Eth3/1', 'admin_status': 'up', 'speed': '25000'})
+        # The same engine is kept while the files do not change
+        self.assertIs(portconfig.get_breakout_engine(self.platform_json, self.hwsku_json), engine)
+
+    def test_child_ports(self):
+        engine = portconfig.get_breakout_engine(self.platform_json)
+        self.assertEqual(engine.get_child_ports('Ethernet0', '2x25G(2)+1x50G(2)'), {
+            'Ethernet0': {'index': '1', 'lanes': '0', 'alias': 'Eth1/1', 'admin_status': 'up', 'speed': '25000'},
+            'Ethernet1': {'index': '1', 'lanes': '1', 'alias': ' Eth1/2', 'admin_status': 'up', 'speed': '25000'},
+            'Ethernet2': {'index': '1', 'lanes': '2,3', 'alias': ' Eth1/3', 'admin_status': 'up', 'speed': '50000'},
+        })
+        self.assertEqual(portconfig.get_child_ports('Ethernet4', '1x100G[40G]', self.platform_json), {
+            'Ethernet4': {'index': '2', 'lanes': '4,5,6,7', 'alias': 'Eth2/1', 'admin_status': 'up', 'speed': '100000'},
+        })
+        # Callers get copies
+        engine.get_child_ports('Ethernet4', '2x50G')['Ethernet4']['speed'] = '10000'
+        self.assertEqual(engine.get_child_ports('Ethernet4', '2x50G')['Ethernet4']['speed'], '50000')
+        self.assertRaises(Exception, engine.get_child_ports, 'Ethernet4', 'fast')
+
+    def test_valid_modes(self):
+        engine = portconfig.get_breakout_engine(self.platform_json)
+        self.assertTrue(engine.is_valid_mode('Ethernet0', '2x25G(2)+1x50G(2)'))
+        self.assertFalse(engine.is_valid_mode('Ethernet4', '2x25G(2)+1x50G(2)'))
+        self.assertFalse(engine.is_valid_mode('Ethernet1', '2x50G'))
+        self.assertEqual(engine.get_supported_modes('Ethernet4'), ['1x100G[40G]', '2x50G', '4x25G[10G]'])
+
+    def test_reload_on_change(self):
+        work_dir = tempfile.mkdtemp()
+        try:
+            platform_json = os.path.join(work_dir, 'platform.json')
+            shutil.copy(self.platform_json, platform_json)
+            engine = portconfig.get_breakout_engine(platform_json)
+            with open(platform_json) as f:
+                platform = json.load(f)
+            platform['interfaces']['Ethernet4']['breakout_modes'] += ',1x50G(2)+2x25G(2)'
+            with open(platform_json, 'w') as f:
+                json.dump(platform, f)
+            changed = portconfig.get_breakout_engine(platform_json)
+            self.assertIsNot(changed, engine)
+            self.assertTrue(changed.is_valid_mode('Ethernet4', '1x50G(2)+2x25G(2)'))
+        finally:
+            shutil.rmtree(work_dir)
+
+
+class FakeConfigDB(object):
+    TABLE_NAME_SEPARATOR = '|'
+    db_name = 'CONFIG_DB'
+
+    def __init__(self, ports):
+        self.ports = ports
+        self.reads = 0
+        self.messages = Queue()
+        self.subscribed = threading.Event()
+
+    def get_dbid(self, db_name):
+        return 4
+
+    def get_table(self, table):
+        self.reads += 1
+        return self.ports
+
+    def get_redis_client(self, db_name):
+        return self
+
+    def pubsub(self):
+        return self
+
+    def psubscribe(self, pattern):
+        self.pattern = pattern
+        self.subscribed.set()
+
+    def listen(self):
+        while True:
+            yield self.messages.get()
+
+
+class TestPortConfigService(TestCase):
+
+    def setUp(self):
+        self.test_dir = os.path.dirname(os.path.realpath(__file__))
+        self.port_config = os.path.join(self.test_dir, 't0-sample-port-config.ini')
+        self.platform_json = os.path.join(self.test_dir, 'sample_platform.json')
+        self.hwsku_json = os.path.join(self.test_dir, 'sample_hwsku.json')
+
+    def test_file_port_config(self):
+        service = portconfig.PortConfigService(db_connect=lambda: None)
+        (ports, port_alias_map, _) = service.get_port_config(port_config_file=self.port_config)
+        self.assertEqual(ports, portconfig.parse_port_config_file(self.port_config)[0])
+        self.assertEqual(port_alias_map['fortyGigE0/0'], 'Ethernet0')
+        # Callers get copies
+        ports['Ethernet0']['speed'] = '10000'
+        self.assertNotIn('speed', service.get_port_config(port_config_file=self.port_config)[0]['Ethernet0'])
+        (ports, _, _) = service.get_port_config(port_config_file=self.platform_json, hwsku_config_file=self.hwsku_json)
+        self.assertEqual(len(ports), 81)
+
+    def test_reload_on_change(self):
+        service = portconfig.PortConfigService(db_connect=lambda: None)
+        work_dir = tempfile.mkdtemp()
+        try:
+            port_config = os.path.join(work_dir, 'port_config.ini')
+            shutil.copy(self.port_config, port_config)
+            self.assertEqual(len(service.get_port_config(port_config_file=port_config)[0]), 32)
+            with open(port_config, 'a') as f:
+                f.write('Ethernet128 128,129,130,131 fortyGigE0/128\n')
+            self.assertEqual(len(service.get_port_config(port_config_file=port_config)[0]), 33)
+        finally:
+            shutil.rmtree(work_dir)
+
+    def test_db_port_config(self):
+        config_db = FakeConfigDB({u'Ethernet0': {u'alias': u'etp1', u'lanes': u'0,1,2,3'}})
+        service = portconfig.PortConfigService(db_connect=lambda: config_db)
+        service.watch_db()
+        self.assertIs(service.get_config_db(), config_db)
+        self.assertTrue(config_db.subscribed.wait(5))
+        self.assertEqual(config_db.pattern, '__keyspace@4__:PORT|*')
+        while not service._db_watching:
+            time.sleep(0.01)
+
+        (ports, port_alias_map, _) = service.get_port_config()
+        self.assertEqual(ports, {'Ethernet0': {'alias': 'etp1', 'lanes': '0,1,2,3'}})
+        self.assertIs(type(ports.keys()[0]), str)
+        self.assertEqual(port_alias_map, {'etp1': 'Ethernet0'})
+        # The table is read again only after a change notification
+        service.get_port_config()
+        self.assertEqual(config_db.reads, 1)
+        config_db.ports = {u'Ethernet0': {u'alias': u'etp2', u'lanes': u'0,1,2,3'}}
+        config_db.messages.put({'type': 'pmessage'})
+        while service._db_port_config is not None:
+            time.sleep(0.01)
+        self.assertEqual(service.get_port_config()[1], {'etp2': 'Ethernet0'})
+        self.assertEqual(config_db.reads, 2)
+
+    def test_db_not_watched(self):
+        config_db = FakeConfigDB({u'Ethernet0': {u'alias': u'etp1', u'lanes': u'0,1,2,3'}})
+        service = portconfig.PortConfigService(db_connect=lambda: config_db)
+        threads = threading.active_count()
+        self.assertEqual(service.get_port_config()[1], {'etp1': 'Ethernet0'})
+        self.assertEqual(threading.active_count(), threads)
+        self.assertFalse(config_db.subscribed.is_set())
+        # Read on every call
+        config_db.ports = {u'Ethernet0': {u'alias': u'etp2', u'lanes': u'0,1,2,3'}}
+        self.assertEqual(service.get_port_config()[1], {'etp2': 'Ethernet0'})
+        self.assertEqual(config_db.reads, 2)
+        # Watched once connected
+        service.watch_db()
+        self.assertTrue(config_db.subscribed.wait(5))
+
+    def test_db_not_available(self):
+        service = portconfig.PortConfigService(db_connect=lambda: None)
+        self.assertEqual(service.get_port_config(hwsku='unknown', platform='unknown'), ({}, {}, {}))
@@ -0,0 +1,61 @@
+from unittest import TestCase
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import minigraph
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'benchmarks'))
+import scale_data
+
+
+class TestScaleData(TestCase):
+
+    def setUp(self):
+        self.test_dir = os.path.dirname(os.path.realpath(__file__))
+        self.bench_file = os.path.join(self.test_dir, '..', 'benchmarks', 'bench_scale.py')
+        self.output_dir = tempfile.mkdtemp()
+        self.scale = {'ports': 64, 'bgp_neighbors': 100, 'vlan_members': 120, 'acl_rules': 50, 'asics': 4}
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_single_asic(self):
+        files = scale_data.generate(self.output_dir, **self.scale)
+        data = minigraph.parse_xml(files['minigraph'], port_config_file=files['port_config'])
+        self.assertEqual(len(data['PORT']), 64)
+        self.assertEqual(len(data['BGP_NEIGHBOR']), 100)
+        self.assertEqual(len(data['VLAN_MEMBER']), 120)
+        self.assertEqual(len(data['PORTCHANNEL']), 4)
+        self.assertEqual(data['ACL_TABLE']['DATAACL']['ports'], sorted(data['PORTCHANNEL']))
+
+        with open(files['config_db']) as f:
+            config_db = json.load(f)
+        self.assertEqual(len(config_db['ACL_RULE']), 50)
+        self.assertEqual(len(config_db['VLAN_MEMBER']), 120)
+        self.assertEqual(sorted(config_db['BGP_NEIGHBOR']), sorted(data['BGP_NEIGHBOR']))
+
+    def test_multi_asic(self):
+        files = scale_data.generate(self.output_dir, **self.scale)
+        all_data = minigraph.parse_xml_namespaces(files['multi_asic_minigraph'], port_config_file=files['multi_asic_port_config'])
+        self.assertEqual(sorted(all_data), ['', 'asic0', 'asic1', 'asic2', 'asic3'])
+        self.assertEqual(len(all_data['']['BGP_NEIGHBOR']), 100)
+        # 32 front panel ports and 8 ports to the back-end asics
+        self.assertEqual(len(all_data['asic0']['PORT']), 40)
+        self.assertEqual(all_data['asic0']['DEVICE_METADATA']['localhost']['sub_role'], 'FrontEnd')
+        self.assertEqual(all_data['asic3']['DEVICE_METADATA']['localhost']['sub_role'], 'BackEnd')
+        self.assertEqual(sorted(neighbor['name'] for neighbor in all_data['asic3']['BGP_NEIGHBOR'].values()), ['ASIC0', 'ASIC1'])
+
+    def test_bench_json(self):
+        output = subprocess.check_output([sys.executable, self.bench_file, '--json', '--repeat', '1'] +
+                                         ['--{}={}'.format(name.replace('_', '-'), value) for name, value in self.scale.items()])
+        record = json.loads(output)
+        self.assertEqual(record['scale'], self.scale)
+        self.assertEqual(sorted(record['results']), sorted([
+            'get_port_config', 'parse_xml', 'parse_xml_namespaces', 'to_serialized', 'deep_update',
+            'render_bgpd', 'render_buffers', 'render_qos', 'render_interfaces']))
+        for result in record['results'].values():
+            self.assertTrue(result['median_ms'] >= 0)
@@ -0,0 +1,189 @@
+from unittest import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import sonic_device_util
+
+PLATFORM = 'x86_64-test_platform-r0'
+
+
+class TestDeviceIdentity(TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.saved = dict((name, getattr(sonic_device_util, name)) for name in (
+            'SONIC_DEVICE_PATH', 'MACHINE_CONF_FILE', 'SONIC_VERSION_FILE', 'BOOT_ID_FILE', 'get_hwsku'))
+        self.saved_env = os.environ.get(sonic_device_util.DEVICE_IDENTITY_FILE_ENV)
+        sonic_device_util.SONIC_DEVICE_PATH = self.work_dir
+        sonic_device_util.MACHINE_CONF_FILE = self.write('machine.conf', 'onie_platform={}\nonie_machine=test\n'.format(PLATFORM))
+        sonic_device_util.SONIC_VERSION_FILE = self.write('sonic_version.yml', "asic_type: 'broadcom'\n")
+        sonic_device_util.BOOT_ID_FILE = self.write('boot_id', 'boot-1\n')
+        self.identity_file = os.path.join(self.work_dir, 'sonic-device-identity.json')
+        os.environ[sonic_device_util.DEVICE_IDENTITY_FILE_ENV] = self.identity_file
+        os.mkdir(os.path.join(self.work_dir, PLATFORM))
+        self.write(os.path.join(PLATFORM, 'asic.conf'), 'NUM_ASIC=3\n')
+        self.hwsku_reads = 0
+        def get_hwsku():
+            self.hwsku_reads += 1
+            return 'Test-HwSku'
+        sonic_device_util.get_hwsku = get_hwsku
+        sonic_device_util._device_identity = None
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(sonic_device_util, name, value)
+        if self.saved_env is None:
+            del os.environ[sonic_device_util.DEVICE_IDENTITY_FILE_ENV]
+        else:
+            os.environ[sonic_device_util.DEVICE_IDENTITY_FILE_ENV] = self.saved_env
+        sonic_device_util._device_identity = None
+        shutil.rmtree(self.work_dir)
+
+    def write(self, name, content):
+        filename = os.path.join(self.work_dir, name)
+        with open(filename, 'w') as f:
+            f.write(content)
+        return filename
+
+    def test_identity(self):
+        identity = sonic_device_util.get_device_identity()
+        self.assertEqual(identity.to_dict(), {
+            'platform': PLATFORM,
+            'hwsku': 'Test-HwSku',
+            'asic_count': 3,
+            'namespaces': ['asic0', 'asic1', 'asic2'],
+            'asic_type': 'broadcom',
+        })
+        self.assertIs(sonic_device_util.get_device_identity(), identity)
+        identity.get('hwsku')
+        self.assertEqual(self.hwsku_reads, 1)
+        self.assertRaises(KeyError, identity.get, 'serial')
+
+    def test_saved_for_other_processes(self):
+        identity = sonic_device_util.get_device_identity()
+        self.assertEqual(identity.get('asic_type'), 'broadcom')
+        self.assertEqual(identity.get('hwsku'), 'Test-HwSku')
+        with open(self.identity_file) as f:
+            self.assertEqual(json.load(f)['fields'], {'asic_type': 'broadcom'})
+
+        # Another process started in the same boot reads the saved fields
+        with open(self.identity_file) as f:
+            saved = json.load(f)
+        saved['fields']['asic_type'] = 'saved'
+        with open(self.identity_file, 'w') as f:
+            json.dump(saved, f)
+        sonic_device_util._device_identity = None
+        identity = sonic_device_util.get_device_identity()
+        self.assertEqual(identity.get('asic_type'), 'saved')
+        self.assertIs(type(identity.get('asic_type')), str)
+
+        # After a reboot
+        self.write('boot_id', 'boot-2\n')
+        sonic_device_util._device_identity = None
+        self.assertEqual(sonic_device_util.get_device_identity().get('asic_type'), 'broadcom')
+
+    def test_hwsku_not_saved(self):
+        # A config reload can change the hwsku within a boot
+        self.assertEqual(sonic_device_util.get_device_identity().get('hwsku'), 'Test-HwSku')
+        self.assertEqual(sonic_device_util.get_device_identity().get('hwsku'), 'Test-HwSku')
+        self.assertEqual(self.hwsku_reads, 1)
+        self.assertFalse(os.path.exists(self.identity_file))
+        sonic_device_util._device_identity = None
+        sonic_device_util.get_device_identity().get('hwsku')
+        self.assertEqual(self.hwsku_reads, 2)
+
+    def test_reload_on_change(self):
+        identity = sonic_device_util.get_device_identity()
+        self.assertEqual(identity.get('asic_count'), 3)
+        self.assertTrue(sonic_device_util.is_multi_npu())
+        self.write(os.path.join(PLATFORM, 'asic.conf'), '# Single asic\nNUM_ASIC=1\n')
+        self.assertFalse(sonic_device_util.is_multi_npu())
+        identity = sonic_device_util.get_device_identity()
+        self.assertEqual(identity.get('asic_count'), 1)
+        self.assertEqual(identity.get('namespaces'), [])
+
+    def test_machine_info(self):
+        self.assertEqual(sonic_device_util.get_machine_info(), {'onie_platform': PLATFORM, 'onie_machine': 'test'})
+        self.assertEqual(sonic_device_util.get_platform(), PLATFORM)
+        # Callers get copies
+        sonic_device_util.get_machine_info()['onie_machine'] = 'other'
+        self.assertEqual(sonic_device_util.get_machine_info()['onie_machine'], 'test')
+        os.remove(sonic_device_util.MACHINE_CONF_FILE)
+        self.assertIsNone(sonic_device_util.get_machine_info())
+        self.assertEqual(sonic_device_util.get_platform(), '')
+
+
+class FakeConfigDBConnector(object):
+    connects = []
+
+    def __init__(self, use_unix_socket_path=False, namespace=None, **kwargs):
+        self.namespace = namespace
+
+    def connect(self, wait_for_init=True):
+        self.connects.append(self.namespace)
+
+    def get_entry(self, table, key):
+        sub_role = 'FrontEnd' if self.namespace in ('asic0', 'asic1') else 'BackEnd'
+        return {'hwsku': 'Test-HwSku', 'sub_role': sub_role}
+
+
+class FakeSonicDBConfig(object):
+    @staticmethod
+    def load_sonic_global_db_config(namespace=None):
+        pass
+
+    @staticmethod
+    def get_ns_list():
+        return ['', 'asic10', 'asic2', 'asic0', 'asic1']
+
+
+class FakeSwsssdk(object):
+    ConfigDBConnector = FakeConfigDBConnector
+    SonicDBConfig = FakeSonicDBConfig
+
+
+class TestForEachNamespace(TestCase):
+
+    def setUp(self):
+        self.saved = (sonic_device_util.swsssdk, sonic_device_util.get_num_npus)
+        sonic_device_util.swsssdk = FakeSwsssdk
+        sonic_device_util.get_num_npus = lambda: 4
+        sonic_device_util._namespace_config_dbs.clear()
+        del FakeConfigDBConnector.connects[:]
+
+    def tearDown(self):
+        (sonic_device_util.swsssdk, sonic_device_util.get_num_npus) = self.saved
+        sonic_device_util._namespace_config_dbs.clear()
+
+    def test_fan_out(self):
+        started = []
+        all_started = threading.Event()
+        def get_sub_role(namespace, config_db):
+            self.assertEqual(config_db.namespace, namespace or None)
+            return config_db.get_entry('DEVICE_METADATA', 'localhost')['sub_role']
+        def wait_for_all(namespace, config_db):
+            # Only returns if the calls of all the namespaces run at the same time
+            started.append(namespace)
+            if len(started) == 4:
+                all_started.set()
+            self.assertTrue(all_started.wait(5))
+            return get_sub_role(namespace, config_db)
+        self.assertEqual(sonic_device_util.for_each_namespace(wait_for_all), {
+            'asic0': 'FrontEnd', 'asic1': 'FrontEnd', 'asic2': 'BackEnd', 'asic10': 'BackEnd'})
+        # The connections are kept for the next calls
+        self.assertEqual(sonic_device_util.for_each_namespace(get_sub_role, ['', 'asic0'], jobs=1), {
+            '': 'BackEnd', 'asic0': 'FrontEnd'})
+        self.assertEqual(sorted(FakeConfigDBConnector.connects), [None, 'asic0', 'asic1', 'asic10', 'asic2'])
+
+    def test_errors(self):
+        def fail(namespace, config_db):
+            if namespace == 'asic1':
+                raise ValueError(namespace)
+        self.assertRaises(ValueError, sonic_device_util.for_each_namespace, fail)
+
+    def test_all_namespaces(self):
+        self.assertEqual(sonic_device_util.get_all_namespaces(), {
+            'front_ns': ['asic0', 'asic1'], 'back_ns': ['asic2', 'asic3']})
@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+import jinja2
+import netaddr
+
+import template_filters
+
+
+class TestTemplateFilters(TestCase):
+
+    def setUp(self):
+        template_filters.clear_cache()
+
+    def tearDown(self):
+        template_filters.MAX_CACHED_PREFIXES = 16384
+        template_filters.clear_cache()
+
+    def test_filters(self):
+        for value in ['10.0.0.1/31', '10.1.0.32/32', '192.168.0.1/21', 'fc00::71/126', 'FC00:1::32', u'10.0.0.56/31']:
+            network = netaddr.IPNetwork(str(value))
+            for attr in template_filters.PREFIX_ATTRS:
+                self.assertEqual(template_filters.prefix_attr(attr, value), str(getattr(network, attr)))
+            self.assertEqual(template_filters.ip_network(value), network.network)
+            self.assertEqual(template_filters.is_ipv4(value), network.version == 4)
+            self.assertEqual(template_filters.is_ipv6(value), network.version == 6)
+        self.assertTrue(template_filters.is_ipv4(netaddr.IPNetwork('10.0.0.1/31')))
+
+    def test_invalid(self):
+        for value in ['Ethernet0', 'Vlan1000', '10.0.0.256/24', 'NULL', u'\xe9']:
+            self.assertFalse(template_filters.is_ipv4(value))
+            self.assertFalse(template_filters.is_ipv6(value))
+            self.assertIsNone(template_filters.prefix_attr('prefixlen', value))
+        self.assertEqual(template_filters.ip_network('Vlan1000'), 'Invalid ip address Vlan1000')
+        for value in [None, '', []]:
+            self.assertFalse(template_filters.is_ipv4(value))
+            self.assertIsNone(template_filters.prefix_attr('ip', value))
+
+    def test_shared_prefixes(self):
+        prefix = template_filters.parse_prefix('10.0.0.1/31')
+        self.assertIs(template_filters.parse_prefix(u'10.0.0.1/31'), prefix)
+        self.assertRaises(AttributeError, setattr, prefix, 'version', 6)
+        self.assertRaises(AttributeError, setattr, prefix, 'prefixlen', 24)
+        # What the caller gets cannot change the cached prefix
+        template_filters.ip_network('10.0.0.1/31').value += 256
+        network = prefix.to_ip_network()
+        network.prefixlen = 24
+        self.assertEqual(template_filters.ip_network('10.0.0.1/31'), netaddr.IPAddress('10.0.0.0'))
+        self.assertEqual(template_filters.prefix_attr('netmask', '10.0.0.1/31'), '255.255.255.254')
+
+    def test_lru(self):
+        template_filters.MAX_CACHED_PREFIXES = 2
+        first = template_filters.parse_prefix('10.0.0.1/31')
+        template_filters.parse_prefix('10.0.0.3/31')
+        self.assertIs(template_filters.parse_prefix('10.0.0.1/31'), first)
+        template_filters.parse_prefix('10.0.0.5/31')
+        # The least recently used prefix is dropped
+        self.assertIs(template_filters.parse_prefix('10.0.0.1/31'), first)
+        misses = template_filters.stats['miss']
+        template_filters.parse_prefix('10.0.0.3/31')
+        self.assertEqual(template_filters.stats['miss'], misses + 1)
+
+    def test_template(self):
+        env = jinja2.Environment()
+        env.filters.update(template_filters.get_filters())
+        template = env.from_string(
+            '{% for intf, prefix in INTERFACE|pfx_filter %}{% if prefix|ipv4 %}'
+            '{{ intf }} {{ prefix|ip }} {{ prefix|netmask }} {{ prefix|ip_network }}\n'
+            '{% endif %}{% endfor %}')
+        data = {'INTERFACE': {'Ethernet0': {}, ('Ethernet0', '10.0.0.0/31'): {}, ('Ethernet0', 'fc00::70/126'): {}}}
+        self.assertEqual(template.render(data), 'Ethernet0 10.0.0.0 255.255.255.254 10.0.0.0\n')
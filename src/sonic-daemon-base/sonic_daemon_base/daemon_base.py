@@ -109,6 +109,17 @@ class DaemonBase(object):
 
     # Returns platform and hwsku
     def get_platform_and_hwsku(self):
+        try:
+            import sonic_device_util
+        except ImportError:
+            return self.get_platform_and_hwsku_from_cfggen()
+
+        # Same data as the commands below; the platform is read once per boot, the hwsku once per process
+        identity = sonic_device_util.get_device_identity()
+        return (identity.get('platform'), identity.get('hwsku'))
+
+    # Returns platform and hwsku, from sonic-cfggen commands
+    def get_platform_and_hwsku_from_cfggen(self):
         try:
             proc = subprocess.Popen([SONIC_CFGGEN_PATH, '-H', '-v', PLATFORM_KEY],
                                     stdout=subprocess.PIPE,